@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Offline stand-ins for asnmap, bbot and httpx.
+
+The benchmark puts small shims named after each tool on PATH that run
+`fake_tools.py <tool> [args...]`. Output follows the real tools' formats
+(asnmap -json records, bbot's stdout event lines plus
+~/.bbot/scans/<scan>/output.json, httpx's `url [status] [title] [tech]` lines)
+and is deterministic for a given target and size, so runs are comparable.
+
+Settings (environment):
+    OCELOT_BENCH_SUBDOMAINS      Subdomains bbot discovers per target (default 1000)
+    OCELOT_BENCH_LIVE_PERCENT    Share of probed hosts httpx reports as alive (default 60)
+    OCELOT_BENCH_HTTPX_DELAY_US  Simulated network time per probed host, in microseconds (default 0)
+"""
+
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Iterator, List
+
+WORDS = [
+    "www", "api", "dev", "staging", "mail", "vpn", "portal", "admin", "cdn", "static",
+    "app", "auth", "sso", "git", "ci", "jenkins", "grafana", "status", "docs", "blog",
+    "shop", "m", "beta", "test", "internal", "uat", "old", "legacy", "img", "assets",
+]
+
+STATUS_CODES = [200, 200, 200, 200, 301, 302, 403, 404, 500, 503]
+TITLES = ["Welcome", "Login", "Dashboard", "403 Forbidden", "Not Found", "Index of /", "API Gateway", ""]
+TECH = ["Nginx", "Apache", "Cloudflare", "PHP", "WordPress", "React", "Envoy", "IIS:10.0", "Jenkins", "Grafana"]
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    return int(value) if value.isdigit() else default
+
+
+def _seed(text: str) -> int:
+    return zlib.crc32(text.encode())
+
+
+def subdomains(target: str, count: int) -> Iterator[str]:
+    """`count` unique, realistic-looking subdomains of target."""
+    for i in range(count):
+        word = WORDS[i % len(WORDS)]
+        round_ = i // len(WORDS)
+        yield f"{word}.{target}" if round_ == 0 else f"{word}{round_}.{target}"
+
+
+def cidrs(target: str, count: int) -> List[str]:
+    """/16 ranges owned by the target's (fake) ASN."""
+    seed = _seed(target)
+    base = 11 + seed % 180
+    return [f"{base + n // 256}.{(seed + n) % 256}.0.0/16" for n in range(count)]
+
+
+def host_ip(ranges: List[str], index: int) -> str:
+    network = ranges[index % len(ranges)].split(".")
+    slot = index // len(ranges)
+    return f"{network[0]}.{network[1]}.{(slot >> 8) & 255}.{slot & 255 or 1}"
+
+
+def _range_count(size: int) -> int:
+    return max(1, min(64, size // 5000))
+
+
+def _option(argv: List[str], flag: str, default: str = "") -> str:
+    return argv[argv.index(flag) + 1] if flag in argv and argv.index(flag) + 1 < len(argv) else default
+
+
+# ----- asnmap -----
+
+def fake_asnmap(argv: List[str]) -> int:
+    size = _env_int("OCELOT_BENCH_SUBDOMAINS", 1000)
+    as_json = "-json" in argv
+    out = sys.stdout
+    for target in (line.strip() for line in sys.stdin):
+        if not target:
+            continue
+        seed = _seed(target.lower())
+        ranges = cidrs(target.lower(), _range_count(size))
+        if not as_json:
+            out.write("\n".join(ranges) + "\n")
+            continue
+        for cidr in ranges:
+            out.write(json.dumps({
+                "timestamp": "2025-01-01 00:00:00 +0000 UTC",
+                "input": target,
+                "as_number": f"AS{10000 + seed % 50000}",
+                "as_name": f"{target.split('.')[0].upper()}-NET",
+                "as_country": "US",
+                "as_range": [cidr],
+            }) + "\n")
+    return 0
+
+
+# ----- bbot -----
+
+def fake_bbot(argv: List[str]) -> int:
+    target = _option(argv, "-t").lower()
+    if not target:
+        sys.stderr.write("bbot: -t is required\n")
+        return 2
+    size = _env_int("OCELOT_BENCH_SUBDOMAINS", 1000)
+    ranges = cidrs(target, _range_count(size))
+    scan_name = "bench_" + re.sub(r"[^a-z0-9]", "_", target)
+    scan_dir = Path.home() / ".bbot" / "scans" / scan_name
+    scan_dir.mkdir(parents=True, exist_ok=True)
+
+    out = sys.stdout
+    out.write(f"[INFO] Scan {scan_name} seeded with 1 target ({target})\n")
+    out.write(f"[INFO] Starting scan {scan_name}\n")
+    with open(scan_dir / "output.json", "w", encoding="utf-8") as events:
+        def emit(type_: str, data, host: str, module: str, tags: List[str], distance: int = 0, **extra):
+            events.write(json.dumps({
+                "type": type_, "data": data, "host": host, "module": module,
+                "scope_distance": distance, "tags": tags, "scan": scan_name, **extra,
+            }) + "\n")
+            if distance > 0:
+                return  # bbot only prints in-scope events
+            shown = data if isinstance(data, str) else json.dumps(data)
+            out.write(f"[{type_}]\t{shown}\t{module}\t({', '.join(tags)})\n")
+
+        emit("SCAN", {"name": scan_name, "target": {"seeds": [target]}}, "", "TARGET", ["in-scope"])
+        for i, host in enumerate(subdomains(target, size)):
+            ip = host_ip(ranges, i)
+            emit("DNS_NAME", host, host, "crt" if i % 3 else "certspotter", ["a-record", "in-scope"],
+                 resolved_hosts=[ip])
+            if i % 4 == 0:
+                emit("IP_ADDRESS", ip, ip, "A", ["ipv4", "in-scope"])
+            if i % 10 == 0:
+                emit("OPEN_TCP_PORT", f"{host}:443", host, "portscan", ["in-scope"], port=443)
+            if i % 25 == 0:
+                emit("TECHNOLOGY", {"technology": TECH[i % len(TECH)], "host": host}, host, "wappalyzer",
+                     ["in-scope"])
+            if i % 50 == 0:
+                # Out-of-scope affiliate noise, as bbot's DNS recursion produces
+                emit("DNS_NAME", f"{host.split('.')[0]}.cdn-provider.net", f"{host.split('.')[0]}.cdn-provider.net",
+                     "dnsresolve", ["cname-record"], distance=1)
+    out.write(f"[SUCC] {scan_name}: scan finished, results in {scan_dir}\n")
+    return 0
+
+
+# ----- httpx -----
+
+def fake_httpx(argv: List[str]) -> int:
+    live_percent = _env_int("OCELOT_BENCH_LIVE_PERCENT", 60)
+    delay = _env_int("OCELOT_BENCH_HTTPX_DELAY_US", 0) / 1_000_000
+    match_codes = {int(c) for c in _option(argv, "-mc").split(",") if c.strip().isdigit()}
+    filter_codes = {int(c) for c in _option(argv, "-fc").split(",") if c.strip().isdigit()}
+    list_file = _option(argv, "-l")
+    source = open(list_file, encoding="utf-8") if list_file else sys.stdin
+
+    out = sys.stdout
+    pending_delay = 0.0
+    with source:
+        for line in source:
+            host = line.strip().split("://", 1)[-1].split("/", 1)[0]
+            if not host:
+                continue
+            pending_delay += delay
+            if pending_delay >= 0.01:
+                time.sleep(pending_delay)
+                pending_delay = 0.0
+            seed = _seed(host)
+            if seed % 100 >= live_percent:
+                continue
+            status = STATUS_CODES[seed % len(STATUS_CODES)]
+            if (match_codes and status not in match_codes) or status in filter_codes:
+                continue
+            fields = [f"https://{host}"]
+            if "-sc" in argv:
+                fields.append(f"[{status}]")
+            if "-title" in argv:
+                fields.append(f"[{TITLES[seed % len(TITLES)]}]")
+            if "-tech-detect" in argv:
+                fields.append(f"[{TECH[seed % len(TECH)]},{TECH[(seed >> 8) % len(TECH)]}]")
+            out.write(" ".join(fields) + "\n")
+    return 0
+
+
+TOOLS = {"asnmap": fake_asnmap, "bbot": fake_bbot, "httpx": fake_httpx}
+
+
+def main() -> int:
+    if len(sys.argv) < 2 or sys.argv[1] not in TOOLS:
+        sys.stderr.write(f"usage: fake_tools.py {{{','.join(TOOLS)}}} [args...]\n")
+        return 2
+    try:
+        return TOOLS[sys.argv[1]](sys.argv[2:])
+    except BrokenPipeError:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Scripted agno model for offline benchmarks.
+
+Plays a fixed OSINT assessment without a provider: the team leader delegates
+to each member in kill-chain order, and each member calls its tools in a set
+sequence before answering with the last tool result. Which script runs is
+decided by the member's instructions in the system message. Token usage is
+estimated from message and tool schema sizes so telemetry and /stats see
+realistic numbers. Like a provider's automatic prefix cache, a request whose
+tools and system prompt were seen before reports that prefix as cached.
+"""
+
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+from agno.models.base import Model
+from agno.models.metrics import MessageMetrics
+from agno.models.response import ModelResponse
+from prompt import (
+    ASNMAP_AGENT_PROMPT,
+    BBOT_RECON_AGENT_PROMPT,
+    HTTPX_FINGERPRINT_AGENT_PROMPT,
+    OSINT_REPORTING_AGENT_PROMPT,
+)
+
+ToolCall = Tuple[str, Dict]
+
+
+def member_scripts(target: str, hosts_file: str) -> Dict[str, List[ToolCall]]:
+    """Tool calls each member makes, keyed by the prompt that identifies the member."""
+    return {
+        ASNMAP_AGENT_PROMPT: [("asnmap", {"target": target, "args": "-json"})],
+        BBOT_RECON_AGENT_PROMPT: [
+            ("bbot", {"target": target}),
+            ("bbot_events", {"target": target, "event_types": "DNS_NAME,OPEN_TCP_PORT", "limit": 20}),
+        ],
+        HTTPX_FINGERPRINT_AGENT_PROMPT: [
+            ("export_assets", {"target": target, "kind": "subdomains", "file_path": hosts_file}),
+            ("httpx", {"file_path": hosts_file, "target": target}),
+        ],
+        OSINT_REPORTING_AGENT_PROMPT: [
+            ("query_assets", {"target": target}),
+            ("query_assets", {"target": target, "kind": "probes", "limit": 50}),
+        ],
+    }
+
+
+@dataclass
+class ScriptedModel(Model):
+    """agno Model that follows a fixed assessment script instead of calling a provider."""
+
+    id: str = "scripted"
+    name: str = "Scripted"
+    provider: str = "Bench"
+    target: str = "example.com"
+    hosts_file: str = "hosts.txt"
+    member_ids: List[str] = field(default_factory=list)  # Delegation order of the team leader
+    think_seconds: float = 0.0  # Simulated model latency per turn
+    cached_prefixes: Set[str] = field(default_factory=set)
+
+    def _step(self, messages, tools: Optional[List[Dict]]) -> ModelResponse:
+        if self.think_seconds:
+            time.sleep(self.think_seconds)
+        tool_names = {t.get("function", {}).get("name") for t in tools or []}
+        results = _results_since_last_user(messages)
+
+        if "delegate_task_to_member" in tool_names:
+            script = [
+                ("delegate_task_to_member", {"member_id": member_id, "task": f"Run your part of the assessment of {self.target}"})
+                for member_id in self.member_ids
+            ]
+        else:
+            system = next((str(m.content) for m in messages if m.role == "system"), "")
+            script = next((calls for prompt, calls in member_scripts(self.target, self.hosts_file).items()
+                           if prompt.strip() in system), [])
+
+        if len(results) < len(script):
+            name, arguments = script[len(results)]
+            return self._response(messages, tools, "", [{
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }])
+        summary = results[-1][:2000] if results else f"Nothing to do for {self.target}."
+        return self._response(messages, tools, f"Finished ({len(results)} tool calls).\n\n{summary}")
+
+    def _response(self, messages, tools: Optional[List[Dict]], content: str,
+                  tool_calls: Optional[List[Dict]] = None) -> ModelResponse:
+        # Tool schemas and the system prompt lead every request: that prefix is what a provider can cache
+        prefix = json.dumps(tools or []) + next((str(m.content or "") for m in messages if m.role == "system"), "")
+        prompt_chars = len(prefix) + sum(len(str(m.content or "")) for m in messages if m.role != "system")
+        key = hashlib.sha1(prefix.encode()).hexdigest()
+        cached = len(prefix) // 4 if key in self.cached_prefixes else 0
+        self.cached_prefixes.add(key)
+        output_tokens = len(content) // 4 + 20 * len(tool_calls or [])
+        usage = MessageMetrics(input_tokens=prompt_chars // 4, output_tokens=output_tokens,
+                               total_tokens=prompt_chars // 4 + output_tokens, cache_read_tokens=cached)
+        return ModelResponse(role="assistant", content=content, tool_calls=tool_calls or [], response_usage=usage)
+
+    def invoke(self, messages, tools=None, **kwargs):
+        return self._step(messages, tools)
+
+    async def ainvoke(self, messages, tools=None, **kwargs):
+        return self._step(messages, tools)
+
+    def invoke_stream(self, messages, tools=None, **kwargs):
+        yield self._step(messages, tools)
+
+    async def ainvoke_stream(self, messages, tools=None, **kwargs):
+        yield self._step(messages, tools)
+
+    def _parse_provider_response(self, response, **kwargs):
+        return response
+
+    def _parse_provider_response_delta(self, response):
+        return response
+
+
+def _results_since_last_user(messages) -> List[str]:
+    """Tool results of the current turn (history from earlier runs is ignored)."""
+    results: List[str] = []
+    for message in messages:
+        if message.role == "user":
+            results = []
+        elif message.role == "tool":
+            results.append(str(message.content or ""))
+    return results
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark for Oselot.
+
+Runs the recon tools, the deterministic pipeline and full agent assessments
+against fake asnmap/bbot/httpx binaries (fake_tools.py) and a scripted model
+(mock_model.py), so no network, recon tooling or API key is needed. Each
+scenario and size runs in a fresh interpreter with its own HOME, so asset
+stores, caches and bbot scans never leak between runs.
+
+Reports wall time, peak RSS of the Oselot process and per-stage throughput
+taken from the run's telemetry. With --baseline it exits 1 when a run is
+slower or larger than the baseline by more than --tolerance, or when the
+asset store does not hold every discovered subdomain:
+
+    python bench/recon_bench.py
+    python bench/recon_bench.py --sizes 1000,100000,1000000 --scenarios tools,pipeline
+    python bench/recon_bench.py --json bench-results.json
+    python bench/recon_bench.py --baseline bench-results.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+
+SCENARIOS = ["tools", "pipeline", "agent", "agent-async"]
+DEFAULT_SIZES = [1000, 10000]
+TARGET = "bench-target.com"
+
+
+# ----- Worker (runs inside the isolated interpreter) -----
+
+def _tool_stages(target: str, work_dir: Path) -> List[tuple]:
+    from tools import asnmap, bbot, bbot_events, export_assets, httpx, httpx_incremental, query_assets
+
+    hosts_file = str(work_dir / "hosts.txt")
+    return [
+        ("asnmap", lambda: asnmap.entrypoint(target, "-json")),
+        ("bbot", lambda: bbot.entrypoint(target)),
+        ("bbot_events", lambda: bbot_events.entrypoint(event_types="DNS_NAME,OPEN_TCP_PORT", target=target)),
+        ("export_assets", lambda: export_assets.entrypoint(target, "subdomains", hosts_file)),
+        ("httpx", lambda: httpx.entrypoint(hosts_file, target=target)),
+        # First incremental pass probes everything and records snapshots; the rescan only probes a sample
+        ("httpx_incremental", lambda: httpx_incremental.entrypoint(target)),
+        ("httpx_rescan", lambda: httpx_incremental.entrypoint(target)),
+        ("query_assets", lambda: query_assets.entrypoint(target, "probes", limit=50)),
+    ]
+
+
+def _run_tools(target: str, work_dir: Path):
+    from telemetry import TELEMETRY
+
+    for name, stage in _tool_stages(target, work_dir):
+        with TELEMETRY.track("stage", name, agent="bench") as event:
+            output = stage()
+            event.ok = not output.startswith("Error")
+            if not event.processes:
+                event.lines = output.count("\n") + 1
+        if not event.ok:
+            raise RuntimeError(f"{name} failed: {output[:500]}")
+
+
+def _run_pipeline(target: str, work_dir: Path):
+    from pipeline import run_recon
+
+    run = run_recon(target, progress=lambda message: None)
+    failed = [stage.name for stage in run.stages.values() if not stage.ok]
+    if failed:
+        raise RuntimeError(f"pipeline stages failed: {', '.join(failed)}")
+
+
+def _run_agent(target: str, work_dir: Path, use_async: bool, think_seconds: float):
+    from agno.utils.team import get_member_id
+    from agent import OsintAgentSystem
+    from mock_model import ScriptedModel
+
+    class BenchAgentSystem(OsintAgentSystem):
+        def _get_model(self, model_id: str):
+            return ScriptedModel(target=target, hosts_file=str(work_dir / "hosts.txt"), think_seconds=think_seconds)
+
+    system = BenchAgentSystem(model_name="scripted", use_async=use_async)
+    system.model.member_ids = [get_member_id(member) for member in system._members()]
+    system.run_assessment(f"Map the external attack surface of {target}", stream=False)
+
+
+def run_worker(scenario: str, size: int, result_file: Path, think_seconds: float):
+    sys.path[:0] = [str(SRC_DIR), str(BENCH_DIR)]
+    from store import ASSET_STORE
+    from telemetry import TELEMETRY
+
+    # Import up front so interpreter and agno start-up are not counted as run time
+    import pipeline  # noqa: F401
+    if scenario.startswith("agent"):
+        import agent  # noqa: F401
+
+    work_dir = Path.cwd()
+    started = time.monotonic()
+    error = ""
+    try:
+        if scenario == "tools":
+            _run_tools(TARGET, work_dir)
+        elif scenario == "pipeline":
+            _run_pipeline(TARGET, work_dir)
+        else:
+            _run_agent(TARGET, work_dir, use_async=scenario == "agent-async", think_seconds=think_seconds)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall = time.monotonic() - started
+
+    counts = ASSET_STORE.counts(TARGET)
+    if not error and counts.get("subdomains") != size:
+        error = f"asset store holds {counts.get('subdomains')} subdomains, expected {size}"
+
+    stages = []
+    for row in TELEMETRY.summary():
+        if row["kind"] == "llm":
+            continue
+        stages.append({
+            "kind": row["kind"],
+            "name": row["name"],
+            "calls": row["count"],
+            "errors": row["errors"],
+            "seconds": round(row["seconds"], 3),
+            "lines": row["lines"],
+            "lines_per_s": round(row["lines"] / row["seconds"]) if row["seconds"] else 0,
+        })
+    llm = [row for row in TELEMETRY.summary() if row["kind"] == "llm"]
+
+    # ru_maxrss is in kilobytes on Linux
+    result = {
+        "scenario": scenario,
+        "size": size,
+        "wall_seconds": round(wall, 3),
+        "subdomains_per_s": round(size / wall) if wall else 0,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "llm_turns": sum(row["count"] for row in llm),
+        "input_tokens": sum(row["input_tokens"] for row in llm),
+        "cached_tokens": sum(row["cached_tokens"] for row in llm),
+        "assets": counts,
+        "stages": stages,
+        "error": error,
+    }
+    result_file.write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+
+# ----- Driver -----
+
+def _write_shims(bin_dir: Path):
+    """asnmap/bbot/httpx executables that forward to fake_tools.py."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for tool in ("asnmap", "bbot", "httpx"):
+        shim = bin_dir / tool
+        shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{BENCH_DIR / "fake_tools.py"}" {tool} "$@"\n')
+        shim.chmod(0o755)
+
+
+def run_scenario(scenario: str, size: int, args) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="oselot-bench-") as tmp:
+        home = Path(tmp)
+        bin_dir = home / "bin"
+        _write_shims(bin_dir)
+        env = {
+            **os.environ,
+            "HOME": str(home),
+            "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+            "OCELOT_HTTPX_BIN": str(bin_dir / "httpx"),
+            "OCELOT_BENCH_SUBDOMAINS": str(size),
+            "OCELOT_BENCH_HTTPX_DELAY_US": str(args.httpx_delay_us),
+            "OCELOT_TELEMETRY_FILE": "",
+            "OCELOT_PROMETHEUS_TEXTFILE": "",
+            "OCELOT_MCP_HEALTH_INTERVAL": "0",
+            # Provider SDKs and Tavily want a key at construction; nothing is ever sent
+            "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench"),
+            "TAVILY_API_KEY": os.environ.get("TAVILY_API_KEY", "bench"),
+        }
+        result_file = home / "result.json"
+        log_file = home / "worker.log"
+        with open(log_file, "w") as log:
+            proc = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--worker", scenario, "--sizes", str(size),
+                 "--result", str(result_file), "--think-seconds", str(args.think_seconds)],
+                cwd=home, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+        if proc.returncode != 0 or not result_file.exists():
+            tail = log_file.read_text(errors="replace")[-3000:]
+            return {"scenario": scenario, "size": size, "error": f"worker exited {proc.returncode}:\n{tail}"}
+        return json.loads(result_file.read_text())
+
+
+def format_result(result: Dict) -> str:
+    head = f"{result['scenario']:<12} {result['size']:>9,}"
+    if "wall_seconds" not in result:
+        return f"{head}  FAILED\n  {result['error']}"
+    lines = [
+        f"{head} {result['wall_seconds']:9.2f}s {result['subdomains_per_s']:>9,}/s "
+        f"peak rss {result['peak_rss_mb']:7.1f} MB"
+        + (f"  {result['llm_turns']} LLM turns, {result['input_tokens']:,} tokens in "
+           f"({result.get('cached_tokens', 0):,} cached)" if result["llm_turns"] else "")
+    ]
+    for stage in result["stages"]:
+        lines.append(
+            f"    {stage['kind']:<10} {stage['name'][:34]:<34} {stage['calls']:>3}x {stage['seconds']:8.2f}s "
+            f"{stage['lines']:>10,} lines {stage['lines_per_s']:>10,} lines/s"
+        )
+    if result["error"]:
+        lines.append(f"  FAILED: {result['error']}")
+    return "\n".join(lines)
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Regressions of wall time or peak RSS against a baseline run."""
+    previous = {(r["scenario"], r["size"]): r for r in baseline if "wall_seconds" in r}
+    problems = []
+    for result in results:
+        before = previous.get((result["scenario"], result["size"]))
+        if not before or "wall_seconds" not in result:
+            continue
+        for metric in ("wall_seconds", "peak_rss_mb"):
+            if result[metric] > before[metric] * (1 + tolerance):
+                problems.append(
+                    f"{result['scenario']} @ {result['size']:,}: {metric} {result[metric]} vs baseline {before[metric]} "
+                    f"(+{(result[metric] / before[metric] - 1) * 100:.0f}%)"
+                )
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Oselot offline end-to-end benchmark")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated subdomain counts (e.g., 1000,100000,1000000)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Any of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--httpx-delay-us", type=int, default=0,
+                        help="Simulated network time per probed host, in microseconds")
+    parser.add_argument("--think-seconds", type=float, default=0.0, help="Simulated model latency per LLM turn")
+    parser.add_argument("--json", help="Write the results to this file (usable later as --baseline)")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown/growth vs baseline (0.25 = 25%%)")
+    parser.add_argument("--worker", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    if args.worker:
+        run_worker(args.worker, sizes[0], Path(args.result), args.think_seconds)
+        return 0
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = []
+    for size in sizes:
+        for scenario in scenarios:
+            result = run_scenario(scenario, size, args)
+            print(format_result(result), flush=True)
+            results.append(result)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    failed = any(result.get("error") for result in results)
+    if args.baseline:
+        problems = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        failed = failed or bool(problems)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
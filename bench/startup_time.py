@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for Oselot.
+
+Imports each entry module in a fresh interpreter with `python -X importtime`,
+takes the best of several runs, and fails if a module exceeds its budget or
+pulls in a provider/MCP SDK at import time. Run it in CI to catch cold-start
+regressions:
+
+    python bench/startup_time.py
+    python bench/startup_time.py --runs 10 --budget oselot_cli=100 --top 15
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Import budgets in milliseconds (cumulative import time of the module)
+DEFAULT_BUDGETS_MS = {
+    "oselot_cli": 150,
+    "agent": 2500,
+}
+
+# SDKs that must only load once a model or MCP server is actually selected
+LAZY_MODULES = ["anthropic", "openai", "google.genai", "mcp", "tavily"]
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str) -> Tuple[float, List[Tuple[float, str]], List[str]]:
+    """Import a module in a fresh interpreter.
+
+    Returns:
+        (cumulative ms of the module, [(self ms, name)] of every import, lazy SDKs that got loaded)
+    """
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    total_ms = 0.0
+    imports = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        imports.append((int(self_us) / 1000, name))
+        if name == module:
+            total_ms = int(cumulative_us) / 1000
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return total_ms, imports, loaded
+
+
+def parse_budgets(values: List[str]) -> Dict[str, float]:
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for value in values:
+        module, _, ms = value.partition("=")
+        budgets[module] = float(ms)
+    return budgets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Oselot import-time budget check")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module; the best run counts")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="Override or add a budget, e.g. oselot_cli=100")
+    parser.add_argument("--top", type=int, default=10, help="Show the N slowest imports of each module")
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in parse_budgets(args.budget).items():
+        runs = [measure(module) for _ in range(max(1, args.runs))]
+        best_ms, imports, loaded = min(runs, key=lambda run: run[0])
+        status = "ok" if best_ms <= budget else "OVER BUDGET"
+        print(f"{module:<12} {best_ms:8.1f} ms (budget {budget:.0f} ms, best of {len(runs)})  {status}")
+        if loaded:
+            print(f"  eagerly imported: {', '.join(loaded)} - these must load lazily")
+        for self_ms, name in sorted(imports, reverse=True)[:args.top]:
+            print(f"  {self_ms:8.1f} ms  {name}")
+        failed = failed or best_ms > budget or bool(loaded)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
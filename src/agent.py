@@ -1,24 +1,22 @@
 import os
 import asyncio
+import inspect
+import time
 from pathlib import Path
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from agno.agent import Agent
 from agno.db.sqlite import SqliteDb
-from agno.models.openai import OpenAIChat
-from agno.models.anthropic import Claude
-from agno.models.google import Gemini
 from agno.team.team import Team
-from agno.tools.tavily import TavilyTools
-from agno.tools.file import FileTools
-from tools import OSINT_TOOLS
-from agno.tools.mcp import MultiMCPTools, MCPTools
+from tools import OSINT_TOOLS, ASYNC_OSINT_TOOLS
+from mcp_pool import MCP_POOL
+from telemetry import SYNC_TOOLS, TELEMETRY
+from llm_cache import LLM_CACHE, cached_model
+from toolscope import format_scope, load_role_tools, scope_tools, tool_name
 from prompt import *
+from settings import MODEL_ROLES, OCELOT_DIR, PROMPT_CACHE, role_models_from_env
 load_dotenv()
 
-OCELOT_DIR = Path.home() / ".ocelot"
-OCELOT_DIR.mkdir(exist_ok=True)
-
 class OsintAgentSystem:
     """
     Complete and comprehensive OSINT agent with hierarchical delegation.
@@ -33,21 +31,32 @@ class OsintAgentSystem:
                  use_storage: bool = False,
                  use_mcp: bool = False,
                  mcp_servers: Optional[List[Dict]] = None,
-                 
+                 use_async: bool = False,
+                 role_models: Optional[Dict[str, str]] = None,
                  ):
         
 ## Give the agent a mind
 
         self.model_name = model_name 
-        self.model = self._get_model(model_name)
+        # Roles (see MODEL_ROLES) running on another model than model_name: OCELOT_MODEL_<ROLE>, then role_models
+        self.role_models = {**role_models_from_env(), **(role_models or {})}
+        self._models = {}  # Model instances by id, shared by every role on that model
+        self.model = self._model_for("manager")
         self.use_memory = use_memory
         self.use_storage = use_storage
         self.use_mcp = use_mcp
-        self.mcp_servers = mcp_servers or []
+        self.mcp_servers = mcp_servers if mcp_servers is not None else []
         self.mcp_tools = None
+        self.mcp_toolkits = []  # Built MCP toolkits, kept warm across /mcp toggles
+        self._mcp_servers_built = 0
+        self.use_async = use_async
+        self._dbs = {}  # Open SQLite handles by file name, reused across toggles
             
           
 ## Give agent base tools
+        from agno.tools.tavily import TavilyTools
+        from agno.tools.file import FileTools
+
         self.base_tools = [
             TavilyTools(), # Web search but will need an API Key remember
             FileTools(base_dir=Path("."),
@@ -56,19 +65,22 @@ class OsintAgentSystem:
         ]
 ## Initialize all  tools
         self.all_tools = self._initialize_tools()
+        # Each specialist only gets the tools its role needs (see toolscope.py)
+        self.role_tools = load_role_tools(known={tool_name(tool) for tool in self.all_tools})
+        # Recon and web search results are recorded/replayed along with model responses (see llm_cache.py)
+        LLM_CACHE.tool_names |= {tool_name(tool) for tool in OSINT_TOOLS + ASYNC_OSINT_TOOLS}
+        LLM_CACHE.tool_names |= set(self.base_tools[0].functions)
+        # The async hooks run these plain-function tools on a worker thread (see telemetry.call_tool_async)
+        functions = ASYNC_OSINT_TOOLS + [f for toolkit in self.base_tools for f in toolkit.functions.values()]
+        SYNC_TOOLS.update(f.name for f in functions if not inspect.iscoroutinefunction(f.entrypoint)
+                          and not inspect.isasyncgenfunction(f.entrypoint))
 
 
 ## Set up storage
-        self.storage_db = None
-        if use_storage:
-            storage_path = OCELOT_DIR / "agent_storage.db"
-            self.storage_db = SqliteDb(db_file=str(storage_path))
+        self.storage_db = self._open_db("agent_storage.db") if use_storage else None
 
 #Set up memory
-        self.memory_db = None
-        if use_memory:
-            memory_path = OCELOT_DIR / "ocelot_agents.db"
-            self.memory_db = SqliteDb(db_file=str(memory_path))
+        self.memory_db = self._open_db("ocelot_agents.db") if use_memory else None
 
 # Create specialized agents and team        
         self._create_all_agents()
@@ -77,16 +89,31 @@ class OsintAgentSystem:
 
 ##  Create mind for agent - Create model selector
     def _get_model(self, model_id: str):
+        """Gets the right model based on model id, with its calls going through the record/replay cache"""
+        return cached_model(self._provider_model(model_id))
+
+    def _provider_model(self, model_id: str):
         """
-        Gets the right model based on model id
+        Provider model for a model id.
+        Provider SDKs are imported here, so only the selected one is ever loaded.
+
+        Every request starts with the same tools and system prompt, so prompt
+        caching is turned on where the provider needs it (OCELOT_PROMPT_CACHE).
         """
 
         if "claude" in model_id.lower():
-            return Claude(id=model_id)
+            from agno.models.anthropic import Claude
+            # cache_control breakpoints after the tool list and after the system prompt
+            return Claude(id=model_id, cache_system_prompt=PROMPT_CACHE, cache_tools=PROMPT_CACHE)
         elif "gpt" in model_id.lower() or "o1" in model_id.lower(
         ) or "o3" in model_id.lower():
-            return OpenAIChat(id=model_id)
+            from agno.models.openai import OpenAIChat
+            # Prefix caching is automatic; a stable key keeps our requests on the same cache
+            extra_body = {"prompt_cache_key": f"oselot-{model_id}"} if PROMPT_CACHE else None
+            return OpenAIChat(id=model_id, extra_body=extra_body)
         elif "gemini" in model_id.lower():
+            # Gemini 2.5+ caches repeated prefixes implicitly
+            from agno.models.google import Gemini
             return Gemini(id=model_id)
         else:
             try:
@@ -94,69 +121,75 @@ class OsintAgentSystem:
                 return LiteLLM(id=model_id, name="LiteLLM")
             except ImportError:
                 #Fallback to OpenAI
+                from agno.models.openai import OpenAIChat
                 return OpenAIChat(id=model_id)
             
 ## Create the initialize tools helper function
     def _initialize_tools(self):
         """Initialize tools including MCP Servers (Optional)"""
-        tools = OSINT_TOOLS + self.base_tools
+        # Async variants let arun_assessment overlap independent scans
+        tools = (ASYNC_OSINT_TOOLS if self.use_async else OSINT_TOOLS) + self.base_tools
 
         # Add MCP tools if enabled and servers configured
         if self.use_mcp and self.mcp_servers:
-            try:
-                #Separate command-based and URL-based servers
-                commands = []
-                url_servers = []
-
-                for server in self.mcp_servers:
-                    if 'command' in server:
-                        commands.append(server['command'])
-                    elif 'url' in server:
-                        url_servers.append(server)
-
-                # Add command-based servers via MultiMCPTools
-                if commands:
-                    self.mcp_tools = MultiMCPTools(commands)
-                    tools.append(self.mcp_tools)
-
-                #Add URL-based servers individually
-                for url_server in url_servers :
-                    try:
-                        mcp_tool = MCPTools(
-                            url=url_server['url'],
-                            transport=url_server.get('transport','streamable-http')
-                        )
-                        tools.append(mcp_tool)
-                    except Exception as e:
-                        print(
-                            f"Warning: Failed to initialize MCP Server {url_server.get('name', 'unknown')}: {e}"
-                        )
+            tools.extend(self._build_mcp_tools())
 
-            except Exception as e:
-                print (f" Warning: Failed to initialize MCP tools: {e}")
-            
         return tools
-    
-    def _create_all_agents(self):
-        """
-        Creates all specialized OSINT agents with their tools and prompts
-        """
 
-        agent_kwargs = {
-            "model": self.model,
-            "tools": self.all_tools
-        }
+    def _build_mcp_tools(self):
+        """Toolkits for MCP servers not attached yet (all of them on first call).
+
+        Servers are started once by the shared MCP pool and stay connected, so
+        reconfiguring or rebuilding the agents reuses the running processes.
+        """
+        servers = self.mcp_servers[self._mcp_servers_built:]
+        self._mcp_servers_built = len(self.mcp_servers)
+        for server in servers:
+            try:
+                self.mcp_toolkits.append(MCP_POOL.toolkit(server))
+            except Exception as e:
+                print(
+                    f"Warning: Failed to initialize MCP Server {server.get('name', 'unknown')}: {e}"
+                )
+        self.mcp_tools = self.mcp_toolkits[0] if self.mcp_toolkits else None
+        return self.mcp_toolkits
+
+    def _open_db(self, file_name: str):
+        """Open (or reuse) a SQLite handle under ~/.ocelot"""
+        if file_name not in self._dbs:
+            self._dbs[file_name] = SqliteDb(db_file=str(OCELOT_DIR / file_name))
+        return self._dbs[file_name]
+
+    def _agent_db_kwargs(self) -> Dict:
+        """Storage/memory settings shared by every specialist agent"""
+        kwargs = {"db": None, "enable_user_memories": False, "add_history_to_context": False}
 
         # Add storage databse if enabled
         if self.storage_db:
-            agent_kwargs["db"] = self.storage_db
-            agent_kwargs["add_history_to_context"] = True
+            kwargs["db"] = self.storage_db
+            kwargs["add_history_to_context"] = True
 
         # Add memory on top of storage if enabled
         if self.memory_db:
-            agent_kwargs["db"] = self.memory_db
-            agent_kwargs["enable_user_memories"] = True
-            agent_kwargs["add_history_to_context"] = True
+            kwargs["db"] = self.memory_db
+            kwargs["enable_user_memories"] = True
+            kwargs["add_history_to_context"] = True
+        return kwargs
+
+    def _team_db_kwargs(self) -> Dict:
+        """Memory settings for the team (history is always on for the team)"""
+        return {"db": self.memory_db, "enable_user_memories": bool(self.memory_db)}
+
+    def _create_all_agents(self):
+        """
+        Creates all specialized OSINT agents with their tools and prompts
+        """
+
+        agent_kwargs = {
+            "tool_hooks": [TELEMETRY.tool_hook],
+            "post_hooks": [TELEMETRY.llm_hook],
+            **self._agent_db_kwargs(),
+        }
         
         #Create specialized Agents
 
@@ -164,6 +197,8 @@ class OsintAgentSystem:
             name="ASN Specialist",
             role="Specializes in converting organization names to IP ranges",
             instructions=[ASNMAP_AGENT_PROMPT],
+            tools=self._tools_for("asn"),
+            model=self._model_for("asn"),
             **agent_kwargs,
         )
 
@@ -171,6 +206,8 @@ class OsintAgentSystem:
             name="Subdomain Enumeration Specialist",
             role="Specializes in finding subdomains of organizations",
             instructions=[BBOT_RECON_AGENT_PROMPT],
+            tools=self._tools_for("bbot"),
+            model=self._model_for("bbot"),
             **agent_kwargs,
         )
 
@@ -178,6 +215,8 @@ class OsintAgentSystem:
             name="Subdomain Status verification Agent",
             role="Checks if detected subdomains are alive and finds the technology they are running on",
             instructions=[HTTPX_FINGERPRINT_AGENT_PROMPT],
+            tools=self._tools_for("httpx"),
+            model=self._model_for("httpx"),
             **agent_kwargs,
         )
 
@@ -185,6 +224,8 @@ class OsintAgentSystem:
             name="OSINT Reporter",
             role="OSINT Documentation",
             instructions=[OSINT_REPORTING_AGENT_PROMPT],
+            tools=self._tools_for("reporter"),
+            model=self._model_for("reporter"),
             **agent_kwargs,
         )
 
@@ -208,6 +249,8 @@ class OsintAgentSystem:
             ],
             "markdown": True,
             "instructions": [OSINT_MANAGER_AGENT_PROMPT],
+            "tool_hooks": [TELEMETRY.tool_hook],  # times every delegation to a member
+            "post_hooks": [TELEMETRY.llm_hook],
             "show_members_responses": True,
             "add_history_to_context": True, # CRITICAL: ALways preserve conversation history
             "debug_mode": True,
@@ -216,23 +259,256 @@ class OsintAgentSystem:
         }
 
         #Add memory to database if enabled (for persistent storage accross sessions)
-        if self.memory_db:
-            team_kwargs["db"] = self.memory_db
-            team_kwargs["enable_user_memories"]= True
+        team_kwargs.update(self._team_db_kwargs())
         
         self.osint_team = Team(**team_kwargs)
     
+## Hot reconfiguration - swap one component in place, keeping session_id and warm connections
+
+    def _members(self):
+        return [self.asn_agent, self.bbot_agent, self.httpx_agent, self.reporting_agent]
+
+    def _roles(self) -> Dict[str, Agent]:
+        """Members by their key in the tool scoping map"""
+        return {"asn": self.asn_agent, "bbot": self.bbot_agent, "httpx": self.httpx_agent, "reporter": self.reporting_agent}
+
+    def _model_roles(self) -> Dict:
+        """The team and its members by their key in MODEL_ROLES"""
+        return {"manager": self.osint_team, **self._roles()}
+
+    def model_id_for(self, role: str) -> str:
+        return self.role_models.get(role) or self.model_name
+
+    def _model_for(self, role: str):
+        """Model for a role; roles on the same model id share one instance"""
+        model_id = self.model_id_for(role)
+        if model_id not in self._models:
+            self._models[model_id] = self._get_model(model_id)
+        return self._models[model_id]
+
+    def model_report(self) -> str:
+        """Which model each role runs on"""
+        return "\n".join(
+            f"  {role:<9} {self.model_id_for(role)}{'' if role in self.role_models else ' (default)'}"
+            for role in MODEL_ROLES
+        )
+
+    def _tools_for(self, role: str) -> List:
+        return scope_tools(self.role_tools[role], self.all_tools, self.mcp_toolkits)
+
+    @staticmethod
+    def _apply_settings(target, settings: Dict):
+        for key, value in settings.items():
+            setattr(target, key, value)
+            if key == "enable_user_memories":
+                target.update_memory_on_run = value
+        # Memory managers are built on the next run from the current model and db
+        target.memory_manager = None
+
+    def _apply_databases(self):
+        for agent in self._members():
+            self._apply_settings(agent, self._agent_db_kwargs())
+        self._apply_settings(self.osint_team, self._team_db_kwargs())
+
+    def _apply_tools(self):
+        for role, agent in self._roles().items():
+            agent.tools = self._tools_for(role)
+
+    def tool_scope_report(self) -> str:
+        """Tools each member carries and the schema tokens that saves on every request"""
+        return format_scope({agent.name: agent.tools for agent in self._members()}, self.all_tools)
+
+    def _use_tool_hooks(self, async_path: bool):
+        """agno only awaits async tool hooks on the arun() path, and only calls sync ones on run()"""
+        hook = TELEMETRY.async_tool_hook if async_path else TELEMETRY.tool_hook
+        replay_hook = LLM_CACHE.async_tool_hook if async_path else LLM_CACHE.tool_hook
+        for member in self._members():
+            member.tool_hooks = [hook, replay_hook]
+        self.osint_team.tool_hooks = [hook]
+
+    def set_model(self, model_name: str, role: Optional[str] = None):
+        """Switch one role to another model, or (no role) the default model of every role without its own
+
+        Raises:
+            ValueError: If role is not one of MODEL_ROLES.
+        """
+        if role is not None and role not in MODEL_ROLES:
+            raise ValueError(f"Unknown role '{role}' (expected one of {', '.join(MODEL_ROLES)})")
+        self._models[model_name] = self._get_model(model_name)
+        if role is None:
+            self.model_name = model_name
+        else:
+            self.role_models[role] = model_name
+        for role_name, target in self._model_roles().items():
+            model = self._model_for(role_name)
+            if target.model is not model:
+                target.model = model
+                target.memory_manager = None
+        self.model = self._model_for("manager")
+        in_use = {self.model_id_for(role_name) for role_name in MODEL_ROLES}
+        self._models = {model_id: model for model_id, model in self._models.items() if model_id in in_use}
+
+    def set_memory(self, enabled: bool):
+        """Turn conversation memory on or off"""
+        self.use_memory = enabled
+        self.memory_db = self._open_db("ocelot_agents.db") if enabled else None
+        self._apply_databases()
+
+    def set_storage(self, enabled: bool):
+        """Turn agent storage on or off"""
+        self.use_storage = enabled
+        self.storage_db = self._open_db("agent_storage.db") if enabled else None
+        self._apply_databases()
+
+    def set_mcp(self, enabled: bool):
+        """Attach or detach MCP tools; built toolkits stay warm while detached"""
+        self.use_mcp = enabled
+        base = (ASYNC_OSINT_TOOLS if self.use_async else OSINT_TOOLS) + self.base_tools
+        mcp = self._build_mcp_tools() if enabled and self.mcp_servers else []
+        self.all_tools = base + mcp
+        self._apply_tools()
+
+    def add_mcp_server(self, server: Dict):
+        """Register an MCP server; only its toolkit is built, existing ones are untouched"""
+        self.mcp_servers.append(server)
+        if self.use_mcp:
+            self.set_mcp(True)
+
     def run_assessment(self, task: str, stream: bool = True, show_full_reasoning: bool = True, stream_events:bool = True):
         """Conduct an OSINT task with persistent session context"""
+        if self.use_mcp and self.mcp_toolkits:
+            # MCP sessions live on the pool's event loop, so the run has to happen there too
+            MCP_POOL.run(self.arun_assessment(task, stream, show_full_reasoning, stream_events))
+            return
+
+        if self.use_async:
+            # Async tools can only be driven from the async run path
+            asyncio.run(self.arun_assessment(task, stream, show_full_reasoning, stream_events))
+            return
+
         # Use persistent session_id to maintain context across multiple runs
-        self.osint_team.print_response(
-            task,
-            stream=stream,
-            session_id=self.session_id,
-            show_full_reasoning=show_full_reasoning,
-            stream_events=stream_events
-        )
+        self._use_tool_hooks(async_path=False)
+        mark = TELEMETRY.mark()
+        try:
+            self.osint_team.print_response(
+                task,
+                stream=stream,
+                session_id=self.session_id,
+                show_full_reasoning=show_full_reasoning,
+                stream_events=stream_events
+            )
+        finally:
+            self._print_cache_report(mark)
+            TELEMETRY.flush_prometheus()
     
+    async def arun_assessment(self, task: str, stream: bool = True, show_full_reasoning: bool = True, stream_events: bool = True):
+        """Conduct an OSINT task on the async run path so tool calls can overlap"""
+        self._use_tool_hooks(async_path=True)
+        mark = TELEMETRY.mark()
+        try:
+            await self.osint_team.aprint_response(
+                task,
+                stream=stream,
+                session_id=self.session_id,
+                show_full_reasoning=show_full_reasoning,
+                stream_events=stream_events
+            )
+        finally:
+            self._print_cache_report(mark)
+            TELEMETRY.flush_prometheus()
+
+    @staticmethod
+    def _print_cache_report(mark: int):
+        """Cached vs. uncached input tokens of the run that started at this telemetry mark"""
+        report = TELEMETRY.prompt_cache_report(since=mark)
+        if report:
+            print(f"\n{report}")
+
+    def run_task(self, task: str) -> str:
+        """Conduct an OSINT task without printing and return the team's final answer"""
+        if self.use_mcp and self.mcp_toolkits:
+            return MCP_POOL.run(self.arun_task(task))
+
+        if self.use_async:
+            return asyncio.run(self.arun_task(task))
+
+        self._use_tool_hooks(async_path=False)
+        mark = TELEMETRY.mark()
+        try:
+            response = self.osint_team.run(task, session_id=self.session_id)
+            return response.content or ""
+        finally:
+            self._print_cache_report(mark)
+            TELEMETRY.flush_prometheus()
+
+    async def arun_task(self, task: str) -> str:
+        """Async counterpart of run_task"""
+        self._use_tool_hooks(async_path=True)
+        mark = TELEMETRY.mark()
+        try:
+            response = await self.osint_team.arun(task, session_id=self.session_id)
+            return response.content or ""
+        finally:
+            self._print_cache_report(mark)
+            TELEMETRY.flush_prometheus()
+
+    def run_pipeline(self, target: str, stream: bool = True, full_probe: bool = False):
+        """Run asnmap -> bbot -> httpx directly in code, then hand the results to the OSINT Reporter.
+
+        Skips manager-LLM delegation for the fixed kill chain; the only model calls are the report.
+        """
+        from pipeline import run_recon
+
+        return self._report_run(run_recon(target, full_probe=full_probe), stream)
+
+    def resume_pipeline(self, run_id: str, stream: bool = True):
+        """Continue an interrupted pipeline run from its first unfinished stage, then report"""
+        from pipeline import resume_recon
+
+        return self._report_run(resume_recon(run_id), stream)
+
+    def _report_run(self, run, stream: bool):
+        from pipeline import build_report_task, record_report
+
+        print(run.summary())
+        if run.saved_report is not None:
+            print(run.saved_report)
+            return run
+
+        report = []
+        post_hooks = self.reporting_agent.post_hooks
+        # Catch the streamed report text so it can be checkpointed
+        self.reporting_agent.post_hooks = list(post_hooks or []) + [
+            lambda run_output: report.append(run_output.content or "")
+        ]
+        self._use_tool_hooks(async_path=False)
+        started = time.monotonic()
+        try:
+            self.reporting_agent.print_response(
+                build_report_task(run),
+                stream=stream,
+                session_id=self.session_id,
+            )
+        finally:
+            self.reporting_agent.post_hooks = post_hooks
+            TELEMETRY.flush_prometheus()
+        record_report(run, report[-1] if report else "", time.monotonic() - started)
+        return run
+
+    def report_pipeline(self, target: str, full_probe: bool = False, run_id: Optional[str] = None, progress=print):
+        """Non-printing run_pipeline: returns the PipelineRun and the report text"""
+        from pipeline import build_report_task, record_report, run_recon
+
+        run = run_recon(target, run_id=run_id, progress=progress, full_probe=full_probe)
+        self._use_tool_hooks(async_path=False)
+        started = time.monotonic()
+        try:
+            response = self.reporting_agent.run(build_report_task(run), session_id=self.session_id)
+        finally:
+            TELEMETRY.flush_prometheus()
+        record_report(run, response.content or "", time.monotonic() - started)
+        return run, response.content or ""
+
     def get_agent(self, agent_type:  str):
         """Get a specific agent by type"""
         agents = {
@@ -0,0 +1,233 @@
+"""
+Streaming reader for bbot's output.json.
+
+bbot writes one JSON event per line. The file of a large scan runs to
+gigabytes, so it is read one line at a time into small slotted event
+objects, and lines whose type is not wanted are skipped before they are
+JSON-decoded. Memory stays constant regardless of scan size.
+"""
+
+import ipaddress
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from scope import ScopeIndex
+from store import normalize_host
+
+BBOT_SCANS_DIR = Path.home() / ".bbot" / "scans"
+
+# Event types most useful to the agents; any other type can still be requested by name
+COMMON_EVENT_TYPES = [
+    "DNS_NAME", "IP_ADDRESS", "OPEN_TCP_PORT", "URL", "TECHNOLOGY",
+    "FINDING", "VULNERABILITY", "ASN", "EMAIL_ADDRESS", "STORAGE_BUCKET",
+]
+
+# Keys tried, in order, to turn a dict payload (TECHNOLOGY, FINDING, ...) into one value
+_DATA_VALUE_KEYS = ("technology", "description", "url", "name", "asn")
+
+
+class BbotEvent:
+    """One bbot event, reduced to the fields the agents use."""
+
+    __slots__ = ("type", "value", "host", "port", "module", "scope_distance", "resolved_hosts", "tags")
+
+    def __init__(self, type: str, value: str, host: str = "", port: Optional[int] = None, module: str = "",
+                 scope_distance: int = 0, resolved_hosts: Tuple[str, ...] = (), tags: Tuple[str, ...] = ()):
+        self.type = type
+        self.value = value
+        self.host = host
+        self.port = port
+        self.module = module
+        self.scope_distance = scope_distance
+        self.resolved_hosts = resolved_hosts
+        self.tags = tags
+
+    @classmethod
+    def from_json(cls, raw: dict) -> "BbotEvent":
+        data = raw.get("data_json", raw.get("data", ""))
+        if isinstance(data, dict):
+            value = next((str(data[key]) for key in _DATA_VALUE_KEYS if data.get(key)), json.dumps(data, sort_keys=True))
+        else:
+            value = str(data)
+        port = raw.get("port")
+        return cls(
+            type=raw.get("type", ""),
+            value=value,
+            host=normalize_host(str(raw.get("host") or "")),
+            port=int(port) if port not in (None, "") else None,
+            module=raw.get("module", ""),
+            scope_distance=raw.get("scope_distance") or 0,
+            resolved_hosts=tuple(raw.get("resolved_hosts") or ()),
+            tags=tuple(raw.get("tags") or ()),
+        )
+
+    def ips(self) -> Tuple[str, ...]:
+        """Addresses this event points at: its own IP or the IPs its host resolved to."""
+        if self.type == "IP_ADDRESS":
+            return (self.value,)
+        return self.resolved_hosts
+
+    def render(self) -> str:
+        port = f":{self.port}" if self.port and self.type != "OPEN_TCP_PORT" else ""
+        host = f" host={self.host}{port}" if self.host and self.host != self.value else ""
+        return f"[{self.type}] {self.value}{host} (distance {self.scope_distance}, {self.module})"
+
+    def __repr__(self) -> str:
+        return f"BbotEvent({self.type}, {self.value!r})"
+
+
+def find_output_file(scan: str = "", target: str = "") -> Path:
+    """Locate a scan's output.json: an explicit path, a scan name, or the newest scan.
+
+    Without a scan, the newest scan whose seeds include target is used, so parallel
+    scans of different targets (e.g., a campaign) never pick up each other's output.
+
+    Raises:
+        FileNotFoundError: If no matching scan output exists (including no scan of target).
+    """
+    if scan:
+        path = Path(scan).expanduser()
+        if path.is_file():
+            return path
+        if not path.is_absolute():
+            path = BBOT_SCANS_DIR / scan
+        for name in ("output.json", "output.jsonl"):
+            if (path / name).is_file():
+                return path / name
+        raise FileNotFoundError(f"No output.json for scan '{scan}'")
+    outputs = [p for name in ("output.json", "output.jsonl") for p in BBOT_SCANS_DIR.glob(f"*/{name}")]
+    if not outputs:
+        raise FileNotFoundError(f"No bbot scans in {BBOT_SCANS_DIR}")
+    outputs.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    if not target:
+        return outputs[0]
+    target = normalize_host(target)
+    for path in outputs:
+        if target in scan_seeds(path):
+            return path
+    raise FileNotFoundError(f"No bbot scan of {target} in {BBOT_SCANS_DIR}")
+
+
+def _seed_host(seed: str) -> str:
+    """Host part of a seed, which may be a domain, URL, IP or CIDR."""
+    return normalize_host(seed.split("://", 1)[-1].split("/", 1)[0] if "://" in seed else seed)
+
+
+def scan_seeds(path: Path) -> set:
+    """Targets a scan was started with, from its first event (SCAN)."""
+    try:
+        with open(path, "rb") as handle:
+            event = json.loads(handle.readline())
+    except (OSError, ValueError):
+        return set()
+    data = event.get("data") if isinstance(event, dict) else None
+    if not isinstance(data, dict):
+        return set()
+    # bbot 2 nests the seeds under "target"; older versions list "targets" directly
+    target = data.get("target")
+    seeds = target.get("seeds") if isinstance(target, dict) else data.get("targets") or data.get("seeds")
+    if isinstance(seeds, str):
+        seeds = [seeds]
+    return {_seed_host(seed) for seed in seeds or [] if isinstance(seed, str)}
+
+
+def _in_domain(host: str, domain: str) -> bool:
+    return host == domain or host.endswith("." + domain)
+
+
+def iter_events(
+    path: Union[str, Path],
+    types: Optional[Iterable[str]] = None,
+    max_distance: Optional[int] = None,
+    domain: str = "",
+    scope: Optional[ScopeIndex] = None,
+) -> Iterator[BbotEvent]:
+    """Stream events from a bbot NDJSON file.
+
+    Args:
+        path: output.json file.
+        types: Only these event types (e.g., ["DNS_NAME", "IP_ADDRESS"]). Default: all.
+        max_distance (int): Only events with scope_distance <= this (0 = in scope only).
+        domain (str): Only events whose host is this domain or one of its subdomains.
+        scope (ScopeIndex): Only events whose IP (or resolved IPs) fall inside these CIDRs.
+    """
+    wanted = {t.upper() for t in types} if types else None
+    # Cheap substring test so unwanted lines are never JSON-decoded
+    needles = [f'"{t}"'.encode() for t in wanted] if wanted else None
+    domain = normalize_host(domain) if domain else ""
+
+    with open(Path(path).expanduser(), "rb") as handle:
+        for line in handle:
+            if needles and not any(needle in line for needle in needles):
+                continue
+            try:
+                raw = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(raw, dict) or (wanted and raw.get("type") not in wanted):
+                continue
+            event = BbotEvent.from_json(raw)
+            if max_distance is not None and event.scope_distance > max_distance:
+                continue
+            if domain and not _in_domain(event.host, domain):
+                continue
+            if scope is not None and not any(scope.contains_many(event.ips())):
+                continue
+            yield event
+
+
+class EventSummary:
+    """Counts and a bounded page of events from one pass over a scan."""
+
+    __slots__ = ("total", "counts", "page")
+
+    def __init__(self):
+        self.total = 0
+        self.counts: Counter = Counter()
+        self.page: List[BbotEvent] = []
+
+
+def summarize_events(events: Iterable[BbotEvent], limit: int = 50, offset: int = 0,
+                     sinks: Iterable = ()) -> EventSummary:
+    """Count events by type and keep only the requested page in memory.
+
+    Every event is also written to each sink (e.g., an AssetSink filing DNS names in the asset store).
+    """
+    sinks = list(sinks)
+    summary = EventSummary()
+    for event in events:
+        if offset <= summary.total < offset + limit:
+            summary.page.append(event)
+        summary.total += 1
+        summary.counts[event.type] += 1
+        for sink in sinks:
+            sink.write(event)
+    for sink in sinks:
+        sink.close()
+    return summary
+
+
+def event_host(event: BbotEvent) -> Optional[str]:
+    """AssetSink parser: the hostname of a DNS_NAME event."""
+    return event.value if event.type == "DNS_NAME" else None
+
+
+def event_resolutions(event: BbotEvent) -> Optional[List[Tuple[str, str]]]:
+    """AssetSink parser: (host, ip) pairs of a DNS_NAME event."""
+    pairs = [(event.value, ip) for ip in event.resolved_hosts if _is_ip(ip)] if event.type == "DNS_NAME" else []
+    return pairs or None
+
+
+def _is_ip(value: str) -> bool:
+    # resolved_hosts also carries CNAME targets
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+def event_counts(path: Union[str, Path], **filters) -> Dict[str, int]:
+    """Number of events of each type, with the same filters as iter_events."""
+    return dict(Counter(event.type for event in iter_events(path, **filters)))
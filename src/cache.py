@@ -0,0 +1,129 @@
+"""
+Persistent TTL + LRU result cache backed by SQLite.
+
+Used for lookups whose answers rarely change (asnmap ASN/CIDR ownership) so
+repeat queries across sessions return in milliseconds instead of shelling out.
+"""
+
+import shlex
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from settings import OCELOT_DIR, env_int
+
+
+def normalize_key(target: str, args: str = "") -> str:
+    """Build a cache key from a lookup target and its flags.
+
+    Targets are case-insensitive (AS13335 == as13335, Example.com == example.com)
+    and flag order does not matter. Each flag keeps the values that follow it, so
+    "-a 1 -b 2" and "-a 2 -b 1" stay different keys.
+    """
+    try:
+        words = shlex.split(args)
+    except ValueError:
+        words = args.split()
+    groups = []
+    for word in words:
+        if word.startswith("-") or not groups:
+            groups.append([word])
+        else:
+            groups[-1].append(word)
+    return f"{target.strip().lower()}|{' '.join(' '.join(group) for group in sorted(groups))}"
+
+
+class ResultCache:
+    """SQLite-backed cache with a time-to-live and a least-recently-used size limit."""
+
+    def __init__(self, path: Path, ttl: int = 86400, max_entries: int = 5000):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache(last_access)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _bump(self, name: str):
+        self._conn.execute(
+            "INSERT INTO counters(name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached value, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self.misses += 1
+                self._bump("misses")
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            self._bump("hits")
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str):
+        """Store a value and evict the least recently used entries over the size limit."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache(key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM cache WHERE key NOT IN "
+                "(SELECT key FROM cache ORDER BY last_access DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this session plus persistent totals."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            totals = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "total_hits": totals.get("hits", 0),
+            "total_misses": totals.get("misses", 0),
+        }
+
+
+# Shared asnmap cache - TTL and size are configurable from the environment
+ASNMAP_CACHE = ResultCache(
+    OCELOT_DIR / "asnmap_cache.db",
+    ttl=env_int("OCELOT_ASNMAP_CACHE_TTL", 86400),
+    max_entries=env_int("OCELOT_ASNMAP_CACHE_SIZE", 5000),
+)
@@ -0,0 +1,248 @@
+"""
+Batch campaigns.
+
+Runs one assessment (or pipeline run) per target from a targets file, in
+parallel worker processes with a concurrency cap. Every target gets a fresh
+process, its own agent session and its own directory under
+~/.ocelot/runs/<campaign_id>/<target>/ holding the report, the worker log
+and all spilled tool output. The parent only schedules work and prints
+progress, so one target failing or hanging its agent never affects another.
+"""
+
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import re
+import signal
+import sys
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from settings import env_int
+
+# Default number of targets assessed at once
+CAMPAIGN_CONCURRENCY = env_int("OCELOT_CAMPAIGN_CONCURRENCY", 4)
+
+DEFAULT_TASK = (
+    "Conduct a full OSINT attack surface assessment of {target}: map its ASNs and IP ranges, "
+    "enumerate subdomains, probe which hosts are live and what they run, and write the final report."
+)
+
+
+@dataclass
+class CampaignOptions:
+    """How every target of a campaign is assessed."""
+    campaign_id: str
+    model_name: str = "gpt-5.2"
+    role_models: Dict[str, str] = field(default_factory=dict)  # Roles on another model than model_name
+    pipeline: bool = False  # Fixed asnmap -> bbot -> httpx pipeline instead of the full team
+    full_probe: bool = False
+    use_async: bool = False
+    task: str = DEFAULT_TASK
+
+
+@dataclass
+class TargetResult:
+    """Outcome of one target of a campaign."""
+    target: str
+    ok: bool
+    seconds: float
+    output_dir: str
+    session_id: str = ""
+    assets: Dict[str, int] = field(default_factory=dict)
+    error: str = ""
+
+
+def load_targets(path: str) -> List[str]:
+    """Unique targets from a file, one per line; blank lines and # comments are skipped."""
+    seen: Dict[str, str] = {}
+    for line in Path(path).expanduser().read_text(encoding="utf-8").splitlines():
+        target = line.split("#", 1)[0].strip()
+        if target:
+            seen.setdefault(target.lower(), target)
+    return list(seen.values())
+
+
+def make_campaign_id(targets_file: str) -> str:
+    """Filesystem-safe campaign id, e.g. campaign-targets-20250101-120000."""
+    stem = re.sub(r"[^A-Za-z0-9._-]", "_", Path(targets_file).stem)
+    return f"campaign-{stem}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+
+def target_run_id(campaign_id: str, target: str) -> str:
+    """Run id (artifact directory under ~/.ocelot/runs) of one target of a campaign."""
+    return f"{campaign_id}/{re.sub(r'[^A-Za-z0-9._-]', '_', target)}"
+
+
+# ----- Worker process -----
+
+def _redirect_output(log_file: Path):
+    """Send this process's stdout/stderr, and that of the tools it starts, to the target's log."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    os.close(fd)
+
+
+def assess_target(target: str, options: CampaignOptions) -> TargetResult:
+    """Assess one target in the current (worker) process."""
+    from capture import run_dir, set_run_id
+
+    set_run_id(target_run_id(options.campaign_id, target))
+    output_dir = run_dir()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    _redirect_output(output_dir / "worker.log")
+
+    started = time.monotonic()
+    result = TargetResult(target, ok=False, seconds=0.0, output_dir=str(output_dir))
+    try:
+        from agent import OsintAgentSystem
+        from store import ASSET_STORE
+
+        system = OsintAgentSystem(
+            model_name=options.model_name, use_async=options.use_async, role_models=options.role_models
+        )
+        result.session_id = system.session_id
+        if options.pipeline:
+            run, report = system.report_pipeline(
+                target, full_probe=options.full_probe, run_id=target_run_id(options.campaign_id, target)
+            )
+            (output_dir / "pipeline.txt").write_text(run.summary() + "\n", encoding="utf-8")
+        else:
+            report = system.run_task(options.task.replace("{target}", target))
+        (output_dir / "report.md").write_text(report, encoding="utf-8")
+        result.assets = ASSET_STORE.counts(target)
+        result.ok = bool(report.strip())
+        if not result.ok:
+            result.error = "empty report"
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.seconds = time.monotonic() - started
+    print(f"\n[campaign] {target}: {'ok' if result.ok else 'failed'} in {result.seconds:.1f}s {result.error}")
+    return result
+
+
+def _interrupt_once(signum, frame):
+    # Ctrl-C reaches the workers directly and again through the scheduler; the second must not cut cleanup short
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    raise KeyboardInterrupt
+
+
+def _worker_main(target: str, options: CampaignOptions):
+    signal.signal(signal.SIGINT, _interrupt_once)
+    result = assess_target(target, options)
+    Path(result.output_dir, "result.json").write_text(json.dumps(asdict(result)), encoding="utf-8")
+
+
+# ----- Scheduler -----
+
+def _read_result(target: str, options: CampaignOptions, exitcode: Optional[int]) -> TargetResult:
+    """Result a worker left behind, or a failure if it died before writing one."""
+    from capture import RUNS_DIR
+
+    output_dir = RUNS_DIR / target_run_id(options.campaign_id, target)
+    try:
+        return TargetResult(**json.loads((output_dir / "result.json").read_text(encoding="utf-8")))
+    except (OSError, ValueError, TypeError):
+        return TargetResult(target, ok=False, seconds=0.0, output_dir=str(output_dir),
+                            error=f"worker exited with code {exitcode} - see worker.log")
+
+
+def _progress_line(result: TargetResult, finished: int, total: int, running: int, started: float) -> str:
+    elapsed = time.monotonic() - started
+    rate = finished / elapsed * 3600 if elapsed else 0.0
+    eta = (total - finished) * elapsed / finished
+    detail = ", ".join(f"{n} {k}" for k, n in result.assets.items() if n) or result.error
+    return (
+        f"[{finished}/{total}] {'✓' if result.ok else '✗'} {result.target} in {_duration(result.seconds)}"
+        f"{f' ({detail})' if detail else ''} | {running} running, {rate:.1f} targets/h, ETA {_duration(eta)}"
+    )
+
+
+def _duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def run_campaign(
+    targets: List[str],
+    options: CampaignOptions,
+    concurrency: int = CAMPAIGN_CONCURRENCY,
+    progress: Callable[[str], None] = print,
+) -> List[TargetResult]:
+    """Assess every target in worker processes, at most `concurrency` at a time.
+
+    Results are appended to ~/.ocelot/runs/<campaign_id>/results.jsonl as targets finish.
+
+    Args:
+        targets: Domains or organizations to assess.
+        options: How each target is assessed.
+        concurrency (int): Maximum targets in flight at once.
+        progress: Called with one line per finished target and a final summary.
+
+    Returns:
+        List[TargetResult]: One result per finished target, in completion order.
+    """
+    from capture import RUNS_DIR
+
+    campaign_dir = RUNS_DIR / options.campaign_id
+    campaign_dir.mkdir(parents=True, exist_ok=True)
+    results_file = campaign_dir / "results.jsonl"
+    concurrency = max(1, min(concurrency, len(targets) or 1))
+
+    progress(f"Campaign {options.campaign_id}: {len(targets)} targets, {concurrency} at a time")
+    progress(f"Output: {campaign_dir}")
+
+    results: List[TargetResult] = []
+    queue = deque(targets)
+    running: Dict[str, object] = {}  # target -> worker process
+    context = multiprocessing.get_context("spawn")
+    started = time.monotonic()
+    try:
+        while queue or running:
+            # One fresh process per target: no agent, session or tool state carries over between targets
+            while queue and len(running) < concurrency:
+                target = queue.popleft()
+                process = context.Process(target=_worker_main, args=(target, options), name=f"campaign-{target}")
+                process.start()
+                running[target] = process
+
+            finished = multiprocessing.connection.wait([p.sentinel for p in running.values()])
+            for target in [t for t, p in running.items() if p.sentinel in finished]:
+                process = running.pop(target)
+                process.join()
+                result = _read_result(target, options, process.exitcode)
+                results.append(result)
+                with open(results_file, "a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(asdict(result)) + "\n")
+                progress(_progress_line(result, len(results), len(targets), len(running), started))
+    except KeyboardInterrupt:
+        progress(f"Interrupted - stopping {len(running)} running targets, {len(queue)} not started")
+        # SIGINT, not SIGTERM: the workers unwind through their cleanup and stop their tools' process groups
+        for process in running.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGINT)
+        deadline = time.monotonic() + 10
+        for process in running.values():
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1)
+        raise
+
+    elapsed = time.monotonic() - started
+    failed = [r.target for r in results if not r.ok]
+    progress(
+        f"Campaign finished: {len(results) - len(failed)} ok, {len(failed)} failed in {_duration(elapsed)} "
+        f"({len(results) / elapsed * 3600 if elapsed else 0:.1f} targets/h)"
+    )
+    if failed:
+        progress(f"Failed: {', '.join(failed[:20])}{' ...' if len(failed) > 20 else ''} - see {results_file}")
+    return results
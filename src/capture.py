@@ -0,0 +1,305 @@
+"""
+Streaming capture of tool output.
+
+Instead of buffering a whole scan in memory, stdout is read one line at a
+time and handed to a list of sinks (file spill, counters, parsers). Only a
+bounded tail is kept around for the LLM, so memory stays flat no matter how
+much a tool prints.
+
+Every command runs in its own process group (session), so a timeout stops
+the shell *and* everything it started: SIGTERM first, SIGKILL for whatever
+is still alive after KILL_GRACE_SECONDS. Output read before the stop is kept
+and the result is flagged partial.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Union
+from settings import KILL_GRACE_SECONDS, OCELOT_DIR
+from telemetry import note_process
+
+# Full tool output spilled to disk lives in one artifact directory per run
+RUNS_DIR = OCELOT_DIR / "runs"
+_run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+# Default number of trailing lines kept in memory for the model
+DEFAULT_TAIL_LINES = 200
+
+
+# ----- Sinks -----
+
+class TailBuffer:
+    """Keeps only the last max_lines lines."""
+
+    def __init__(self, max_lines: int = DEFAULT_TAIL_LINES):
+        self.lines = deque(maxlen=max_lines)
+
+    def write(self, line: str):
+        self.lines.append(line)
+
+    def close(self):
+        pass
+
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+class LineCounter:
+    """Counts lines and bytes without keeping them."""
+
+    def __init__(self):
+        self.lines = 0
+        self.bytes = 0
+
+    def write(self, line: str):
+        self.lines += 1
+        self.bytes += len(line) + 1
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """Spills every line to a file on disk."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = open(self.path, "w", encoding="utf-8")
+
+    def write(self, line: str):
+        self._handle.write(line + "\n")
+
+    def close(self):
+        if not self._handle.closed:
+            self._handle.close()
+
+
+class CallbackSink:
+    """Passes every line to a function (e.g., a parser)."""
+
+    def __init__(self, callback: Callable[[str], None]):
+        self.callback = callback
+
+    def write(self, line: str):
+        self.callback(line)
+
+    def close(self):
+        pass
+
+
+def set_run_id(run_id: str):
+    """Switch the artifact directory used for spilled output (e.g., per pipeline run)."""
+    global _run_id
+    _run_id = run_id
+
+
+def get_run_id() -> str:
+    return _run_id
+
+
+def run_dir() -> Path:
+    """Artifact directory for the current run."""
+    return RUNS_DIR / _run_id
+
+
+def spill_path(tool_name: str) -> Path:
+    """Build a timestamped spill file path for a tool run."""
+    stamp = datetime.now().strftime("%H%M%S-%f")
+    return run_dir() / f"{tool_name}-{stamp}.txt"
+
+
+# ----- Process groups -----
+
+def signal_group(pgid: int, sig: int) -> bool:
+    """Send a signal to a whole process group. False if the group no longer exists."""
+    try:
+        os.killpg(pgid, sig)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # A member we cannot signal still counts as alive
+
+
+def group_alive(pgid: int) -> bool:
+    return signal_group(pgid, 0)
+
+
+def stop_process_group(process: subprocess.Popen, grace: float = KILL_GRACE_SECONDS):
+    """Stop a command started with start_new_session=True, children included.
+
+    The group gets SIGTERM so tools can flush what they have, then SIGKILL once
+    `grace` seconds pass with any member still alive. The shell exiting is not
+    enough: its children may have ignored the SIGTERM.
+    """
+    pgid = process.pid
+    signal_group(pgid, signal.SIGTERM)
+    deadline = time.monotonic() + grace
+    while time.monotonic() < deadline:
+        process.poll()  # Reap the leader, a zombie still counts as a group member
+        if not group_alive(pgid):
+            return
+        time.sleep(0.05)
+    signal_group(pgid, signal.SIGKILL)
+    process.wait()
+
+
+def run_in_group(
+    args: Union[str, Sequence[str]],
+    input_text: Optional[str] = None,
+    timeout: Optional[float] = None,
+    shell: bool = False,
+) -> subprocess.CompletedProcess:
+    """subprocess.run(capture_output=True, text=True) in a process group of its own.
+
+    Raises:
+        subprocess.TimeoutExpired: After the whole group was stopped. Its output and
+            stderr attributes hold what the command printed before the timeout.
+    """
+    with subprocess.Popen(
+        args,
+        shell=shell,
+        stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        start_new_session=True,
+    ) as process:
+        try:
+            stdout, stderr = process.communicate(input_text, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            stop_process_group(process)
+            stdout, stderr = process.communicate()
+            note_process(process.returncode, len(stdout or ""), len(stderr or ""), (stdout or "").count("\n"))
+            raise subprocess.TimeoutExpired(args, timeout, output=stdout, stderr=stderr)
+        except BaseException:
+            stop_process_group(process)
+            raise
+    note_process(process.returncode, len(stdout), len(stderr), stdout.count("\n"))
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+# ----- Streaming runner -----
+
+@dataclass
+class StreamResult:
+    """Outcome of a streamed command. stdout itself only lives in the sinks."""
+    returncode: int
+    tail: str
+    stderr: str
+    lines: int
+    bytes: int
+    timed_out: bool = False
+    spill_file: Optional[Path] = None
+    partial: bool = False  # Stopped before it finished; the sinks hold what it printed until then
+
+
+def stream_command(
+    command: str,
+    sinks: Optional[List] = None,
+    input_text: Optional[str] = None,
+    timeout: Optional[float] = None,
+    tail_lines: int = DEFAULT_TAIL_LINES,
+    spill_to: Optional[Path] = None,
+) -> StreamResult:
+    """Run a shell command and stream its stdout line by line into sinks.
+
+    Args:
+        command (str): Shell command to execute.
+        sinks (List): Extra sinks receiving every stdout line.
+        input_text (str): Optional text written to the process stdin.
+        timeout (float): Seconds before the process group is stopped. None waits forever.
+        tail_lines (int): Number of trailing lines kept in memory.
+        spill_to (Path): If set, the full stdout is also written to this file.
+
+    Returns:
+        StreamResult: Exit code, bounded tail, counters and the spill file path.
+    """
+    tail = TailBuffer(tail_lines)
+    counter = LineCounter()
+    all_sinks = [tail, counter] + list(sinks or [])
+    file_sink = FileSink(spill_to) if spill_to else None
+    if file_sink:
+        all_sinks.append(file_sink)
+
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        start_new_session=True,
+    )
+
+    # stderr is drained on a side thread so a chatty tool cannot fill the pipe and stall
+    stderr_tail = TailBuffer(tail_lines)
+    stderr_counter = LineCounter()
+
+    def _drain_stderr():
+        for line in process.stderr:
+            line = line.rstrip("\n")
+            stderr_tail.write(line)
+            stderr_counter.write(line)
+
+    stderr_thread = threading.Thread(
+        target=_drain_stderr,
+        daemon=True,
+    )
+    stderr_thread.start()
+
+    timed_out = threading.Event()
+
+    def _on_timeout():
+        timed_out.set()
+        stop_process_group(process)
+
+    timer = threading.Timer(timeout, _on_timeout) if timeout else None
+    if timer:
+        timer.start()
+
+    try:
+        if input_text is not None:
+            try:
+                process.stdin.write(input_text)
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+
+        for line in process.stdout:
+            line = line.rstrip("\n")
+            for sink in all_sinks:
+                sink.write(line)
+
+        process.wait()
+    finally:
+        if timer:
+            timer.cancel()
+        if process.poll() is None:
+            # Interrupted while reading (e.g., Ctrl-C): do not leave the tool running
+            stop_process_group(process)
+        for sink in all_sinks:
+            sink.close()
+        stderr_thread.join(timeout=1)
+
+    note_process(process.returncode, counter.bytes, stderr_counter.bytes, counter.lines)
+    return StreamResult(
+        returncode=process.returncode,
+        tail=tail.text(),
+        stderr=stderr_tail.text(),
+        lines=counter.lines,
+        bytes=counter.bytes,
+        timed_out=timed_out.is_set(),
+        spill_file=file_sink.path if file_sink else None,
+        partial=timed_out.is_set(),
+    )
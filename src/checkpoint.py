@@ -0,0 +1,117 @@
+"""
+Durable stage checkpoints for pipeline runs.
+
+Every pipeline run keeps checkpoint.json in its artifact directory
+(~/.ocelot/runs/<run_id>/). Each stage records its inputs, status, output and
+artifacts as it starts and finishes, and long stages record progress through
+their input (e.g., which httpx chunks are done). The file is rewritten
+atomically after every update, so a crash or kill leaves the last good state
+behind and `oselot --resume <run_id>` can pick up where the run stopped.
+"""
+
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from capture import RUNS_DIR
+from settings import env_int
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+# Hosts per httpx chunk; a resumed probing stage restarts at the first unfinished chunk
+CHECKPOINT_CHUNK_LINES = env_int("OCELOT_CHECKPOINT_CHUNK_LINES", 10000)
+
+# Stage states
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+@dataclass
+class StageCheckpoint:
+    """Saved state of one stage."""
+    name: str
+    status: str = PENDING
+    inputs: Dict = field(default_factory=dict)
+    output: str = ""
+    seconds: float = 0.0
+    attempts: int = 0
+    artifacts: List[str] = field(default_factory=list)
+    progress: Dict = field(default_factory=dict)  # Stage-specific resume position
+
+
+@dataclass
+class Checkpoint:
+    """Saved state of a whole pipeline run."""
+    run_id: str
+    target: str
+    full_probe: bool = False
+    created: float = field(default_factory=time.time)
+    updated: float = 0.0
+    stages: Dict[str, StageCheckpoint] = field(default_factory=dict)
+
+    @property
+    def path(self) -> Path:
+        return RUNS_DIR / self.run_id / CHECKPOINT_FILE
+
+    def stage(self, name: str) -> StageCheckpoint:
+        return self.stages.setdefault(name, StageCheckpoint(name))
+
+    def is_done(self, name: str) -> bool:
+        return name in self.stages and self.stages[name].status == DONE
+
+    def start(self, name: str, **inputs) -> StageCheckpoint:
+        """Mark a stage running with its inputs. Progress from an earlier attempt is kept."""
+        stage = self.stage(name)
+        stage.status = RUNNING
+        stage.inputs = inputs
+        stage.attempts += 1
+        self.save()
+        return stage
+
+    def finish(self, name: str, output: str, ok: bool, seconds: float, artifacts: Optional[List[str]] = None):
+        stage = self.stage(name)
+        stage.status = DONE if ok else FAILED
+        stage.output = output
+        stage.seconds = seconds
+        stage.artifacts = artifacts or stage.artifacts
+        self.save()
+
+    def save(self):
+        """Write-then-rename so a crash never leaves a half-written checkpoint."""
+        self.updated = time.time()
+        path = self.path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(asdict(self), indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def summary(self) -> str:
+        stages = ", ".join(f"{s.name} {s.status}" for s in self.stages.values()) or "no stages started"
+        return f"{self.run_id} ({self.target}): {stages}"
+
+    @classmethod
+    def load(cls, run_id: str) -> "Checkpoint":
+        """Load a run's checkpoint.
+
+        Raises:
+            FileNotFoundError: If the run has no checkpoint.
+        """
+        path = RUNS_DIR / run_id / CHECKPOINT_FILE
+        if not path.is_file():
+            raise FileNotFoundError(f"No checkpoint for run '{run_id}' in {RUNS_DIR}")
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        raw["stages"] = {name: StageCheckpoint(**stage) for name, stage in raw.get("stages", {}).items()}
+        return cls(**raw)
+
+
+def list_checkpoints(limit: int = 10) -> List[Checkpoint]:
+    """Most recently updated checkpointed runs, newest first."""
+    paths = sorted(RUNS_DIR.glob(f"**/{CHECKPOINT_FILE}"), key=lambda p: p.stat().st_mtime, reverse=True)
+    checkpoints = []
+    for path in paths[:limit]:
+        try:
+            checkpoints.append(Checkpoint.load(str(path.parent.relative_to(RUNS_DIR))))
+        except (OSError, ValueError, TypeError):
+            continue
+    return checkpoints
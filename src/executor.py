@@ -0,0 +1,206 @@
+"""
+Asyncio execution engine for the recon tools.
+
+Every command runs through asyncio.create_subprocess_exec behind a shared
+semaphore, so several scans can overlap without starting an unbounded number
+of asnmap/bbot/httpx processes at once. Like capture.stream_command, each
+command gets its own process group, which is stopped as a whole on timeout.
+"""
+
+import asyncio
+import signal
+import time
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+from capture import DEFAULT_TAIL_LINES, FileSink, LineCounter, StreamResult, TailBuffer, group_alive, signal_group
+from settings import KILL_GRACE_SECONDS, MAX_CONCURRENT_TOOLS
+from telemetry import note_process
+
+
+@dataclass
+class CommandResult:
+    """Outcome of a single command run by the engine."""
+    returncode: int
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+    partial: bool = False  # Stopped before it finished; stdout/stderr hold what it printed until then
+
+
+# One semaphore per event loop - asyncio primitives cannot be shared across loops.
+# Weak keys drop a loop's entry once it is closed and collected (e.g., after every asyncio.run()).
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, MAX_CONCURRENT_TOOLS))
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def stop_process_group(process: asyncio.subprocess.Process, grace: float = KILL_GRACE_SECONDS):
+    """Async counterpart of capture.stop_process_group: SIGTERM the group, SIGKILL after grace."""
+    pgid = process.pid
+    signal_group(pgid, signal.SIGTERM)
+    deadline = time.monotonic() + grace
+    while time.monotonic() < deadline:
+        if process.returncode is not None and not group_alive(pgid):
+            return
+        await asyncio.sleep(0.05)
+    signal_group(pgid, signal.SIGKILL)
+    await process.wait()
+
+
+async def run_command(
+    argv: Sequence[str],
+    input_text: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> CommandResult:
+    """Run a command without a shell and collect its output.
+
+    Args:
+        argv (Sequence[str]): Program and arguments (e.g., ["asnmap", "-silent"]).
+        input_text (str): Optional text written to the process stdin.
+        timeout (float): Seconds before the process group is stopped. None waits forever.
+
+    Returns:
+        CommandResult: Exit code, decoded stdout/stderr (partial on timeout) and whether it timed out.
+    """
+    async with _get_semaphore():
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE if input_text is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        data = input_text.encode() if input_text is not None else None
+        # communicate() is shielded so the output read so far survives a timeout
+        communicate = asyncio.ensure_future(process.communicate(data))
+        try:
+            stdout, stderr = await asyncio.wait_for(asyncio.shield(communicate), timeout)
+        except asyncio.TimeoutError:
+            await stop_process_group(process)
+            stdout, stderr = await communicate
+            note_process(process.returncode, len(stdout), len(stderr), stdout.count(b"\n"))
+            return CommandResult(
+                returncode=process.returncode if process.returncode is not None else -1,
+                stdout=stdout.decode(errors="replace"),
+                stderr=stderr.decode(errors="replace"),
+                timed_out=True,
+                partial=True,
+            )
+        except BaseException:
+            communicate.cancel()
+            if process.returncode is None:
+                await stop_process_group(process)
+            raise
+
+    note_process(process.returncode, len(stdout), len(stderr), stdout.count(b"\n"))
+    return CommandResult(
+        returncode=process.returncode,
+        stdout=stdout.decode(errors="replace"),
+        stderr=stderr.decode(errors="replace"),
+    )
+
+
+async def run_streaming(
+    argv: Sequence[str],
+    sinks: Optional[List] = None,
+    input_text: Optional[str] = None,
+    timeout: Optional[float] = None,
+    tail_lines: int = DEFAULT_TAIL_LINES,
+    spill_to: Optional[Path] = None,
+    on_start: Optional[Callable[[], None]] = None,
+) -> StreamResult:
+    """Run a command and stream its stdout line by line into sinks.
+
+    The async counterpart of capture.stream_command: only a bounded tail of
+    stdout is kept in memory, the rest goes to the sinks and optional spill file.
+    on_start is called once the process is running, i.e. after the wait for an engine slot.
+    """
+    tail = TailBuffer(tail_lines)
+    counter = LineCounter()
+    all_sinks = [tail, counter] + list(sinks or [])
+    file_sink = FileSink(spill_to) if spill_to else None
+    if file_sink:
+        all_sinks.append(file_sink)
+    stderr_tail = TailBuffer(tail_lines)
+    stderr_counter = LineCounter()
+    timed_out = False
+
+    async with _get_semaphore():
+        process = await asyncio.create_subprocess_exec(
+            *argv,
+            stdin=asyncio.subprocess.PIPE if input_text is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=1024 * 1024,  # allow long JSON lines
+            start_new_session=True,
+        )
+        if on_start:
+            on_start()
+
+        async def _pump(stream, targets):
+            async for raw in stream:
+                line = raw.decode(errors="replace").rstrip("\n")
+                for sink in targets:
+                    sink.write(line)
+
+        async def _drive():
+            if input_text is not None:
+                try:
+                    process.stdin.write(input_text.encode())
+                    await process.stdin.drain()
+                    process.stdin.close()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+            await asyncio.gather(_pump(process.stdout, all_sinks), _pump(process.stderr, [stderr_tail, stderr_counter]))
+            await process.wait()
+
+        try:
+            await asyncio.wait_for(_drive(), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            await stop_process_group(process)
+            # Lines still buffered in the pipes were printed before the stop; keep them
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(_pump(process.stdout, all_sinks), _pump(process.stderr, [stderr_tail, stderr_counter])),
+                    KILL_GRACE_SECONDS or 1,
+                )
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            if process.returncode is None:
+                # Cancelled or failed while reading: do not leave the tool running
+                await stop_process_group(process)
+            for sink in all_sinks:
+                sink.close()
+
+    note_process(process.returncode, counter.bytes, stderr_counter.bytes, counter.lines)
+    return StreamResult(
+        returncode=process.returncode,
+        tail=tail.text(),
+        stderr=stderr_tail.text(),
+        lines=counter.lines,
+        bytes=counter.bytes,
+        timed_out=timed_out,
+        spill_file=file_sink.path if file_sink else None,
+        partial=timed_out,
+    )
+
+
+async def run_shell(command: str, timeout: Optional[float] = None) -> CommandResult:
+    """Run a shell pipeline (e.g., "cat subs.txt | sort -u") through the engine."""
+    return await run_command(["/bin/sh", "-c", command], timeout=timeout)
+
+
+async def run_all(commands: List[Sequence[str]], timeout: Optional[float] = None) -> List[CommandResult]:
+    """Run independent commands concurrently, bounded by the engine semaphore."""
+    return await asyncio.gather(*(run_command(argv, timeout=timeout) for argv in commands))
@@ -0,0 +1,355 @@
+"""
+Record/replay cache for model responses.
+
+Wraps the model every agent uses so each provider call is keyed by a hash of
+(model id, messages, tools) and its response stored in SQLite
+(~/.ocelot/llm_cache.db, or the path in OCELOT_LLM_CACHE_DB). The mode comes
+from OCELOT_LLM_CACHE (or `oselot --llm-cache MODE`):
+
+    passthrough  Default. Every call goes to the provider; nothing is stored.
+    record       Every call goes to the provider and its response is stored.
+    replay       Stored responses are served without a provider call. Misses
+                 go to the provider and are recorded, or raise LLMCacheMiss
+                 when OCELOT_LLM_CACHE_STRICT=1 (offline regression runs).
+
+Recon tool results are recorded and replayed the same way, keyed by tool name
+and arguments, so a replayed assessment neither waits on bbot/httpx nor sees
+tool output that would change the next request's key. The database is trimmed
+to OCELOT_LLM_CACHE_MAX_MB, least recently used entries first.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from agno.models.response import ModelResponse
+from capture import RUNS_DIR
+from settings import OCELOT_DIR, env_int
+from telemetry import call_tool_async
+
+PASSTHROUGH, RECORD, REPLAY = "passthrough", "record", "replay"
+MODES = (PASSTHROUGH, RECORD, REPLAY)
+
+# Artifact paths embed the run id and a timestamp, so they differ on every run
+_ARTIFACT_PATH = re.compile(re.escape(str(RUNS_DIR)) + r"/[^\s'\"\]\)]*")
+
+# Usage fields cleared on replay: a served response cost nothing
+_USAGE_FIELDS = ("input_tokens", "output_tokens", "total_tokens", "reasoning_tokens",
+                 "cache_read_tokens", "cache_write_tokens", "time_to_first_token")
+
+
+class LLMCacheMiss(RuntimeError):
+    """A strict replay needed a response or tool result that was never recorded."""
+
+
+def _normalize(text: str) -> str:
+    return _ARTIFACT_PATH.sub("<artifact>", text)
+
+
+def _message_fields(message) -> Dict:
+    """The parts of a message the provider sees."""
+    return {
+        "role": message.role,
+        "content": message.content,
+        "name": getattr(message, "name", None),
+        "tool_call_id": getattr(message, "tool_call_id", None),
+        "tool_calls": getattr(message, "tool_calls", None),
+    }
+
+
+def _schema(response_format) -> Optional[object]:
+    if response_format is None or isinstance(response_format, dict):
+        return response_format
+    schema = getattr(response_format, "model_json_schema", None)
+    return schema() if callable(schema) else repr(response_format)
+
+
+def request_key(model_id: str, messages: Iterable, tools: Optional[List] = None,
+                response_format=None, tool_choice=None, stream: bool = False) -> str:
+    """Hash of everything that decides a provider's answer."""
+    payload = json.dumps(
+        {
+            "model": model_id,
+            "messages": [_message_fields(m) for m in messages],
+            "tools": tools or [],
+            "response_format": _schema(response_format),
+            "tool_choice": tool_choice,
+            "stream": stream,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return "llm:" + hashlib.sha256(_normalize(payload).encode()).hexdigest()
+
+
+def tool_key(function_name: str, arguments: Dict) -> str:
+    payload = json.dumps({"tool": function_name, "arguments": arguments}, sort_keys=True, default=str)
+    return "tool:" + hashlib.sha256(_normalize(payload).encode()).hexdigest()
+
+
+def _replayed(data: Dict) -> ModelResponse:
+    data = dict(data)
+    data["response_usage"] = None
+    for name in _USAGE_FIELDS:
+        data[name] = None
+    return ModelResponse.from_dict(data)
+
+
+class ResponseCache:
+    """SQLite store of recorded responses with a least-recently-used byte limit."""
+
+    def __init__(self, path: Path, mode: str = PASSTHROUGH, max_bytes: int = 512 << 20, strict: bool = False):
+        self.path = Path(path)
+        self.mode = mode if mode in MODES else PASSTHROUGH
+        self.max_bytes = max_bytes
+        self.strict = strict
+        self.hits = 0
+        self.misses = 0
+        self.tool_names: set = set()  # Tools whose results are recorded; set by the agent system
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != PASSTHROUGH
+
+    def set_mode(self, mode: str):
+        """Switch mode at runtime (e.g., from the CLI).
+
+        Raises:
+            ValueError: If mode is not one of MODES.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}' (expected one of {', '.join(MODES)})")
+        self.mode = mode
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use so passthrough sessions never create the file
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Stored value for key in replay mode, or None. A strict replay raises on a miss."""
+        if self.mode != REPLAY:
+            return None
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+                db.commit()
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+        if self.strict:
+            raise LLMCacheMiss(f"No recorded response for {key} in {self.path} (strict replay)")
+        return None
+
+    def put(self, key: str, value: str):
+        """Store a value and evict the least recently used entries over the size limit."""
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses(key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk from the oldest access until enough bytes are freed
+                excess, doomed = total - self.max_bytes, []
+                for old_key, size in db.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                    if excess <= 0:
+                        break
+                    doomed.append((old_key,))
+                    excess -= size
+                db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            db.commit()
+
+    def clear(self):
+        """Drop every recorded entry."""
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM responses")
+            db.commit()
+
+    def stats(self) -> Dict:
+        """Mode, stored entries and bytes, and this session's replay hits/misses."""
+        entries = size = 0
+        if self._conn is not None or self.path.exists():
+            with self._lock:
+                entries, size = self._db().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+        return {"mode": self.mode, "entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return (f"{stats['mode']}, {stats['entries']} entries ({stats['bytes'] / 1e6:.1f} MB), "
+                f"{stats['hits']} hits / {stats['misses']} misses this session")
+
+    # ----- Model calls -----
+
+    def replay(self, key: str) -> Optional[List[ModelResponse]]:
+        value = self.get(key)
+        return None if value is None else [_replayed(data) for data in json.loads(value)]
+
+    def record(self, key: str, responses: List[ModelResponse]):
+        try:
+            value = json.dumps([response.to_dict() for response in responses])
+        except (TypeError, ValueError):
+            return  # Structured or media output that does not serialize is simply not recorded
+        self.put(key, value)
+
+    # ----- Tool calls -----
+
+    def _tool_lookup(self, function_name: str, arguments: Dict):
+        key = tool_key(function_name, arguments)
+        value = self.get(key)
+        return key, (None if value is None else json.loads(value))
+
+    def tool_hook(self, function_name: str, function_call, arguments: Dict):
+        """Sync agno tool hook: serves and records recon tool results."""
+        if not self.enabled or function_name not in self.tool_names:
+            return function_call(**arguments)
+        key, cached = self._tool_lookup(function_name, arguments)
+        if cached is not None:
+            return cached
+        result = function_call(**arguments)
+        if isinstance(result, str):
+            self.put(key, json.dumps(result))
+        return result
+
+    async def async_tool_hook(self, function_name: str, function_call, arguments: Dict):
+        """Async agno tool hook, used on the arun()/aprint_response() path."""
+        if not self.enabled or function_name not in self.tool_names:
+            return await call_tool_async(function_name, function_call, arguments)
+        key, cached = self._tool_lookup(function_name, arguments)
+        if cached is not None:
+            return cached
+        result = await call_tool_async(function_name, function_call, arguments)
+        if isinstance(result, str):
+            self.put(key, json.dumps(result))
+        return result
+
+
+# Shared cache - mode, location and size are configurable from the environment
+LLM_CACHE = ResponseCache(
+    Path(os.getenv("OCELOT_LLM_CACHE_DB", "").strip() or OCELOT_DIR / "llm_cache.db").expanduser(),
+    mode=os.getenv("OCELOT_LLM_CACHE", "").strip().lower() or PASSTHROUGH,
+    max_bytes=env_int("OCELOT_LLM_CACHE_MAX_MB", 512) << 20,
+    strict=env_int("OCELOT_LLM_CACHE_STRICT", 0) != 0,
+)
+
+
+def _cached_class(cls: type) -> type:
+    """Subclass of a provider model class whose invoke methods go through LLM_CACHE.
+
+    Tool calls in a replayed response still run through agno as usual; only the
+    provider request is skipped.
+    """
+
+    class Cached(cls):
+        _llm_cached = True
+
+        def _cache_key(self, kwargs: Dict, stream: bool) -> str:
+            return request_key(
+                self.id, kwargs.get("messages") or [], kwargs.get("tools"),
+                kwargs.get("response_format"), kwargs.get("tool_choice"), stream,
+            )
+
+        def invoke(self, *args, **kwargs) -> ModelResponse:
+            if not LLM_CACHE.enabled:
+                return super().invoke(*args, **kwargs)
+            key = self._cache_key(kwargs, stream=False)
+            replayed = LLM_CACHE.replay(key)
+            if replayed:
+                return replayed[0]
+            response = super().invoke(*args, **kwargs)
+            LLM_CACHE.record(key, [response])
+            return response
+
+        async def ainvoke(self, *args, **kwargs) -> ModelResponse:
+            if not LLM_CACHE.enabled:
+                return await super().ainvoke(*args, **kwargs)
+            key = self._cache_key(kwargs, stream=False)
+            replayed = LLM_CACHE.replay(key)
+            if replayed:
+                return replayed[0]
+            response = await super().ainvoke(*args, **kwargs)
+            LLM_CACHE.record(key, [response])
+            return response
+
+        def invoke_stream(self, *args, **kwargs):
+            if not LLM_CACHE.enabled:
+                yield from super().invoke_stream(*args, **kwargs)
+                return
+            key = self._cache_key(kwargs, stream=True)
+            replayed = LLM_CACHE.replay(key)
+            if replayed is not None:
+                yield from replayed
+                return
+            deltas = []
+            for delta in super().invoke_stream(*args, **kwargs):
+                deltas.append(delta)
+                yield delta
+            # Only a stream that ran to the end is recorded
+            LLM_CACHE.record(key, deltas)
+
+        async def ainvoke_stream(self, *args, **kwargs):
+            if not LLM_CACHE.enabled:
+                async for delta in super().ainvoke_stream(*args, **kwargs):
+                    yield delta
+                return
+            key = self._cache_key(kwargs, stream=True)
+            replayed = LLM_CACHE.replay(key)
+            if replayed is not None:
+                for delta in replayed:
+                    yield delta
+                return
+            deltas = []
+            async for delta in super().ainvoke_stream(*args, **kwargs):
+                deltas.append(delta)
+                yield delta
+            LLM_CACHE.record(key, deltas)
+
+    Cached.__name__ = Cached.__qualname__ = f"Cached{cls.__name__}"
+    return Cached
+
+
+_cached_classes: Dict[type, type] = {}
+
+
+def cached_model(model):
+    """Route a model's provider calls through LLM_CACHE.
+
+    The instance's class is swapped for a caching subclass, so the model keeps
+    its type, settings and deep-copy behaviour. The mode is checked on every
+    call, so one wrapped model follows later set_mode() switches.
+    """
+    cls = type(model)
+    if getattr(cls, "_llm_cached", False):
+        return model
+    if cls not in _cached_classes:
+        _cached_classes[cls] = _cached_class(cls)
+    model.__class__ = _cached_classes[cls]
+    return model
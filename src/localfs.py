@@ -0,0 +1,519 @@
+"""
+In-process versions of the shell helpers behind echo, list_dir, cat_file,
+pwd_command and find_file.
+
+The forms agents use all the time (plain and long listings, reading a file,
+find with -name/-type/-maxdepth, echo into a file) are answered with
+os.scandir, bounded reads and a directory walk instead of forking /bin/sh plus
+a coreutils binary per call. Arguments are split and unquoted like a shell
+would, ~ / $VAR / glob patterns are expanded outside single quotes, and
+redirects (> file, 2>/dev/null, 2>&1, &> file) are honoured, but nothing is
+ever evaluated: `$(...)`, backticks and `;` are plain text. Only an explicit pipe
+in args ("| grep x") still goes through the shell, with the text or file on
+its stdin. Options the native code does not know are handed to the real
+binary as an argument list, without a shell.
+
+Every function returns a subprocess.CompletedProcess, as the shell versions did.
+"""
+
+import codecs
+import fnmatch
+import glob
+import grp
+import math
+import os
+import pwd
+import re
+import shlex
+import shutil
+import stat
+import subprocess
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, List, Optional, Sequence, Tuple
+from capture import run_in_group
+from settings import COMMAND_TIMEOUT, env_int
+
+# Most file content cat_file returns inline; longer files are cut with a note on how to read the rest
+FILE_READ_MAX_BYTES = env_int("OCELOT_FILE_READ_MAX_BYTES", 256 * 1024)
+
+_LS_FLAGS = set("aAlh1rtSd")
+_CAT_FLAGS = set("n")
+_FIND_TESTS = {"-name", "-iname", "-path", "-ipath", "-type", "-maxdepth", "-mindepth"}
+_SIX_MONTHS = 15778476  # ls prints the year instead of the time for older files
+_REDIRECT_RE = re.compile(r"(\d?|&)(>>?)(.*)")  # >file, >>file, 2>/dev/null, 2>&1, &>file
+
+
+# ----- Argument handling -----
+
+def _done(stdout: str = "", errors: Sequence[str] = ()) -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess([], 1 if errors else 0, stdout, "\n".join(errors))
+
+
+class Word(str):
+    """A shell word after expansion and quote removal. quoted is set if any part of it was quoted."""
+    quoted = False
+
+
+def _word(parts: List[str], quoted: bool = False) -> Word:
+    word = Word("".join(parts))
+    word.quoted = quoted
+    return word
+
+
+def _words(text: str) -> List[Word]:
+    """Shell-style word splitting, quote removal and ~ / $VAR expansion, without evaluating anything.
+
+    As in the shell, single-quoted text stays literal and $VAR is expanded unquoted and inside
+    double quotes. Unbalanced quotes fall back to splitting on whitespace.
+    """
+    words, parts, quoted, started = [], [], False, False
+    i, n = 0, len(text)
+    while i < n:
+        char = text[i]
+        if char.isspace():
+            if started:
+                words.append(_word(parts, quoted))
+                parts, quoted, started = [], False, False
+            i += 1
+            continue
+        started = True
+        if char == "'":
+            end = text.find("'", i + 1)
+            if end < 0:
+                return _plain_words(text)
+            parts.append(text[i + 1:end])
+            quoted, i = True, end + 1
+        elif char == '"':
+            chunk, i = [], i + 1
+            while i < n and text[i] != '"':
+                if text[i] == "\\" and i + 1 < n and text[i + 1] in '$`"\\':
+                    parts.append(os.path.expandvars("".join(chunk)) + text[i + 1])
+                    chunk, i = [], i + 2
+                else:
+                    chunk.append(text[i])
+                    i += 1
+            if i >= n:
+                return _plain_words(text)
+            parts.append(os.path.expandvars("".join(chunk)))
+            quoted, i = True, i + 1
+        elif char == "\\":
+            parts.append(text[i + 1:i + 2])
+            quoted, i = True, i + 2
+        else:
+            end = i
+            while end < n and not text[end].isspace() and text[end] not in "'\"\\":
+                end += 1
+            chunk = text[i:end]
+            if not parts and chunk.startswith("~"):
+                chunk = os.path.expanduser(chunk)
+            parts.append(os.path.expandvars(chunk))
+            i = end
+    if started:
+        words.append(_word(parts, quoted))
+    return words
+
+
+def _plain_words(text: str) -> List[Word]:
+    return [_word([os.path.expandvars(os.path.expanduser(word))]) for word in text.split()]
+
+
+def split_pipeline(args: str) -> Tuple[str, str]:
+    """Split args at the first unquoted |, e.g. "-la | grep json" -> ("-la", "grep json")."""
+    quote = ""
+    for i, char in enumerate(args):
+        if quote:
+            if char == quote:
+                quote = ""
+        elif char in "'\"":
+            quote = char
+        elif char == "|":
+            return args[:i], args[i + 1:].strip()
+    return args, ""
+
+
+@dataclass
+class Redirects:
+    """Output redirects pulled out of the args. stderr is a path, /dev/null or "&1"."""
+    stdout: Optional[str] = None
+    append: bool = False
+    stderr: Optional[str] = None
+    stderr_append: bool = False
+
+
+def _redirect(words: List[Word]) -> Tuple[List[Word], Redirects]:
+    """Pull unquoted redirect words (> file, >> file, 2>/dev/null, 2>&1, &> file, >&2) out of the words."""
+    rest, redirects = [], Redirects()
+    i = 0
+    while i < len(words):
+        word, i = words[i], i + 1
+        match = None if word.quoted else _REDIRECT_RE.fullmatch(word)
+        if not match or match.group(1) not in ("", "1", "2", "&"):
+            rest.append(word)
+            continue
+        fd, operator, target = match.groups()
+        if not target and i < len(words):
+            target, i = words[i], i + 1
+        if not target:
+            continue
+        target = target if target.startswith("&") else os.path.expanduser(target)
+        if fd == "2":
+            redirects.stderr, redirects.stderr_append = target, operator == ">>"
+        elif target != "&1":
+            if fd == "&":
+                redirects.stderr = "&1"
+            redirects.stdout, redirects.append = target, operator == ">>"
+    return rest, redirects
+
+
+def _expand(words: List[Word]) -> List[str]:
+    """Paths named by words, with unquoted glob patterns expanded as the shell would."""
+    paths = []
+    for word in words:
+        matches = sorted(glob.glob(word)) if not word.quoted and glob.has_magic(word) else []
+        paths.extend(matches or [word])
+    return paths
+
+
+def _split_flags(words: List[str]) -> Tuple[List[str], set, List[str]]:
+    """Flag words, the single-letter flags they hold, and the remaining operands.
+
+    Flags may follow operands (GNU tools permute them); everything after "--" is an operand.
+    """
+    flag_words, letters, operands = [], set(), []
+    for i, word in enumerate(words):
+        if word == "--":
+            operands.extend(words[i + 1:])
+            break
+        if word.startswith("-") and len(word) > 1:
+            flag_words.append(word)
+            letters |= {word} if word.startswith("--") else set(word[1:])
+        else:
+            operands.append(word)
+    return flag_words, letters, operands
+
+
+def _external(argv: List[str]) -> subprocess.CompletedProcess:
+    """Options the native code does not handle go to the real binary, still without a shell."""
+    return run_in_group(argv, timeout=COMMAND_TIMEOUT)
+
+
+def _pipe(pipeline: str, input_text: Optional[str] = None, stdin_path: Optional[str] = None) -> subprocess.CompletedProcess:
+    """Run the user's pipeline with text or a file on its stdin."""
+    if stdin_path is not None:
+        return run_in_group(f"{{ {pipeline}\n}} < {shlex.quote(stdin_path)}", shell=True, timeout=COMMAND_TIMEOUT)
+    return run_in_group(pipeline, input_text=input_text, shell=True, timeout=COMMAND_TIMEOUT)
+
+
+def _route_stderr(result: subprocess.CompletedProcess, redirects: Redirects) -> subprocess.CompletedProcess:
+    """Apply a 2> redirect. Errors the caller redirected are theirs to read, so the result counts as a success."""
+    if redirects.stderr is None:
+        return result
+    stdout, stderr = result.stdout or "", result.stderr or ""
+    if redirects.stderr == "&1":
+        stdout += stderr if not stderr or stderr.endswith("\n") else stderr + "\n"
+    elif redirects.stderr != "/dev/null":
+        with open(redirects.stderr, "a" if redirects.stderr_append else "w", encoding="utf-8") as handle:
+            handle.write(stderr if not stderr or stderr.endswith("\n") else stderr + "\n")
+    return subprocess.CompletedProcess(result.args, 0, stdout, "")
+
+
+def _finish(result: subprocess.CompletedProcess, pipeline: str, redirects: Redirects):
+    """Send native output on to a pipeline or a redirect target."""
+    result = _route_stderr(result, redirects)
+    if redirects.stdout == "&2":
+        return subprocess.CompletedProcess(result.args, result.returncode, "", (result.stderr or "") + result.stdout)
+    if pipeline:
+        return _pipe(pipeline, input_text=result.stdout)
+    if redirects.stdout:
+        with open(redirects.stdout, "a" if redirects.append else "w", encoding="utf-8") as handle:
+            handle.write(result.stdout)
+        return _done("", result.stderr.splitlines())
+    return result
+
+
+# ----- echo -----
+
+def run_echo(text: str, args: str = "") -> subprocess.CompletedProcess:
+    """echo {text} {args}: leading -n/-e/-E flags, > / >> redirects and | pipelines."""
+    head, pipeline = split_pipeline(args)
+    words, redirects = _redirect(_words(text) + _words(head))
+    newline, escapes = True, False
+    while words and len(words[0]) > 1 and words[0][0] == "-" and set(words[0][1:]) <= set("neE"):
+        for flag in words.pop(0)[1:]:
+            newline = newline and flag != "n"
+            escapes = flag == "e" if flag in "eE" else escapes
+    output = " ".join(words)
+    if escapes:
+        output = codecs.escape_decode(output.encode())[0].decode(errors="replace")
+    return _finish(_done(output + ("\n" if newline else "")), pipeline, redirects)
+
+
+# ----- ls -----
+
+@lru_cache(maxsize=256)
+def _user(uid: int) -> str:
+    try:
+        return pwd.getpwuid(uid).pw_name
+    except KeyError:
+        return str(uid)
+
+
+@lru_cache(maxsize=256)
+def _group(gid: int) -> str:
+    try:
+        return grp.getgrgid(gid).gr_name
+    except KeyError:
+        return str(gid)
+
+
+def human_size(size: int) -> str:
+    """Sizes as ls -h prints them (512, 4.0K, 12K, 1.3M)."""
+    if size < 1024:
+        return str(size)
+    value, unit = float(size), ""
+    for unit in "KMGTPE":
+        value /= 1024
+        if value < 1024:
+            break
+    if value < 10 and math.ceil(value * 10) / 10 < 10:
+        return f"{math.ceil(value * 10) / 10:.1f}{unit}"
+    return f"{math.ceil(value)}{unit}"
+
+
+def _long_lines(entries: List[Tuple[str, str, os.stat_result]], human: bool) -> List[str]:
+    now = time.time()
+    rows = []
+    for name, path, st in entries:
+        if stat.S_ISLNK(st.st_mode):
+            try:
+                name = f"{name} -> {os.readlink(path)}"
+            except OSError:
+                pass
+        stamp = time.strftime("%b %e %H:%M" if abs(now - st.st_mtime) < _SIX_MONTHS else "%b %e  %Y",
+                              time.localtime(st.st_mtime))
+        size = human_size(st.st_size) if human else str(st.st_size)
+        rows.append((stat.filemode(st.st_mode), str(st.st_nlink), _user(st.st_uid), _group(st.st_gid), size, stamp, name))
+    widths = [max((len(row[i]) for row in rows), default=0) for i in range(5)]
+    return [
+        f"{mode} {links:>{widths[1]}} {user:<{widths[2]}} {group:<{widths[3]}} {size:>{widths[4]}} {stamp} {name}"
+        for mode, links, user, group, size, stamp, name in rows
+    ]
+
+
+def _format_listing(entries: List[Tuple[str, str]], flags: set, total: bool) -> str:
+    """One name per line (ls without a terminal), or the long format with -l."""
+    need_stat = flags & set("ltS")
+    stats = []
+    for name, path in entries:
+        try:
+            stats.append((name, path, os.lstat(path) if need_stat else None))
+        except OSError:
+            continue  # Vanished between listing and stat
+    if "t" in flags:
+        stats.sort(key=lambda e: (-e[2].st_mtime, e[0]))
+    elif "S" in flags:
+        stats.sort(key=lambda e: (-e[2].st_size, e[0]))
+    if "r" in flags:
+        stats.reverse()
+    if "l" not in flags:
+        return "\n".join(name for name, _, _ in stats)
+    lines = _long_lines(stats, human="h" in flags)
+    if total:
+        blocks = sum(st.st_blocks for _, _, st in stats) * 512
+        lines.insert(0, f"total {human_size(blocks) if 'h' in flags else blocks // 1024}")
+    return "\n".join(lines)
+
+
+def _dir_entries(directory: str, flags: set) -> List[Tuple[str, str]]:
+    with os.scandir(directory) as it:
+        names = sorted(entry.name for entry in it)
+    if not flags & set("aA"):
+        names = [name for name in names if not name.startswith(".")]
+    if "a" in flags:
+        names = [".", ".."] + names
+    return [(name, os.path.join(directory, name)) for name in names]
+
+
+def run_ls(path: str, args: str = "") -> subprocess.CompletedProcess:
+    """ls {path} {args}: -a -A -l -h -1 -r -t -S -d natively, anything else through the ls binary."""
+    head, pipeline = split_pipeline(args)
+    words, redirects = _redirect(_words(path) + _words(head))
+    flag_words, flags, operands = _split_flags(words)
+    paths = _expand(operands) or ["."]
+    if not flags <= _LS_FLAGS:
+        return _finish(_external(["ls", *flag_words, *paths]), pipeline, redirects)
+
+    errors, files, directories = [], [], []
+    for item in paths:
+        try:
+            st = os.stat(item)  # ls follows symlinks named on the command line
+        except OSError as e:
+            errors.append(f"ls: cannot access '{item}': {e.strerror}")
+            continue
+        (directories if stat.S_ISDIR(st.st_mode) and "d" not in flags else files).append(item)
+
+    blocks = [_format_listing([(item, item) for item in files], flags, total=False)] if files else []
+    for directory in directories:
+        try:
+            listing = _format_listing(_dir_entries(directory, flags), flags, total=True)
+        except OSError as e:
+            errors.append(f"ls: cannot open directory '{directory}': {e.strerror}")
+            continue
+        blocks.append(f"{directory}:\n{listing}" if len(paths) > 1 else listing)
+    output = "\n\n".join(blocks)
+    return _finish(_done(output + "\n" if output else "", errors), pipeline, redirects)
+
+
+# ----- cat -----
+
+def read_bounded(path: str, limit: int = FILE_READ_MAX_BYTES) -> Tuple[str, int, int]:
+    """Up to limit bytes of a file as text, the bytes read, and the file's full size."""
+    with open(path, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        data = handle.read(limit)
+    return data.decode("utf-8", errors="replace"), len(data), max(size, len(data))
+
+
+def run_cat(file_path: str, args: str = "") -> subprocess.CompletedProcess:
+    """cat {file_path} {args}: bounded reads, -n, > / >> redirects and | pipelines over the whole file."""
+    head, pipeline = split_pipeline(args)
+    words, redirects = _redirect(_words(file_path) + _words(head))
+    flag_words, flags, operands = _split_flags(words)
+    paths = _expand(operands)
+    if not paths:
+        return _done("", ["cat: no file given"])
+    if not flags <= _CAT_FLAGS:
+        return _finish(_external(["cat", *flag_words, *paths]), pipeline, redirects)
+
+    if pipeline:
+        # Filters see the whole file, not the bounded read
+        if len(paths) == 1 and not flags:
+            return _route_stderr(_pipe(pipeline, stdin_path=paths[0]), redirects)
+        quoted = " ".join(shlex.quote(p) for p in paths)
+        result = run_in_group(f"cat {' '.join(flag_words)} -- {quoted} | {pipeline}", shell=True, timeout=COMMAND_TIMEOUT)
+        return _route_stderr(result, redirects)
+
+    errors = []
+    if redirects.stdout and redirects.stdout != "&2":
+        with open(redirects.stdout, "ab" if redirects.append else "wb") as out:
+            for item in paths:
+                try:
+                    with open(item, "rb") as handle:
+                        shutil.copyfileobj(handle, out)
+                except OSError as e:
+                    errors.append(f"cat: {item}: {e.strerror}")
+        return _route_stderr(_done("", errors), redirects)
+
+    parts, budget = [], FILE_READ_MAX_BYTES
+    for index, item in enumerate(paths):
+        try:
+            text, read, size = read_bounded(item, budget)
+        except OSError as e:
+            errors.append(f"cat: {item}: {e.strerror}")
+            continue
+        budget -= read
+        parts.append(text)
+        if read < size:
+            skipped = len(paths) - index - 1
+            parts.append(
+                f"\n... [{item}: first {read:,} of {size:,} bytes shown"
+                f"{f', {skipped} more files not read' if skipped else ''} - page through the rest with "
+                f"read_window(file_path=\"{item}\", start_line=...), tail=True or pattern=\"...\"]\n"
+            )
+            break
+    output = "".join(parts)
+    if "n" in flags:
+        output = "".join(f"{n:6d}\t{line}" for n, line in enumerate(output.splitlines(keepends=True), 1))
+    return _finish(_done(output, errors), "", redirects)
+
+
+# ----- find -----
+
+def _walk(path: str, depth: int, maxdepth: Optional[int], errors: List[str]) -> Iterator[Tuple[str, os.DirEntry, int]]:
+    """Pre-order walk like find: each entry, then its contents. Symlinks are not followed."""
+    if maxdepth is not None and depth >= maxdepth:
+        return
+    try:
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError as e:
+        errors.append(f"find: '{path}': {e.strerror}")
+        return
+    for entry in entries:
+        yield entry.path, entry, depth + 1
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk(entry.path, depth + 1, maxdepth, errors)
+
+
+def _entry_type(entry) -> str:
+    if isinstance(entry, os.stat_result):
+        mode = entry.st_mode
+        return "l" if stat.S_ISLNK(mode) else "d" if stat.S_ISDIR(mode) else "f" if stat.S_ISREG(mode) else "o"
+    if entry.is_symlink():
+        return "l"
+    return "d" if entry.is_dir(follow_symlinks=False) else "f" if entry.is_file(follow_symlinks=False) else "o"
+
+
+def run_find(file_path: str, args: str = "") -> subprocess.CompletedProcess:
+    """find {file_path} {args}: -name -iname -path -ipath -type -maxdepth -mindepth natively (ANDed),
+    anything else (-exec, -o, -size, ...) through the find binary."""
+    head, pipeline = split_pipeline(args)
+    words, redirects = _redirect(_words(file_path) + _words(head))
+    split = next((i for i, word in enumerate(words) if word.startswith("-") or word in ("!", "(")), len(words))
+    roots, expression = _expand(words[:split]) or ["."], words[split:]
+
+    tests, mindepth, maxdepth, native = [], 0, None, True
+    i = 0
+    while i < len(expression):
+        word = expression[i]
+        if word == "-print":
+            i += 1
+            continue
+        if word not in _FIND_TESTS or i + 1 >= len(expression):
+            native = False
+            break
+        value = expression[i + 1]
+        i += 2
+        if word in ("-maxdepth", "-mindepth"):
+            if not value.isdigit():
+                native = False
+                break
+            maxdepth, mindepth = (int(value), mindepth) if word == "-maxdepth" else (maxdepth, int(value))
+        else:
+            tests.append((word, value))
+    if not native:
+        return _finish(_external(["find", *roots, *expression]), pipeline, redirects)
+
+    def matches(path: str, entry) -> bool:
+        name = os.path.basename(path.rstrip("/")) or path
+        for test, value in tests:
+            if test == "-name" and not fnmatch.fnmatchcase(name, value):
+                return False
+            if test == "-iname" and not fnmatch.fnmatchcase(name.lower(), value.lower()):
+                return False
+            if test == "-path" and not fnmatch.fnmatchcase(path, value):
+                return False
+            if test == "-ipath" and not fnmatch.fnmatchcase(path.lower(), value.lower()):
+                return False
+            if test == "-type" and _entry_type(entry) not in value.split(","):
+                return False
+        return True
+
+    found, errors = [], []
+    for root in roots:
+        try:
+            root_stat = os.lstat(root)
+        except OSError as e:
+            errors.append(f"find: '{root}': {e.strerror}")
+            continue
+        if mindepth == 0 and matches(root, root_stat):
+            found.append(root)
+        if stat.S_ISDIR(root_stat.st_mode):
+            found.extend(
+                path for path, entry, depth in _walk(root, 0, maxdepth, errors)
+                if depth >= mindepth and matches(path, entry)
+            )
+    output = "\n".join(found)
+    return _finish(_done(output + "\n" if output else "", errors), pipeline, redirects)
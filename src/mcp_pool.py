@@ -0,0 +1,281 @@
+"""
+Persistent MCP server connections.
+
+Each configured MCP server is started once and kept connected for the life of
+the process. All connections live on one background event loop. Each server is
+held open by its own long-lived task, so its session survives agent runs and
+reconfiguration and is closed by the same task that opened it. A periodic
+health check pings every server, restarts dead ones, and records latency for
+/status.
+"""
+
+import asyncio
+import atexit
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from settings import env_int
+
+# Seconds between background health checks (0 disables them)
+MCP_HEALTH_INTERVAL = env_int("OCELOT_MCP_HEALTH_INTERVAL", 30)
+
+# Seconds to wait for a server to start and finish its handshake
+MCP_CONNECT_TIMEOUT = env_int("OCELOT_MCP_CONNECT_TIMEOUT", 60)
+
+
+@dataclass
+class ServerStats:
+    """Connection and latency counters for one MCP server."""
+    name: str
+    healthy: bool = False
+    connect_ms: float = 0.0
+    restarts: int = 0
+    pings: int = 0
+    ping_failures: int = 0
+    last_ping_ms: float = 0.0
+    calls: int = 0
+    call_errors: int = 0
+    call_total_ms: float = 0.0
+    call_max_ms: float = 0.0
+
+    @property
+    def call_avg_ms(self) -> float:
+        return self.call_total_ms / self.calls if self.calls else 0.0
+
+    def summary(self) -> str:
+        state = "up" if self.healthy else "DOWN"
+        line = f"{state}, connect {self.connect_ms:.0f}ms, ping {self.last_ping_ms:.0f}ms"
+        if self.calls:
+            line += f", {self.calls} calls avg {self.call_avg_ms:.0f}ms max {self.call_max_ms:.0f}ms"
+        if self.call_errors:
+            line += f", {self.call_errors} errors"
+        if self.restarts:
+            line += f", {self.restarts} restarts"
+        return line
+
+
+def server_key(server: Dict) -> str:
+    """Identity of a server config: its command or URL."""
+    return server.get("command") or f"{server.get('transport', 'streamable-http')}:{server.get('url', '')}"
+
+
+class _Connection:
+    """One pooled server: its toolkit, stats and the task holding it open."""
+
+    def __init__(self, server: Dict, toolkit, stats: ServerStats):
+        self.server = server
+        self.toolkit = toolkit
+        self.stats = stats
+        self.commands: Optional[asyncio.Queue] = None
+        self.ready: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class MCPPool:
+    """Starts MCP servers once and keeps their sessions open across agent runs."""
+
+    def __init__(self, health_interval: int = MCP_HEALTH_INTERVAL):
+        self.health_interval = health_interval
+        self._connections: Dict[str, _Connection] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._health_task = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    # ----- Event loop -----
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-pool", daemon=True)
+                self._thread.start()
+                if self.health_interval > 0:
+                    self._health_task = asyncio.run_coroutine_threadsafe(self._health_loop(), self._loop)
+            return self._loop
+
+    @property
+    def active(self) -> bool:
+        return bool(self._connections)
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the pool's loop (where the MCP sessions live) and wait for it."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    # ----- Servers -----
+
+    def toolkit(self, server: Dict):
+        """Toolkit for a server config, started and connected on first use and reused after that."""
+        key = server_key(server)
+        with self._start_lock:
+            if key not in self._connections:
+                connection = _Connection(server, self._build_toolkit(server), ServerStats(server.get("name", key)))
+                try:
+                    self.run(self._start(connection), timeout=MCP_CONNECT_TIMEOUT + 5)
+                except BaseException:
+                    # Not registered, so the next call starts the server again
+                    if connection.task:
+                        self._loop.call_soon_threadsafe(connection.task.cancel)
+                    raise
+                self._connections[key] = connection
+        return self._connections[key].toolkit
+
+    @staticmethod
+    def _build_toolkit(server: Dict):
+        # The MCP SDK is only loaded when a server is actually configured
+        from agno.tools.mcp import MCPTools
+
+        if "command" in server:
+            return MCPTools(command=server["command"], env=server.get("env"))
+        return MCPTools(url=server["url"], transport=server.get("transport", "streamable-http"))
+
+    async def _start(self, connection: _Connection):
+        connection.commands = asyncio.Queue()
+        connection.ready = asyncio.Event()
+        connection.task = asyncio.create_task(self._hold(connection))
+        await self._wait_ready(connection)
+
+    @staticmethod
+    async def _wait_ready(connection: _Connection):
+        """Wait until the holding task has (re)connected the server.
+
+        Raises:
+            ConnectionError: If the task exited instead (e.g., the server failed to start).
+            TimeoutError: If it is not connected within MCP_CONNECT_TIMEOUT.
+        """
+        ready = asyncio.ensure_future(connection.ready.wait())
+        done, _ = await asyncio.wait({ready, connection.task}, timeout=MCP_CONNECT_TIMEOUT,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        if ready in done:
+            return
+        ready.cancel()
+        if connection.task.done():
+            error = None if connection.task.cancelled() else connection.task.exception()
+            raise ConnectionError(f"MCP server {connection.stats.name} stopped: {error or 'cancelled'}")
+        raise TimeoutError(f"MCP server {connection.stats.name} did not connect within {MCP_CONNECT_TIMEOUT}s")
+
+    async def _hold(self, connection: _Connection):
+        """Keep one server connected until told to stop; restarts happen in this same task."""
+        toolkit, stats = connection.toolkit, connection.stats
+        while True:
+            started = time.monotonic()
+            await toolkit.connect(force=stats.restarts > 0)
+            stats.connect_ms = (time.monotonic() - started) * 1000
+            stats.healthy = bool(toolkit.initialized)
+            if stats.healthy:
+                self._time_calls(toolkit, stats)
+            connection.ready.set()
+
+            command = await connection.commands.get()
+            await toolkit.close()
+            stats.healthy = False
+            if command == "stop":
+                return
+            stats.restarts += 1
+
+    @staticmethod
+    def _time_calls(toolkit, stats: ServerStats):
+        """Wrap the session's call_tool so every tool call is timed."""
+        session = toolkit.session
+        call_tool = session.call_tool
+
+        async def timed_call_tool(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                result = await call_tool(*args, **kwargs)
+                if getattr(result, "isError", False):
+                    stats.call_errors += 1
+                return result
+            except Exception:
+                stats.call_errors += 1
+                raise
+            finally:
+                elapsed = (time.monotonic() - started) * 1000
+                stats.calls += 1
+                stats.call_total_ms += elapsed
+                stats.call_max_ms = max(stats.call_max_ms, elapsed)
+
+        session.call_tool = timed_call_tool
+
+    # ----- Health -----
+
+    async def _check(self, connection: _Connection):
+        """Ping one server; restart it if the ping fails."""
+        stats, session = connection.stats, connection.toolkit.session
+        started = time.monotonic()
+        try:
+            if session is None:
+                raise ConnectionError("not connected")
+            await asyncio.wait_for(session.send_ping(), timeout=10)
+            stats.last_ping_ms = (time.monotonic() - started) * 1000
+            stats.pings += 1
+            stats.healthy = True
+        except Exception:
+            stats.ping_failures += 1
+            stats.healthy = False
+            connection.ready.clear()
+            if connection.task.done():
+                # The holding task died (e.g., a reconnect raised) - nothing reads commands, start a new one
+                stats.restarts += 1
+                connection.task = asyncio.create_task(self._hold(connection))
+            else:
+                connection.commands.put_nowait("restart")
+            await self._wait_ready(connection)
+
+    async def _check_all(self):
+        await asyncio.gather(*(self._check(c) for c in list(self._connections.values())), return_exceptions=True)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self._check_all()
+
+    def health_check(self) -> List[ServerStats]:
+        """Ping every server now (restarting dead ones) and return fresh stats."""
+        if self.active:
+            try:
+                # Pings take up to 10s and restarts up to MCP_CONNECT_TIMEOUT, all in parallel
+                self.run(self._check_all(), timeout=MCP_CONNECT_TIMEOUT + 15)
+            except Exception:
+                pass  # Servers still restarting show as down
+        return self.stats()
+
+    def stats(self) -> List[ServerStats]:
+        return [connection.stats for connection in self._connections.values()]
+
+    # ----- Shutdown -----
+
+    async def _stop_all(self):
+        for connection in self._connections.values():
+            if connection.task and not connection.task.done():
+                connection.commands.put_nowait("stop")
+        tasks = [c.task for c in self._connections.values() if c.task]
+        await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=10)
+
+    def shutdown(self):
+        """Close every session and stop every server process."""
+        if self._loop is None:
+            return
+        try:
+            if self._health_task:
+                self._health_task.cancel()
+            if self._connections:
+                self.run(self._stop_all())
+        except Exception:
+            pass
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._connections.clear()
+            self._loop = None
+
+
+MCP_POOL = MCPPool()
+atexit.register(MCP_POOL.shutdown)
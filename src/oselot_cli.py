@@ -9,7 +9,6 @@ import os
 import logging
 import argparse
 from dotenv import load_dotenv
-from agent import OsintAgentSystem
 
 load_dotenv()
 
@@ -47,12 +46,13 @@ directory: {display_dir}
 
 To get started, describe a security task or try one of these commands:
 
-/model     - choose what model to use
+/model     - choose what model to use (/model <role> for one agent)
 /memory    - toggle conversation memory (default: off)
 /storage   - toggle agent storage/state (default: off)
 /mcp       - toggle MCP server support (default: off)
 /add-mcp   - add a Model Context Protocol server
 /status    - show current session configuration  
+/stats     - show per-tool, delegation and LLM telemetry
 /clear     - clear the screen
 /help      - show detailed help information
 /quit      - exit the CLI
@@ -75,11 +75,15 @@ def print_help():
 
 COMMANDS:
   /model     - Switch between AI models (GPT-4o, GPT-4o-mini, etc.)
+               /model <role> switches one agent: manager, asn, bbot, httpx, reporter
   /memory    - Toggle conversation memory on/off (default: off)
   /storage   - Toggle agent storage/state persistence (default: off)
   /mcp       - Toggle MCP server support on/off (default: off)
   /add-mcp   - Add a Model Context Protocol (MCP) server
   /status    - Display current model and configuration
+  /stats     - Show tool/delegation/LLM timings, bytes, lines and tokens
+               /stats export [dir] writes JSONL + Prometheus textfile, /stats clear resets
+  /tools     - Show the tools each agent carries and the prompt tokens scoping saves
   /clear     - Clear the terminal screen
   /help      - Show this help message
   /quit      - Exit the Ocelot CLI
@@ -317,7 +321,7 @@ def get_model_input():
         return models.get(choice, "gpt-5.2")
 
 
-def print_status(model_id: str, memory_enabled: bool = False, storage_enabled: bool = False, mcp_enabled: bool = False, mcp_servers: list = []):
+def print_status(model_id: str, memory_enabled: bool = False, storage_enabled: bool = False, mcp_enabled: bool = False, mcp_servers: list = [], model_report: str = ""):
     """Print current session status"""
     cwd = os.getcwd()
     home = os.path.expanduser("~")
@@ -332,6 +336,14 @@ def print_status(model_id: str, memory_enabled: bool = False, storage_enabled: b
         storage_status += "\n           Database: ~/.ocelot/agent_storage.db"
     
     mcp_servers = mcp_servers or []
+
+    from cache import ASNMAP_CACHE
+    cache_stats = ASNMAP_CACHE.stats()
+    cache_info = (f"{cache_stats['entries']} entries, "
+                  f"{cache_stats['hits']} hits / {cache_stats['misses']} misses this session")
+
+    from llm_cache import LLM_CACHE
+    llm_cache_info = LLM_CACHE.summary() if LLM_CACHE.enabled else "passthrough (--llm-cache record|replay)"
     
     mcp_info = "Disabled"
     if mcp_enabled:
@@ -347,9 +359,12 @@ def print_status(model_id: str, memory_enabled: bool = False, storage_enabled: b
 
 Version:   {VERSION}
 Model:     {model_id}
+{model_report}
 Memory:    {memory_status}
 Storage:   {storage_status}
 MCP:       {mcp_info}
+ASN Cache: {cache_info}
+LLM Cache: {llm_cache_info}
 Directory: {display_dir}
 
 Active Agents: 4 OSINT Specialists
@@ -372,25 +387,17 @@ Available Tools:
                 status_text += f"\n     URL: {server['url']}"
                 status_text += f"\n     Transport: {server.get('transport', 'streamable-http')}"
     
-    print(status_text)
+    from mcp_pool import MCP_POOL
+    if MCP_POOL.active:
+        status_text += "\n\nMCP Server Health:"
+        for stats in MCP_POOL.health_check():
+            status_text += f"\n  • {stats.name}: {stats.summary()}"
 
+    print(status_text)
 
-def main():
-    """Main CLI loop"""
-    parser = argparse.ArgumentParser(description='Ocelot OSINT Agent CLI')
-    parser.add_argument('--model', type=str, help='LLM model ID to use')
-    parser.add_argument('--memory', action='store_true', help='Enable conversation memory')
-    parser.add_argument('--storage', action='store_true', help='Enable agent storage/state persistence')
-    parser.add_argument('--mcp', action='store_true', help='Enable MCP server support')
-    args = parser.parse_args()
-
-    model_id = args.model or os.getenv('LLM_MODEL_ID', '').strip() or "gpt-5.2"
-    memory_enabled = args.memory  # Default: False (disabled)
-    storage_enabled = args.storage  # Default: False (disabled)
-    mcp_enabled = args.mcp  # Default: False (disabled)
-    mcp_servers = []  # List of MCP server configurations
 
-    # Check for API key based on selected model
+def require_api_key(model_id: str):
+    """Exit with setup instructions if the selected model's provider key is not set"""
     api_key_map = {
         "gpt": ("OPENAI_API_KEY", "https://platform.openai.com/api-keys"),
         "o3": ("OPENAI_API_KEY", "https://platform.openai.com/api-keys"),
@@ -414,13 +421,161 @@ def main():
         print(f"  3. Get an API key from: {key_url}\n")
         sys.exit(1)
 
+
+LLM_CACHE_MODES = ('passthrough', 'record', 'replay')
+
+
+def add_role_model_argument(parser: argparse.ArgumentParser):
+    from settings import MODEL_ROLES
+    parser.add_argument('--role-model', action='append', default=[], metavar='ROLE=MODEL', help=f'Run one agent on its own model, e.g. asn=gpt-5-mini (repeatable; roles: {", ".join(MODEL_ROLES)}; also OCELOT_MODEL_<ROLE>)')
+
+
+def parse_role_models(parser: argparse.ArgumentParser, values: list) -> dict:
+    """Per-role model ids from OCELOT_MODEL_<ROLE> and --role-model flags (flags win)"""
+    from settings import MODEL_ROLES, role_models_from_env
+
+    role_models = role_models_from_env()
+    for value in values:
+        role, _, model = value.partition('=')
+        role, model = role.strip().lower(), model.strip()
+        if role not in MODEL_ROLES or not model:
+            parser.error(f"--role-model expects ROLE=MODEL with ROLE one of {', '.join(MODEL_ROLES)}, got '{value}'")
+        role_models[role] = model
+    return role_models
+
+
+def apply_llm_cache_mode(mode: str):
+    """Set the record/replay cache mode before agent (and llm_cache) is imported"""
+    if mode:
+        os.environ['OCELOT_LLM_CACHE'] = mode
+
+
+def replaying() -> bool:
+    """Replayed runs are served from the cache, so they need no provider key"""
+    return os.getenv('OCELOT_LLM_CACHE', '').strip().lower() == 'replay'
+
+
+def check_resume(run_id: str) -> bool:
+    """True if run_id has a checkpoint to resume; otherwise list the runs that do"""
+    from checkpoint import Checkpoint, list_checkpoints
+
+    if run_id:
+        try:
+            checkpoint = Checkpoint.load(run_id)
+            print(f"Resuming {checkpoint.summary()}")
+            return True
+        except (FileNotFoundError, ValueError, TypeError) as e:
+            print(f"✗ {e}")
+    checkpoints = list_checkpoints()
+    if not checkpoints:
+        print("No checkpointed runs found.")
+        return False
+    print("Resumable runs (newest first):")
+    for checkpoint in checkpoints:
+        print(f"  • {checkpoint.summary()}")
+    return False
+
+
+def campaign_main(argv: list) -> int:
+    """Non-interactive batch mode: oselot campaign targets.txt"""
+    from campaign import CAMPAIGN_CONCURRENCY, DEFAULT_TASK, CampaignOptions, load_targets, make_campaign_id, run_campaign
+
+    parser = argparse.ArgumentParser(prog='oselot campaign', description='Assess every target in a file, several at a time')
+    parser.add_argument('targets_file', help='File with one domain or organization per line (# comments allowed)')
+    parser.add_argument('--concurrency', '-c', type=int, default=CAMPAIGN_CONCURRENCY, help=f'Targets assessed at once (default: {CAMPAIGN_CONCURRENCY}, OCELOT_CAMPAIGN_CONCURRENCY)')
+    parser.add_argument('--model', type=str, help='LLM model ID to use')
+    add_role_model_argument(parser)
+    parser.add_argument('--pipeline', action='store_true', help='Run the fixed asnmap -> bbot -> httpx pipeline and a report per target instead of the full team')
+    parser.add_argument('--full-probe', action='store_true', help='With --pipeline, re-probe every host instead of only new/changed ones')
+    parser.add_argument('--async', dest='async_tools', action='store_true', help='Run tools on the asyncio engine so independent scans overlap')
+    parser.add_argument('--task', type=str, default=DEFAULT_TASK, help='Task given to the team for each target; {target} is replaced by the target')
+    parser.add_argument('--llm-cache', choices=LLM_CACHE_MODES, help='Record model responses and tool results, or replay recorded ones instead of calling the provider (default: OCELOT_LLM_CACHE or passthrough)')
+    args = parser.parse_args(argv)
+
+    apply_llm_cache_mode(args.llm_cache)  # Workers inherit it through the environment
+    model_id = args.model or os.getenv('LLM_MODEL_ID', '').strip() or "gpt-5.2"
+    role_models = parse_role_models(parser, args.role_model)
+    if not replaying():
+        for model in {model_id, *role_models.values()}:
+            require_api_key(model)
+
+    try:
+        targets = load_targets(args.targets_file)
+    except OSError as e:
+        print(f"✗ Cannot read targets file: {e}")
+        return 1
+    if not targets:
+        print(f"✗ No targets in {args.targets_file}")
+        return 1
+    if '{target}' not in args.task:
+        print("✗ --task must contain {target}")
+        return 1
+
+    options = CampaignOptions(
+        campaign_id=make_campaign_id(args.targets_file),
+        model_name=model_id,
+        role_models=role_models,
+        pipeline=args.pipeline,
+        full_probe=args.full_probe,
+        use_async=args.async_tools,
+        task=args.task,
+    )
+    try:
+        results = run_campaign(targets, options, concurrency=args.concurrency)
+    except KeyboardInterrupt:
+        return 130
+    return 0 if all(result.ok for result in results) else 1
+
+
+def main():
+    """Main CLI loop"""
+    if sys.argv[1:2] == ['campaign']:
+        sys.exit(campaign_main(sys.argv[2:]))
+
+    parser = argparse.ArgumentParser(
+        description='Ocelot OSINT Agent CLI',
+        epilog='Batch mode: oselot campaign targets.txt [--concurrency N] (see oselot campaign --help)'
+    )
+    parser.add_argument('--model', type=str, help='LLM model ID to use')
+    add_role_model_argument(parser)
+    parser.add_argument('--memory', action='store_true', help='Enable conversation memory')
+    parser.add_argument('--storage', action='store_true', help='Enable agent storage/state persistence')
+    parser.add_argument('--mcp', action='store_true', help='Enable MCP server support')
+    parser.add_argument('--pipeline', type=str, metavar='TARGET', help='Run the fixed asnmap -> bbot -> httpx pipeline on TARGET, report, and exit')
+    parser.add_argument('--full-probe', action='store_true', help='With --pipeline, re-probe every host instead of only new/changed ones')
+    parser.add_argument('--async', dest='async_tools', action='store_true', help='Run tools on the asyncio engine so independent scans overlap')
+    parser.add_argument('--resume', type=str, nargs='?', const='', metavar='RUN_ID', help='Continue an interrupted --pipeline run from its last completed stage (no RUN_ID: list resumable runs)')
+    parser.add_argument('--llm-cache', choices=LLM_CACHE_MODES, help='Record model responses and tool results, or replay recorded ones instead of calling the provider (default: OCELOT_LLM_CACHE or passthrough)')
+    args = parser.parse_args()
+
+    if args.resume is not None and not check_resume(args.resume):
+        sys.exit(1)
+    apply_llm_cache_mode(args.llm_cache)
+
+    # Imported after argument parsing so --help never pays for agno and the provider SDKs
+    from agent import OsintAgentSystem
+
+    model_id = args.model or os.getenv('LLM_MODEL_ID', '').strip() or "gpt-5.2"
+    memory_enabled = args.memory  # Default: False (disabled)
+    storage_enabled = args.storage  # Default: False (disabled)
+    mcp_enabled = args.mcp  # Default: False (disabled)
+    mcp_servers = []  # List of MCP server configurations
+    async_enabled = args.async_tools  # Default: False (blocking tools)
+    role_models = parse_role_models(parser, args.role_model)  # Agents on another model than model_id
+
+    if not replaying():
+        for model in {model_id, *role_models.values()}:
+            require_api_key(model)
+
     try:
         agent_system = OsintAgentSystem(
             model_name=model_id, 
             use_memory=memory_enabled,
             use_storage=storage_enabled,
             use_mcp=mcp_enabled,
-            mcp_servers=mcp_servers
+            mcp_servers=mcp_servers,
+            use_async=async_enabled,
+            role_models=role_models,
         )
         current_model = model_id
     except Exception as e:
@@ -428,6 +583,14 @@ def main():
         print("\nMake sure you have the correct API key configured for your model.")
         sys.exit(1)
 
+    # Non-interactive pipeline mode: no manager delegation, just recon + report
+    if args.resume:
+        agent_system.resume_pipeline(args.resume)
+        return
+    if args.pipeline:
+        agent_system.run_pipeline(args.pipeline, full_probe=args.full_probe)
+        return
+
     clear_screen()
     print_banner(current_model, memory_enabled, storage_enabled, mcp_enabled, len(mcp_servers))
 
@@ -456,23 +619,38 @@ def main():
                     continue
 
                 elif command in ['/status']:
-                    print_status(current_model, memory_enabled, storage_enabled, mcp_enabled, mcp_servers)
+                    print_status(current_model, memory_enabled, storage_enabled, mcp_enabled, mcp_servers,
+                                 agent_system.model_report())
+                    continue
+
+                elif command == '/stats' or command.startswith('/stats '):
+                    from telemetry import TELEMETRY
+                    parts = user_input.split(maxsplit=2)
+                    if len(parts) > 1 and parts[1].lower() == 'export':
+                        out_dir = os.path.expanduser(parts[2] if len(parts) > 2 else '.')
+                        count = TELEMETRY.export_jsonl(os.path.join(out_dir, 'oselot-telemetry.jsonl'))
+                        prom = TELEMETRY.export_prometheus(os.path.join(out_dir, 'oselot.prom'))
+                        print(f"\n✓ Exported {count} events to {out_dir}/oselot-telemetry.jsonl and {prom}")
+                    elif len(parts) > 1 and parts[1].lower() == 'clear':
+                        TELEMETRY.clear()
+                        print("\n✓ Telemetry cleared")
+                    else:
+                        print()
+                        print(TELEMETRY.format_summary())
+                    continue
+
+                elif command in ['/tools']:
+                    print()
+                    print(agent_system.tool_scope_report())
                     continue
 
                 elif command in ['/memory']:
                     memory_enabled = not memory_enabled
                     new_status = "enabled" if memory_enabled else "disabled"
                     print(f"\n🧠 Memory {new_status}")
-                    print(f"🔄 Reinitializing agents with memory {new_status}...")
                     try:
-                        agent_system = OsintAgentSystem(
-                            model_name=current_model, 
-                            use_memory=memory_enabled,
-                            use_storage=storage_enabled,
-                            use_mcp=mcp_enabled,
-                            mcp_servers=mcp_servers
-                        )
-                        print(f"✓ Agents reinitialized with memory {new_status}")
+                        agent_system.set_memory(memory_enabled)
+                        print(f"✓ Agents reconfigured with memory {new_status}")
                         clear_screen()
                         print_banner(current_model, memory_enabled, storage_enabled, mcp_enabled, len(mcp_servers))
                     except Exception as e:
@@ -484,16 +662,9 @@ def main():
                     storage_enabled = not storage_enabled
                     new_status = "enabled" if storage_enabled else "disabled"
                     print(f"\n Storage {new_status}")
-                    print(f" Reinitializing agents with storage {new_status}...")
                     try:
-                        agent_system = OsintAgentSystem(
-                            model_name=current_model, 
-                            use_memory=memory_enabled,
-                            use_storage=storage_enabled,
-                            use_mcp=mcp_enabled,
-                            mcp_servers=mcp_servers
-                        )
-                        print(f"✓ Agents reinitialized with storage {new_status}")
+                        agent_system.set_storage(storage_enabled)
+                        print(f"✓ Agents reconfigured with storage {new_status}")
                         clear_screen()
                         print_banner(current_model, memory_enabled, storage_enabled, mcp_enabled, len(mcp_servers))
                     except Exception as e:
@@ -509,16 +680,9 @@ def main():
                     if mcp_enabled and not mcp_servers:
                         print("⚠️  No MCP servers configured yet. Use /add-mcp to add servers.")
                     
-                    print(f" Reinitializing agents with MCP {new_status}...")
                     try:
-                        agent_system = OsintAgentSystem(
-                            model_name=current_model, 
-                            use_memory=memory_enabled,
-                            use_storage=storage_enabled,
-                            use_mcp=mcp_enabled,
-                            mcp_servers=mcp_servers
-                        )
-                        print(f"✓ Agents reinitialized with MCP {new_status}")
+                        agent_system.set_mcp(mcp_enabled)
+                        print(f"✓ Agents reconfigured with MCP {new_status}")
                         clear_screen()
                         print_banner(current_model, memory_enabled, storage_enabled, mcp_enabled, len(mcp_servers))
                     except Exception as e:
@@ -529,23 +693,16 @@ def main():
                 elif command in ['/add-mcp']:
                     new_server = add_mcp_server()
                     if new_server:
-                        mcp_servers.append(new_server)
-                        print(f"\n✓ Added to MCP servers list")
-                        
+                        try:
+                            # mcp_servers is the same list the agent system holds
+                            agent_system.add_mcp_server(new_server)
+                            print(f"\n✓ Added to MCP servers list")
+                        except Exception as e:
+                            print(f"✗ Failed to add MCP server: {e}")
+                            continue
+
                         if mcp_enabled:
-                            print(f" Reinitializing agents with new MCP server...")
-                            try:
-                                agent_system = OsintAgentSystem(
-                                    model_name=current_model, 
-                                    use_memory=memory_enabled,
-                                    use_storage=storage_enabled,
-                                    use_mcp=mcp_enabled,
-                                    mcp_servers=mcp_servers
-                                )
-                                print(f"✓ Agents reinitialized with {len(mcp_servers)} MCP servers")
-                            except Exception as e:
-                                print(f"✗ Failed to reinitialize with new MCP server: {e}")
-                                mcp_servers.pop()  # Remove the server on error
+                            print(f"✓ Agents now have {len(mcp_servers)} MCP servers")
                         else:
                             print("💡 Tip: Use /mcp to enable MCP server support")
                     continue
@@ -555,13 +712,7 @@ def main():
                     if new_model != current_model:
                         print(f"\n🔄 Switching to {new_model}...")
                         try:
-                            agent_system = OsintAgentSystem(
-                                model_name=new_model, 
-                                use_memory=memory_enabled,
-                                use_storage=storage_enabled,
-                                use_mcp=mcp_enabled,
-                                mcp_servers=mcp_servers
-                            )
+                            agent_system.set_model(new_model)
                             current_model = new_model
                             print(f"✓ Now using {new_model}")
                             clear_screen()
@@ -570,6 +721,22 @@ def main():
                             print(f"✗ Failed to switch model: {e}")
                     continue
 
+                elif command.startswith('/model '):
+                    from settings import MODEL_ROLES
+                    role = command.split(maxsplit=1)[1].strip()
+                    if role not in MODEL_ROLES:
+                        print(f"\n✗ Unknown role '{role}' - use one of: {', '.join(MODEL_ROLES)}")
+                        continue
+                    print(f"\n Model for {role} (now {agent_system.model_id_for(role)}):")
+                    new_model = get_model_input()
+                    try:
+                        agent_system.set_model(new_model, role=role)
+                        print(f"✓ {role} now uses {new_model}")
+                        print(agent_system.model_report())
+                    except Exception as e:
+                        print(f"✗ Failed to switch model: {e}")
+                    continue
+
                 else:
                     print(f" Unknown command: {user_input}")
                     print("Type /help for available commands")
@@ -0,0 +1,244 @@
+"""
+Windowed reads of large files through mmap.
+
+cat_file returns a bounded prefix of a file. read_window pages through scan
+artifacts of any size (multi-GB bbot/httpx output) in bounded memory: a
+window of lines, a window at a byte offset, the end of the file, or the lines
+matching a regex. Line numbers come from a sparse index holding the newline
+count before every 1 MiB chunk. It is built on first use, only as far as a
+request needs, and kept per file. Jumping to line N later costs one bisect
+plus a scan of at most one chunk.
+"""
+
+import mmap
+import os
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+from localfs import FILE_READ_MAX_BYTES
+from settings import env_int
+
+# Bytes per line-index chunk; reaching a line scans at most one chunk past the index
+INDEX_CHUNK_BYTES = env_int("OCELOT_LINE_INDEX_CHUNK_BYTES", 1 << 20)
+
+# Files whose line index is kept in memory, least recently used dropped first
+INDEX_CACHE_FILES = env_int("OCELOT_LINE_INDEX_FILES", 32)
+
+# Longest line returned as-is; longer ones (e.g., minified JSON) are cut
+WINDOW_MAX_LINE_CHARS = env_int("OCELOT_WINDOW_MAX_LINE_CHARS", 2000)
+
+# Most lines (or matches) returned by one call
+WINDOW_MAX_LINES = 500
+
+
+@dataclass
+class LineIndex:
+    """Newline counts before each chunk boundary of one file.
+
+    starts[i] is the number of newlines in bytes [0, i * chunk). Only whole
+    chunks are recorded, so a file that grows (a scan still writing its
+    output) keeps a valid index.
+    """
+    device: int
+    inode: int
+    size: int
+    chunk: int = INDEX_CHUNK_BYTES
+    starts: List[int] = field(default_factory=lambda: [0])
+
+    def _extend(self, data, upto: int):
+        """Index whole chunks up to byte `upto`."""
+        upto = min(upto, len(data))
+        while len(self.starts) * self.chunk <= upto:
+            begin = (len(self.starts) - 1) * self.chunk
+            self.starts.append(self.starts[-1] + data[begin:begin + self.chunk].count(b"\n"))
+
+    def newlines_before(self, data, offset: int) -> int:
+        self._extend(data, offset)
+        i = min(offset // self.chunk, len(self.starts) - 1)
+        return self.starts[i] + data[i * self.chunk:offset].count(b"\n")
+
+    def line_offset(self, data, line: int) -> Optional[int]:
+        """Byte offset where 1-based `line` starts, or None past the end of the file."""
+        target = line - 1
+        if target <= 0:
+            return 0
+        while self.starts[-1] < target and len(self.starts) * self.chunk <= len(data):
+            self._extend(data, len(self.starts) * self.chunk)
+        i = bisect_left(self.starts, target) - 1
+        pos, remaining = i * self.chunk, target - self.starts[i]
+        while remaining:
+            pos = data.find(b"\n", pos)
+            if pos < 0:
+                return None
+            pos += 1
+            remaining -= 1
+        return pos if pos < len(data) else None
+
+    def line_count(self, data) -> int:
+        count = self.newlines_before(data, len(data))
+        return count + 1 if data[-1:] not in (b"", b"\n") else count
+
+
+_indexes: "OrderedDict[str, LineIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def line_index(path: str, st: os.stat_result) -> LineIndex:
+    """Cached index for a file, dropped if the file was replaced or truncated."""
+    key = os.path.realpath(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None or (index.device, index.inode) != (st.st_dev, st.st_ino) or st.st_size < index.size:
+            index = LineIndex(st.st_dev, st.st_ino, st.st_size)
+        index.size = st.st_size
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > INDEX_CACHE_FILES:
+            _indexes.popitem(last=False)
+        return index
+
+
+@contextmanager
+def _mapped(path: str) -> Iterator[Tuple[object, os.stat_result]]:
+    """The file's bytes as a read-only mmap (b"" for an empty file) and its stat."""
+    with open(path, "rb") as handle:
+        st = os.fstat(handle.fileno())
+        if st.st_size == 0:
+            yield b"", st
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data, st
+
+
+# ----- Windows -----
+
+def _line_text(data, start: int, end: int) -> str:
+    """One line, decoded, with overly long lines cut."""
+    raw = data[start:min(end, start + WINDOW_MAX_LINE_CHARS * 4)]
+    text = raw.decode("utf-8", errors="replace").rstrip("\r")
+    if len(text) > WINDOW_MAX_LINE_CHARS or end - start > len(raw):
+        text = f"{text[:WINDOW_MAX_LINE_CHARS]} ... [line cut, {end - start:,} bytes]"
+    return text
+
+
+def _collect(data, pos: int, first_line: int, count: int) -> Tuple[List[str], int]:
+    """Up to count numbered lines from pos, within the output budget. Returns them and where the next line starts."""
+    lines, used = [], 0
+    while len(lines) < count and pos < len(data):
+        end = data.find(b"\n", pos)
+        end = len(data) if end < 0 else end
+        text = f"{first_line + len(lines)}: {_line_text(data, pos, end)}"
+        used += len(text) + 1
+        if used > FILE_READ_MAX_BYTES and lines:
+            break
+        lines.append(text)
+        pos = end + 1
+    return lines, pos
+
+
+def _header(path: str, st: os.stat_result, index: LineIndex, data, lines: List[str], first_line: int) -> str:
+    total = index.line_count(data)
+    shown = f"lines {first_line}-{first_line + len(lines) - 1}" if lines else "no lines"
+    return f"{path} ({st.st_size:,} bytes, {total:,} lines): {shown}"
+
+
+def _footer(next_line: int, data, pos: int) -> str:
+    return f"[more below - next page: start_line={next_line}]" if pos < len(data) else "[end of file]"
+
+
+def _window(path: str, data, st, index: LineIndex, start_line: int, max_lines: int, byte_offset: int) -> str:
+    if byte_offset >= 0:
+        pos = min(byte_offset, len(data))
+        if 0 < pos < len(data) and data[pos - 1:pos] != b"\n":
+            newline = data.find(b"\n", pos)  # Start at the next whole line
+            pos = len(data) if newline < 0 else newline + 1
+        start_line = index.newlines_before(data, pos) + 1
+    else:
+        pos = index.line_offset(data, start_line)
+        if pos is None:
+            return f"{path} ({st.st_size:,} bytes, {index.line_count(data):,} lines): start_line {start_line} is past the end of the file"
+    lines, end = _collect(data, pos, start_line, max_lines)
+    return "\n".join([_header(path, st, index, data, lines, start_line), *lines, _footer(start_line + len(lines), data, end)])
+
+
+def _tail(path: str, data, st, index: LineIndex, max_lines: int) -> str:
+    start, cursor = 0, len(data) - 1 if data[-1:] == b"\n" else len(data)
+    for _ in range(max_lines):
+        newline = data.rfind(b"\n", 0, cursor)
+        if newline < 0:
+            start = 0
+            break
+        start, cursor = newline + 1, newline
+    first_line = index.newlines_before(data, start) + 1
+    lines, _ = _collect(data, start, first_line, max_lines)
+    return "\n".join([_header(path, st, index, data, lines, first_line), *lines, "[end of file]"])
+
+
+def _grep(path: str, data, st, index: LineIndex, regex, start_line: int, max_matches: int) -> str:
+    pos = index.line_offset(data, start_line)
+    matches, used, line, resume = [], 0, start_line, None
+    chunk = index.chunk
+    while pos is not None and pos < len(data) and resume is None:
+        end = min(pos + chunk, len(data))
+        if end < len(data):
+            # Blocks end on a line boundary unless a single line is longer than a chunk
+            newline = data.find(b"\n", end, end + chunk)
+            end = end + chunk if newline < 0 else newline + 1
+        block = data[pos:end]
+        counted, last_start = 0, -1
+        for match in regex.finditer(block):
+            if match.start() == len(block) and block.endswith(b"\n"):
+                break  # An empty match past the last newline is on the next block's line (or past EOF)
+            line_start = block.rfind(b"\n", 0, match.start()) + 1
+            if line_start == last_start:
+                continue  # One entry per line
+            last_start = line_start
+            line += block.count(b"\n", counted, line_start)
+            counted = line_start
+            line_end = block.find(b"\n", line_start)
+            text = f"{line}: {_line_text(block, line_start, len(block) if line_end < 0 else line_end)}"
+            used += len(text) + 1
+            if len(matches) >= max_matches or (used > FILE_READ_MAX_BYTES and matches):
+                resume = line
+                break
+            matches.append(text)
+        if resume is None:
+            line += block.count(b"\n", counted)
+            pos = end
+    header = f"{path} ({st.st_size:,} bytes): {len(matches)} matching lines for /{regex.pattern.decode(errors='replace')}/ from line {start_line}"
+    footer = (f"[more matches below - next page: start_line={resume}]" if resume is not None
+              else "[end of file - no more matches]")
+    return "\n".join([header, *matches, footer])
+
+
+def read_window(
+    path: str,
+    start_line: int = 1,
+    max_lines: int = 100,
+    byte_offset: int = -1,
+    tail: bool = False,
+    pattern: str = "",
+    max_matches: int = 50,
+    ignore_case: bool = False,
+) -> str:
+    """A window of a file (lines from start_line or byte_offset, or the last lines), or the lines matching pattern.
+
+    Raises:
+        OSError: If the file cannot be opened or mapped.
+        re.error: If pattern is not a valid regular expression.
+    """
+    path = os.path.expanduser(path)
+    max_lines = max(1, min(max_lines, WINDOW_MAX_LINES))
+    start_line = max(1, start_line)
+    regex = re.compile(pattern.encode(), re.MULTILINE | (re.IGNORECASE if ignore_case else 0)) if pattern else None
+    with _mapped(path) as (data, st):
+        index = line_index(path, st)
+        if regex is not None:
+            return _grep(path, data, st, index, regex, start_line, max(1, min(max_matches, WINDOW_MAX_LINES)))
+        if tail:
+            return _tail(path, data, st, index, max_lines)
+        return _window(path, data, st, index, start_line, max_lines, byte_offset)
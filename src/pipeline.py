@@ -0,0 +1,250 @@
+"""
+Deterministic recon pipeline.
+
+Runs the fixed OSINT Kill Chain (Scope -> Discovery -> Validation) directly in
+code, without manager-LLM delegation between phases. Only the final reporting
+step goes through a model.
+
+Every stage is checkpointed (see checkpoint.py), so an interrupted run can be
+resumed from its first unfinished stage with resume_recon(run_id).
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from capture import run_dir, set_run_id
+from checkpoint import CHECKPOINT_CHUNK_LINES, DONE, Checkpoint
+from rescan import incremental_probe
+from sharding import count_lines, split_file
+from store import ASSET_STORE
+from telemetry import TELEMETRY
+from tools import asnmap, bbot, httpx
+
+# Order of the stages run before reporting
+PIPELINE_STAGES = ["asn", "enumeration", "probing"]
+
+# Checkpointed by the caller that writes the report (see OsintAgentSystem.run_pipeline)
+REPORT_STAGE = "report"
+
+
+@dataclass
+class StageResult:
+    """Output of one pipeline stage as returned by its tool."""
+    name: str
+    output: str
+    seconds: float
+    ok: bool = True
+
+
+@dataclass
+class PipelineRun:
+    """State of a pipeline run for one target."""
+    target: str
+    run_id: str
+    full_probe: bool = False
+    stages: Dict[str, StageResult] = field(default_factory=dict)
+    checkpoint: Optional[Checkpoint] = field(default=None, repr=False)
+    reused: List[str] = field(default_factory=list)  # Stages taken from an earlier attempt
+
+    def summary(self) -> str:
+        lines = [f"Pipeline run {self.run_id} for {self.target}"]
+        for stage in self.stages.values():
+            status = "ok" if stage.ok else "failed"
+            note = "  (from checkpoint)" if stage.name in self.reused else ""
+            lines.append(f"  {stage.name:<12} {status:<7} {stage.seconds:8.1f}s{note}")
+        return "\n".join(lines)
+
+    @property
+    def saved_report(self) -> Optional[str]:
+        """Report of an earlier attempt, if every stage it was based on was reused."""
+        if not self.checkpoint or not self.checkpoint.is_done(REPORT_STAGE):
+            return None
+        if set(self.reused) != set(PIPELINE_STAGES):
+            return None
+        return self.checkpoint.stages[REPORT_STAGE].output
+
+
+def make_run_id(target: str) -> str:
+    """Filesystem-safe run id, e.g. pipeline-example.com-20250101-120000."""
+    safe_target = re.sub(r"[^A-Za-z0-9._-]", "_", target)
+    return f"pipeline-{safe_target}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+
+# ----- Stages -----
+
+def stage_asn(run: PipelineRun) -> str:
+    return asnmap.entrypoint(run.target, "-json")
+
+
+def stage_enumeration(run: PipelineRun) -> str:
+    # Subdomains seen since then are this run's host list for the probing stage
+    run.checkpoint.stage("enumeration").progress.setdefault("started", time.time())
+    return bbot.entrypoint(run.target)
+
+
+def stage_probing(run: PipelineRun) -> str:
+    enumeration = run.stages.get("enumeration")
+    # A failed enumeration leaves no usable host list; fall back to every known host so that
+    # nothing is reported as removed
+    since = run.checkpoint.stage("enumeration").progress.get("started") if enumeration and enumeration.ok else None
+    # Nothing enumerated - still probe the apex so the report has something to say
+    hosts = ASSET_STORE.iter_column(run.target, "subdomains", since=since) or [run.target]
+    progress = run.checkpoint.stage("probing").progress
+    progress.setdefault("started", time.time())
+    # Only new hosts plus a revalidation sample are probed when the target was scanned before.
+    # The sample is seeded with the run id so a resumed run probes the same hosts.
+    report = incremental_probe(
+        run.target,
+        hosts,
+        probe=lambda path: probe_in_chunks(run, Path(path)),
+        full=run.full_probe,
+        seed=run.run_id,
+        since=progress["started"],
+    )
+    return f"{report.summary()}\n\n{report.probe_output}"
+
+
+def probe_in_chunks(run: PipelineRun, host_file: Path) -> str:
+    """Run httpx over the host file in chunks, checkpointing after each one.
+
+    A resumed run skips the chunks an earlier attempt finished. A failed chunk raises, so the
+    rescan snapshot is not replaced and the next attempt sees the same host list.
+    """
+    stage = run.checkpoint.stage("probing")
+    total = count_lines(host_file)
+    if stage.progress.get("input_lines") != total:
+        # Different input than the saved progress refers to - start the chunks over
+        stage.progress.update(input_lines=total, lines_done=0, chunks={})
+    done: Dict[str, str] = stage.progress["chunks"]
+
+    chunk_count = max(1, -(-total // CHECKPOINT_CHUNK_LINES))
+    if chunk_count == 1:
+        chunks = [host_file]
+    else:
+        chunks = split_file(host_file, chunk_count, run_dir() / "probing-chunks", "chunk")
+
+    outputs = []
+    reused = len(done)
+    for index, chunk in enumerate(chunks, 1):
+        key = str(index)
+        if key not in done:
+            output = httpx.entrypoint(str(chunk), target=run.target)
+            if output.startswith("Error"):
+                raise RuntimeError(f"chunk {index}/{len(chunks)} failed: {output}")
+            done[key] = output
+            stage.progress["lines_done"] = stage.progress.get("lines_done", 0) + count_lines(chunk)
+            run.checkpoint.save()
+        outputs.append(done[key])
+
+    if len(outputs) == 1:
+        return outputs[0]
+    header = f"Probed {total} hosts in {len(chunks)} chunks"
+    if reused:
+        header += f" ({reused} finished by an earlier attempt)"
+    return "\n\n".join([header] + [f"### Chunk {i}\n{output}" for i, output in enumerate(outputs, 1)])
+
+
+STAGE_FUNCTIONS: Dict[str, Callable[[PipelineRun], str]] = {
+    "asn": stage_asn,
+    "enumeration": stage_enumeration,
+    "probing": stage_probing,
+}
+
+
+def _artifacts() -> set:
+    return {str(path.relative_to(run_dir())) for path in run_dir().iterdir()}
+
+
+def run_recon(
+    target: str,
+    run_id: Optional[str] = None,
+    progress: Callable[[str], None] = print,
+    full_probe: bool = False,
+    checkpoint: Optional[Checkpoint] = None,
+) -> PipelineRun:
+    """Run every recon stage for a target in order and collect their outputs.
+
+    Args:
+        target (str): Target domain or organization (e.g., "example.com").
+        run_id (str): Artifact directory name. Generated if not given.
+        progress: Called with a one-line status message per stage.
+        full_probe (bool): Probe every host instead of only what changed since the last scan.
+        checkpoint (Checkpoint): Saved state of an earlier attempt of this run. Stages it completed
+            are reused up to the first one that did not complete; that stage and all later ones run again.
+
+    Returns:
+        PipelineRun: Per-stage outputs and timings.
+    """
+    run_id = run_id or (checkpoint.run_id if checkpoint else make_run_id(target))
+    checkpoint = checkpoint or Checkpoint(run_id=run_id, target=target, full_probe=full_probe)
+    run = PipelineRun(target=target, run_id=run_id, full_probe=full_probe, checkpoint=checkpoint)
+    set_run_id(run.run_id)
+    run_dir().mkdir(parents=True, exist_ok=True)
+    checkpoint.save()
+    progress(f"Run {run.run_id} - resume with: oselot --resume {run.run_id}")
+
+    resuming = True
+    for name in PIPELINE_STAGES:
+        saved = checkpoint.stage(name)
+        if resuming and saved.status == DONE:
+            run.stages[name] = StageResult(name, saved.output, saved.seconds, True)
+            run.reused.append(name)
+            progress(f"↷ {name}: completed in an earlier attempt, skipped")
+            continue
+        if not resuming:
+            # An earlier stage ran again, so progress saved against its old output is stale
+            saved.progress = {}
+        resuming = False
+
+        progress(f"▶ {name}: running for {target}...")
+        checkpoint.start(name, target=target, full_probe=full_probe)
+        before = _artifacts()
+        started = time.monotonic()
+        try:
+            with TELEMETRY.track("stage", name, agent="pipeline") as event:
+                output = STAGE_FUNCTIONS[name](run)
+                event.ok = ok = not output.startswith("Error")
+        except Exception as e:
+            output, ok = f"Error in {name} stage: {e}", False
+        run.stages[name] = StageResult(name, output, time.monotonic() - started, ok)
+        checkpoint.finish(name, output, ok, run.stages[name].seconds, sorted(_artifacts() - before))
+        progress(f"{'✓' if ok else '✗'} {name}: done in {run.stages[name].seconds:.1f}s")
+
+    return run
+
+
+def resume_recon(run_id: str, progress: Callable[[str], None] = print) -> PipelineRun:
+    """Continue an interrupted run from its first unfinished stage.
+
+    Raises:
+        FileNotFoundError: If the run has no checkpoint.
+    """
+    checkpoint = Checkpoint.load(run_id)
+    return run_recon(checkpoint.target, progress=progress, full_probe=checkpoint.full_probe, checkpoint=checkpoint)
+
+
+def record_report(run: PipelineRun, report: str, seconds: float) -> Path:
+    """Checkpoint the final report and save it as report.md in the run's directory."""
+    path = run_dir() / "report.md"
+    path.write_text(report, encoding="utf-8")
+    run.checkpoint.start(REPORT_STAGE, target=run.target)
+    run.checkpoint.finish(REPORT_STAGE, report, bool(report.strip()), seconds, ["report.md"])
+    return path
+
+
+def build_report_task(run: PipelineRun) -> str:
+    """Task handed to the OSINT Reporter once recon is finished."""
+    counts = ASSET_STORE.counts(run.target)
+    sections: List[str] = [
+        f"Write the final OSINT attack surface report for {run.target}.",
+        "Reconnaissance has already been run. Do not run asnmap, bbot or httpx again.",
+        f"Asset store totals for {run.target}: " + ", ".join(f"{n} {k}" for k, n in counts.items()),
+        f"Use query_assets(target=\"{run.target}\", kind=...) to page through asns, cidrs, subdomains and probes.",
+        f"Run artifacts are in {run_dir()}.",
+    ]
+    for stage in run.stages.values():
+        sections.append(f"\n### Stage: {stage.name} ({'ok' if stage.ok else 'failed'})\n{stage.output}")
+    return "\n".join(sections)
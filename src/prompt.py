@@ -14,7 +14,10 @@ Key Guidelines:
 - Pay special attention to `azure_tenant` and `oauth` module outputs for Tenant IDs.
 - Strictly adhere to the target scope.
 - BBOT outputs are stored in `~/.bbot/scans/<scan_name>/`.
-- The most important file is `output.json` (or `.jsonl`) for parsing.
+- The most important file is `output.json` (or `.jsonl`). Read it with bbot_events (filter with
+  event_types, e.g. "OPEN_TCP_PORT,TECHNOLOGY", and page with offset) - never cat_file it whole.
+- Discovered subdomains are filed in the asset store under the target. Report counts and notable hosts;
+  do not paste full subdomain lists - downstream agents read them with query_assets/export_assets.
 """
 
 ASNMAP_AGENT_PROMPT = """
@@ -28,6 +31,11 @@ Your capabilities include:
 - IP Attribution: Determining the ASN and Org owner of a specific IP address
 - ASN Expansion: Hydrating a raw ASN (e.g., AS12345) into its full list of IPv4/IPv6 ranges
 - Scope Definition: Generating the master list of CIDRs for downstream scanning agents
+- Scope Filtering: Using scope_filter to drop out-of-scope lines from bbot/httpx output against the CIDR list, instead of checking IPs by hand. Pass target= so lines without an IP (httpx URLs, DNS names) are checked through their stored resolutions
+
+Batching:
+When you have more than one target (e.g., a list of subsidiaries), use asnmap_bulk with all of them at once
+instead of calling asnmap repeatedly. It returns one summary line per target and a JSONL file with every record.
 
 Fallback Strategy:
 If asnmap returns no results or fails, use TavilyTools to search the web for ASN information.
@@ -60,7 +68,8 @@ Key Guidelines:
 - Sanitize output to ensure the report is safe to render
 - Group related subdomains (e.g., `*.dev.target.com`) to avoid clutter
 - Include generation timestamps
-- BBOT scan data is located in `~/.bbot/scans/<scan_name>/`
+- BBOT scan data is located in `~/.bbot/scans/<scan_name>/`; read its events with bbot_events
+- Use query_assets(target) for asset counts, then query_assets with kind="probes"/"subdomains"/"cidrs" to page through details
 """
 
 OSINT_MANAGER_AGENT_PROMPT = """
@@ -82,6 +91,10 @@ Your workflow follows the "OSINT Kill Chain":
 3. Service Validation: Delegate to "Subdomain Status verification Agent" to check liveness and fingerprint technologies.
 4. Reporting: Delegate to "OSINT Reporter" to finalize the intelligence report.
 
+DATA HANDOFF:
+- Every agent files its results in the shared asset store under the target domain.
+- Pass the target name between agents, not raw lists of subdomains or CIDRs.
+
 FALLBACK STRATEGIES:
 - If asnmap returns no results, instruct ASN Specialist to use TavilyTools to search the web for ASN information.
 - If bbot fails or returns no subdomains, continue to the next phase.
@@ -126,6 +139,8 @@ Output format: `URL [CODE] [TITLE] [TECH]`
 
 Key Guidelines:
 - ALWAYS use the `httpx` tool to probe subdomains. NEVER use the `pipe` or `echo` tools to run httpx commands manually.
+- Get the input list with export_assets(target, "subdomains", file_path) and pass `target` to httpx so results are filed in the asset store.
+- If the target was scanned before, prefer httpx_incremental(target) - it only probes new hosts plus a revalidation sample and reports what was added, removed or changed.
 - BBOT scan results with subdomains can be found in `~/.bbot/scans/<scan_name>/`
 - Prioritize assets with login pages, admin panels, or exposed APIs.
 """
@@ -0,0 +1,150 @@
+"""
+Incremental rescans.
+
+Each target keeps the host list of its previous scan in the asset store.
+A rescan only probes hosts that are new since then plus a random
+revalidation sample of known hosts, and reports what was added, removed or
+changed instead of re-probing the whole list.
+"""
+
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from capture import run_dir
+from settings import env_int
+from store import ASSET_STORE, normalize_host
+
+# Percentage of already-known hosts re-probed on every rescan
+REVALIDATE_PERCENT = env_int("OCELOT_RESCAN_REVALIDATE_PERCENT", 10)
+
+
+@dataclass
+class RescanReport:
+    """Delta between the previous scan of a target and this one."""
+    target: str
+    first_scan: bool
+    new: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    revalidated: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    probe_output: str = ""
+    report_file: Optional[Path] = None
+
+    def summary(self) -> str:
+        if self.first_scan:
+            head = f"First scan of {self.target}: probed all {len(self.new)} hosts."
+        else:
+            head = (
+                f"Rescan of {self.target}: {len(self.new)} new, {len(self.removed)} removed, "
+                f"{len(self.revalidated)} revalidated, {len(self.changed)} changed."
+            )
+        lines = [head]
+        for label, hosts in (("New", self.new), ("Removed", self.removed), ("Changed", self.changed)):
+            if hosts and not (self.first_scan and label == "New"):
+                sample = ", ".join(hosts[:10])
+                more = f" (+{len(hosts) - 10} more)" if len(hosts) > 10 else ""
+                lines.append(f"{label}: {sample}{more}")
+        if self.report_file:
+            lines.append(f"Diff report: {self.report_file}")
+        return "\n".join(lines)
+
+
+def _signatures(states: Dict[str, tuple], since: Optional[float] = None) -> Dict[str, frozenset]:
+    """What each host looked like to httpx: the set of (url, status, title, tech) it answered with."""
+    grouped: Dict[str, set] = {}
+    for url, (host, status, title, tech, last_seen) in states.items():
+        if since is None or last_seen >= since:
+            grouped.setdefault(host, set()).add((url, status, title, tech))
+    return {host: frozenset(entries) for host, entries in grouped.items()}
+
+
+def write_diff_report(report: RescanReport) -> Path:
+    """Write the full delta as markdown into the run artifact directory."""
+    path = run_dir() / f"rescan-{report.target}.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(f"# Rescan diff for {report.target}\n\n")
+        for label, hosts in (
+            ("New hosts", report.new),
+            ("Removed hosts", report.removed),
+            ("Changed hosts", report.changed),
+            ("Revalidated hosts", report.revalidated),
+        ):
+            handle.write(f"## {label} ({len(hosts)})\n\n")
+            handle.writelines(f"- {host}\n" for host in hosts)
+            handle.write("\n")
+    return path
+
+
+def incremental_probe(
+    target: str,
+    hosts: Iterable[str],
+    probe: Callable[[str], str],
+    revalidate_percent: Optional[int] = None,
+    full: bool = False,
+    seed: Optional[str] = None,
+    since: Optional[float] = None,
+) -> RescanReport:
+    """Probe only what changed since the previous scan of a target.
+
+    Args:
+        target (str): Target the hosts belong to.
+        hosts (Iterable[str]): The hosts found by this scan (e.g., this week's bbot results), not every
+            host ever stored for the target - hosts missing from it are reported as removed.
+        probe: Called with the path of a host file; runs httpx and files probes in the asset store.
+        revalidate_percent (int): Percentage of known hosts to re-probe. Default OCELOT_RESCAN_REVALIDATE_PERCENT.
+        full (bool): Probe every host regardless of previous state.
+        seed (str): Seed for the revalidation sample, so a resumed run probes the same hosts.
+        since (float): Start time of the scan when resuming one; probes recorded since then count
+            as this scan's. Changes on hosts probed before the interruption are not detected.
+
+    Returns:
+        RescanReport: New/removed/changed hosts and the probe output.
+
+    Raises:
+        RuntimeError: If the probe failed or timed out. The scan state is left as it was, so the
+            next attempt probes the same new hosts again.
+    """
+    current = {normalize_host(host) for host in hosts if host.strip()}
+    previous = ASSET_STORE.get_snapshot(target)
+    first_scan = not previous
+    percent = REVALIDATE_PERCENT if revalidate_percent is None else revalidate_percent
+
+    new = sorted(current - previous)
+    removed = sorted(previous - current)
+    known = sorted(current & previous)
+    if full or first_scan:
+        revalidated = known
+    else:
+        sample_size = min(len(known), -(-len(known) * max(0, percent) // 100))
+        rng = random.Random(seed) if seed is not None else random
+        revalidated = sorted(rng.sample(known, sample_size))
+
+    report = RescanReport(target, first_scan, new=new, removed=removed, revalidated=revalidated)
+    to_probe = new + revalidated
+    before = ASSET_STORE.probe_states(target, revalidated)
+    started = since or time.time()
+
+    if to_probe:
+        host_file = run_dir() / f"rescan-{target}-hosts.txt"
+        host_file.parent.mkdir(parents=True, exist_ok=True)
+        host_file.write_text("".join(f"{host}\n" for host in to_probe))
+        report.probe_output = probe(str(host_file))
+        if report.probe_output.startswith("Error"):
+            raise RuntimeError(f"probe failed, scan state not updated: {report.probe_output}")
+    else:
+        report.probe_output = "Nothing to probe - no new hosts and no revalidation sample."
+
+    # A revalidated host changed if it now answers differently (or stopped answering)
+    before_signatures = _signatures(before)
+    after_signatures = _signatures(ASSET_STORE.probe_states(target, revalidated), since=started)
+    report.changed = [
+        host for host in revalidated
+        if before_signatures.get(host, frozenset()) != after_signatures.get(host, frozenset())
+    ]
+
+    ASSET_STORE.replace_snapshot(target, current)
+    report.report_file = write_diff_report(report)
+    return report
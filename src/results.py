@@ -0,0 +1,112 @@
+"""
+Result shaping for tool output returned to the model.
+
+Small outputs are returned inline. Anything over the threshold is left in the
+run artifact file written by the capture layer, and the model gets counts,
+a few sample lines and the file path to page through with read_window.
+"""
+
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+from capture import DEFAULT_TAIL_LINES, StreamResult
+from settings import env_int
+from store import parse_httpx_line, strip_ansi
+
+# Outputs longer than this many lines are summarized instead of returned inline
+RESULT_MAX_LINES = env_int("OCELOT_RESULT_MAX_LINES", 100)
+
+# Number of sample lines included in a summary
+RESULT_SAMPLE_LINES = env_int("OCELOT_RESULT_SAMPLE_LINES", 20)
+
+# Number of entries shown per counter (top status codes, technologies, ...)
+RESULT_TOP_N = 10
+
+
+class SampleSink:
+    """Keeps the first n lines as a representative sample."""
+
+    def __init__(self, max_lines: int = RESULT_SAMPLE_LINES):
+        self.max_lines = max_lines
+        self.lines: List[str] = []
+
+    def write(self, line: str):
+        if len(self.lines) < self.max_lines and line.strip():
+            self.lines.append(line)
+
+    def close(self):
+        pass
+
+
+class CounterSink:
+    """Counts keys extracted from each line (e.g., status codes, event types)."""
+
+    def __init__(self, key: Callable[[str], Iterable[str]]):
+        self.key = key
+        self.counts = Counter()
+
+    def write(self, line: str):
+        self.counts.update(self.key(line))
+
+    def close(self):
+        pass
+
+
+# ----- Key extractors -----
+
+def bbot_event_type(line: str) -> List[str]:
+    """[DNS_NAME] www.example.com ... -> ["DNS_NAME"]"""
+    line = strip_ansi(line).lstrip()
+    if line.startswith("[") and "]" in line:
+        event_type = line[1:line.index("]")]
+        if event_type.isupper() and event_type not in ("INFO", "WARN", "ERRR", "VERBOSE", "SUCC", "HUGESUCC"):
+            return [event_type]
+    return []
+
+
+def httpx_status(line: str) -> List[str]:
+    parsed = parse_httpx_line(line)
+    return [str(parsed[2])] if parsed and parsed[2] is not None else []
+
+
+def httpx_tech(line: str) -> List[str]:
+    parsed = parse_httpx_line(line)
+    return [tech.strip() for tech in parsed[4].split(",") if tech.strip()] if parsed else []
+
+
+class ResultShaper:
+    """Collects samples and counters while a tool streams, then renders a compact result."""
+
+    def __init__(self, tool_name: str, counters: Optional[Dict[str, Callable[[str], Iterable[str]]]] = None):
+        self.tool_name = tool_name
+        self.samples = SampleSink()
+        self.counters = {label: CounterSink(key) for label, key in (counters or {}).items()}
+
+    def sinks(self) -> list:
+        return [self.samples] + list(self.counters.values())
+
+    def render(self, result: StreamResult, empty_message: str = "") -> str:
+        """Inline output when it is small, otherwise counts + samples + artifact path."""
+        # Only the capture tail is in memory, so inline output can never exceed it
+        if result.lines <= min(RESULT_MAX_LINES, DEFAULT_TAIL_LINES):
+            return result.tail.strip() or empty_message
+
+        lines = [f"{self.tool_name}: {result.lines} lines ({result.bytes / 1024:.1f} KB) - full output: {result.spill_file}"]
+        for label, counter in self.counters.items():
+            if counter.counts:
+                top = ", ".join(f"{key} {count}" for key, count in counter.counts.most_common(RESULT_TOP_N))
+                lines.append(f"{label}: {top}")
+        lines.append(f"Sample (first {len(self.samples.lines)} lines):")
+        lines.extend(self.samples.lines)
+        lines.append(
+            f"Page through the full output with read_window(file_path=\"{result.spill_file}\", "
+            f"start_line=1) or search it with pattern=\"...\"."
+        )
+        return "\n".join(lines)
+
+
+def bbot_shaper() -> ResultShaper:
+    return ResultShaper("bbot", {"Event types": bbot_event_type})
+
+
+def httpx_shaper() -> ResultShaper:
+    return ResultShaper("httpx", {"Status codes": httpx_status, "Technologies": httpx_tech})
@@ -0,0 +1,196 @@
+"""
+In-process CIDR scope index.
+
+CIDRs are stored per address family as sorted, merged interval arrays of
+integers, so "is this IP in scope" is a single bisect (O(log n)) and
+overlapping or duplicate ranges from asnmap collapse automatically.
+"""
+
+import ipaddress
+import re
+import socket
+import struct
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+# Loose matchers for pulling IPv4/IPv6 addresses and CIDRs out of free text or JSON
+_IPV4_RE = re.compile(r"(?<![\d.])(?:\d{1,3}\.){3}\d{1,3}(?:/\d{1,2})?(?![\d.])")
+_IPV6_RE = re.compile(r"(?<![0-9A-Fa-f:])(?:[0-9A-Fa-f]{0,4}:){2,7}[0-9A-Fa-f]{0,4}(?:/\d{1,3})?(?![0-9A-Fa-f:])")
+
+_unpack_v4 = struct.Struct("!I").unpack
+
+
+def line_ip(line: str) -> Optional[str]:
+    """First valid IP address in a line (IPv4 preferred), or None.
+
+    Candidates are checked with ipaddress, so timestamps like 23:36:04 are not taken for IPv6.
+    """
+    for pattern in (_IPV4_RE, _IPV6_RE):
+        for match in pattern.finditer(line):
+            candidate = match.group(0).split("/")[0]
+            try:
+                ipaddress.ip_address(candidate)
+            except ValueError:
+                continue
+            return candidate
+    return None
+
+
+class ScopeIndex:
+    """Merged IPv4/IPv6 ranges with fast membership lookups."""
+
+    def __init__(self, networks: Iterable[str] = ()):
+        self._pending: List[Tuple[int, int, int]] = []  # (version, start, end)
+        self._starts = {4: [], 6: []}
+        self._ends = {4: [], 6: []}
+        self._dirty = False
+        for network in networks:
+            self.add(network)
+
+    # ----- Building -----
+
+    def add(self, network: str) -> bool:
+        """Add a CIDR or single address. Returns False if it cannot be parsed."""
+        try:
+            net = ipaddress.ip_network(network.strip(), strict=False)
+        except ValueError:
+            return False
+        self._pending.append(
+            (net.version, int(net.network_address), int(net.broadcast_address))
+        )
+        self._dirty = True
+        return True
+
+    def _build(self):
+        """Merge overlapping/adjacent ranges into sorted interval arrays."""
+        for version in (4, 6):
+            intervals = sorted(
+                [(s, e) for v, s, e in self._pending if v == version]
+                + list(zip(self._starts[version], self._ends[version]))
+            )
+            starts: List[int] = []
+            ends: List[int] = []
+            for start, end in intervals:
+                if ends and start <= ends[-1] + 1:
+                    if end > ends[-1]:
+                        ends[-1] = end
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._starts[version] = starts
+            self._ends[version] = ends
+        self._pending = []
+        self._dirty = False
+
+    @classmethod
+    def from_text(cls, text: str) -> "ScopeIndex":
+        """Build an index from any text containing CIDRs/IPs (asnmap output, JSONL, notes)."""
+        index = cls()
+        for match in _IPV4_RE.findall(text):
+            index.add(match)
+        for match in _IPV6_RE.findall(text):
+            index.add(match)
+        return index
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "ScopeIndex":
+        """Build an index from a file of CIDRs, asnmap output or asnmap_bulk JSONL."""
+        index = cls()
+        with open(Path(path).expanduser(), encoding="utf-8", errors="replace") as handle:
+            for line in handle:
+                for match in _IPV4_RE.findall(line):
+                    index.add(match)
+                for match in _IPV6_RE.findall(line):
+                    index.add(match)
+        return index
+
+    # ----- Lookups -----
+
+    @staticmethod
+    def _to_int(ip: str) -> Optional[Tuple[int, int]]:
+        """Parse an address into (version, integer) without building ip_address objects."""
+        try:
+            return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+        except OSError:
+            pass
+        try:
+            return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), "big")
+        except OSError:
+            return None
+
+    def contains(self, ip: str) -> bool:
+        """Return True if the address falls inside any range in scope."""
+        if self._dirty:
+            self._build()
+        parsed = self._to_int(ip.strip())
+        if parsed is None:
+            return False
+        version, value = parsed
+        starts = self._starts[version]
+        position = bisect_right(starts, value) - 1
+        return position >= 0 and value <= self._ends[version][position]
+
+    def contains_many(self, ips: Iterable[str]) -> Iterator[bool]:
+        """Membership for a stream of addresses - the hot path for bulk filtering.
+
+        Lookups and parsers are bound to locals once, which keeps the per-address
+        cost to one inet_pton and one bisect.
+        """
+        if self._dirty:
+            self._build()
+        starts4, ends4 = self._starts[4], self._ends[4]
+        starts6, ends6 = self._starts[6], self._ends[6]
+        inet_pton, af4, af6 = socket.inet_pton, socket.AF_INET, socket.AF_INET6
+        unpack_v4, from_bytes, bisect = _unpack_v4, int.from_bytes, bisect_right
+        for ip in ips:
+            try:
+                value = unpack_v4(inet_pton(af4, ip))[0]
+                starts, ends = starts4, ends4
+            except OSError:
+                try:
+                    value = from_bytes(inet_pton(af6, ip), "big")
+                    starts, ends = starts6, ends6
+                except OSError:
+                    yield False
+                    continue
+            position = bisect(starts, value) - 1
+            yield position >= 0 and value <= ends[position]
+
+    def __contains__(self, ip: str) -> bool:
+        return self.contains(ip)
+
+    def __len__(self) -> int:
+        if self._dirty:
+            self._build()
+        return len(self._starts[4]) + len(self._starts[6])
+
+    def total_addresses(self) -> int:
+        """Number of unique addresses covered by the index."""
+        if self._dirty:
+            self._build()
+        return sum(
+            end - start + 1
+            for version in (4, 6)
+            for start, end in zip(self._starts[version], self._ends[version])
+        )
+
+    def cidrs(self) -> Iterator[str]:
+        """Yield the minimal list of CIDRs covering the merged ranges."""
+        if self._dirty:
+            self._build()
+        for version, factory in ((4, ipaddress.IPv4Address), (6, ipaddress.IPv6Address)):
+            for start, end in zip(self._starts[version], self._ends[version]):
+                for net in ipaddress.summarize_address_range(factory(start), factory(end)):
+                    yield str(net)
+
+    def line_in_scope(self, line: str) -> bool:
+        """Return True if the first IP address found in a line is in scope."""
+        ip = line_ip(line)
+        return ip is not None and self.contains(ip)
+
+    def filter_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield lines whose first IP address is in scope (e.g., bbot or httpx output)."""
+        for line in lines:
+            if self.line_in_scope(line):
+                yield line
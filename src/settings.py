@@ -0,0 +1,50 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Shared on-disk location for databases, caches and run artifacts
+OCELOT_DIR = Path.home() / ".ocelot"
+OCELOT_DIR.mkdir(exist_ok=True)
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment, falling back to default."""
+    value = os.getenv(name, "").strip()
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+# Maximum number of recon processes the async engine runs at once
+MAX_CONCURRENT_TOOLS = env_int("OCELOT_MAX_CONCURRENCY", 4)
+
+# httpx binary; the snap install path by default (the Python httpx package shadows "httpx" on PATH)
+HTTPX_BIN = os.getenv("OCELOT_HTTPX_BIN", "").strip() or "/snap/bin/httpx"
+
+# Per-tool timeouts in seconds; a timed-out tool is stopped and its partial output kept
+ASNMAP_TIMEOUT = env_int("OCELOT_ASNMAP_TIMEOUT", 200)
+BBOT_TIMEOUT = env_int("OCELOT_BBOT_TIMEOUT", 600)
+HTTPX_TIMEOUT = env_int("OCELOT_HTTPX_TIMEOUT", 300)
+COMMAND_TIMEOUT = env_int("OCELOT_COMMAND_TIMEOUT", 300)
+
+# Seconds a timed-out tool's process group gets to exit after SIGTERM before it is sent SIGKILL
+KILL_GRACE_SECONDS = env_int("OCELOT_KILL_GRACE_SECONDS", 5)
+
+# Ask providers to cache the static system prompt and tool prefix of every request; 0 turns it off
+PROMPT_CACHE = env_int("OCELOT_PROMPT_CACHE", 1) != 0
+
+# Agent roles that can run on their own model, e.g. OCELOT_MODEL_ASN=gpt-5-mini; unset roles use the main model
+MODEL_ROLES = ("manager", "asn", "bbot", "httpx", "reporter")
+
+
+def role_models_from_env() -> dict:
+    """Per-role model ids set through OCELOT_MODEL_<ROLE>."""
+    models = {}
+    for role in MODEL_ROLES:
+        model_id = os.getenv(f"OCELOT_MODEL_{role.upper()}", "").strip()
+        if model_id:
+            models[role] = model_id
+    return models
@@ -0,0 +1,206 @@
+"""
+Sharded probing helpers.
+
+A single httpx process becomes the bottleneck on large subdomain lists. These
+helpers split the input into N contiguous chunks, and once the per-shard
+workers finish, merge their outputs back into one de-duplicated result in the
+original input order. The merge streams: each shard's output is tagged with
+input positions and sorted in bounded runs on disk, then the runs are k-way
+merged into the sinks.
+"""
+
+import heapq
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from capture import DEFAULT_TAIL_LINES, FileSink, LineCounter, StreamResult, TailBuffer
+from settings import env_int
+from store import parse_httpx_line
+
+# Number of probe workers; defaults to the CPU count
+HTTPX_SHARDS = env_int("OCELOT_HTTPX_SHARDS", os.cpu_count() or 1)
+
+# Inputs smaller than this many lines per shard are not worth splitting
+MIN_LINES_PER_SHARD = env_int("OCELOT_HTTPX_MIN_SHARD_LINES", 500)
+
+# Output lines sorted in memory at a time while merging; longer outputs are merged from runs on disk
+MERGE_RUN_LINES = env_int("OCELOT_HTTPX_MERGE_RUN_LINES", 50000)
+
+
+@dataclass
+class ShardTiming:
+    """How long one shard took and what it produced."""
+    index: int
+    inputs: int
+    results: int
+    seconds: float
+    returncode: int
+    timed_out: bool = False
+    started: float = 0.0  # Seconds after the first shard started that this one's process started
+
+
+def count_lines(path: Path) -> int:
+    with open(path, "rb") as handle:
+        return sum(1 for line in handle if line.strip())
+
+
+def resolve_shard_count(requested: int, line_count: int) -> int:
+    """Pick the number of shards: requested if > 0, otherwise from config, capped by input size."""
+    if requested > 0:
+        return max(1, min(requested, line_count))
+    return max(1, min(HTTPX_SHARDS, line_count // MIN_LINES_PER_SHARD))
+
+
+def split_file(path: Path, shards: int, out_dir: Path, prefix: str = "shard") -> List[Path]:
+    """Split a file into contiguous chunks of non-empty lines, one file per shard."""
+    total = count_lines(path)
+    per_shard = -(-total // shards)  # ceil
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shard_files = []
+    handle = None
+    written = 0
+    with open(path, encoding="utf-8", errors="replace") as source:
+        for line in source:
+            if not line.strip():
+                continue
+            if handle is None or written >= per_shard:
+                if handle:
+                    handle.close()
+                shard_files.append(out_dir / f"{prefix}-{len(shard_files) + 1:02d}.txt")
+                handle = open(shard_files[-1], "w", encoding="utf-8")
+                written = 0
+            handle.write(line if line.endswith("\n") else line + "\n")
+            written += 1
+    if handle:
+        handle.close()
+    return shard_files
+
+
+def _input_host(line: str) -> str:
+    return line.strip().lower().split("://", 1)[-1].split("/", 1)[0].split(":", 1)[0]
+
+
+def _sorted_runs(shard_input: Path, output: Path, offset: int) -> Tuple[List[Path], int]:
+    """Tag one shard's output lines with the input position of their host and write them as sorted runs.
+
+    Returns:
+        (run files, position after the shard's last input line)
+    """
+    order: Dict[str, int] = {}
+    end = offset
+    with open(shard_input, encoding="utf-8", errors="replace") as source:
+        for end, line in enumerate(source, offset + 1):
+            host = _input_host(line)
+            if host:
+                order.setdefault(host, end - 1)
+
+    runs: List[Path] = []
+    batch: List[Tuple[int, str, str]] = []
+
+    def flush():
+        batch.sort()
+        runs.append(output.with_name(f"{output.stem}.run{len(runs):03d}"))
+        with open(runs[-1], "w", encoding="utf-8") as handle:
+            # Zero-padded positions keep the runs' text order equal to input order for heapq.merge
+            handle.writelines(f"{position:012d}\t{key}\t{line}\n" for position, key, line in batch)
+        batch.clear()
+
+    if output.exists():
+        with open(output, encoding="utf-8", errors="replace") as handle:
+            for line in handle:
+                line = line.rstrip("\n")
+                if not line.strip():
+                    continue
+                parsed = parse_httpx_line(line)
+                # Lines that are not results sort after the shard's results
+                position = order.get(parsed[1], end) if parsed else end
+                batch.append((position, parsed[0] if parsed else "", line))
+                if len(batch) >= MERGE_RUN_LINES:
+                    flush()
+    if batch:
+        flush()
+    return runs, end + 1
+
+
+def merge_outputs(
+    shard_inputs: List[Path],
+    shard_outputs: List[Path],
+    sinks: Optional[List] = None,
+    spill_to: Optional[Path] = None,
+    tail_lines: int = DEFAULT_TAIL_LINES,
+) -> StreamResult:
+    """Merge shard outputs into one de-duplicated stream ordered like the input file.
+
+    shard_inputs are the contiguous chunks split_file wrote, in order, and shard_outputs
+    the matching outputs. Memory stays bounded by one shard's host positions plus
+    MERGE_RUN_LINES lines. A URL is reported once per shard; a host listed in two shards'
+    inputs is probed, and reported, by both.
+
+    The merged lines are fed through the same sinks a single httpx run would use,
+    so shaping and asset-store writes work unchanged.
+    """
+    runs: List[Path] = []
+    offset = 0
+    for shard_input, output in zip(shard_inputs, shard_outputs):
+        shard_runs, offset = _sorted_runs(shard_input, output, offset)
+        runs.extend(shard_runs)
+
+    tail = TailBuffer(tail_lines)
+    counter = LineCounter()
+    all_sinks = [tail, counter] + list(sinks or [])
+    file_sink = FileSink(spill_to) if spill_to else None
+    if file_sink:
+        all_sinks.append(file_sink)
+    handles = [open(run, encoding="utf-8") for run in runs]
+    try:
+        position, seen = None, set()
+        for record in heapq.merge(*handles):
+            line_position, key, line = record.rstrip("\n").split("\t", 2)
+            if line_position != position:
+                position, seen = line_position, set()
+            key = key or line
+            if key in seen:
+                continue
+            seen.add(key)
+            for sink in all_sinks:
+                sink.write(line)
+    finally:
+        for handle in handles:
+            handle.close()
+        for run in runs:
+            run.unlink(missing_ok=True)
+        for sink in all_sinks:
+            sink.close()
+
+    return StreamResult(
+        returncode=0,
+        tail=tail.text(),
+        stderr="",
+        lines=counter.lines,
+        bytes=counter.bytes,
+        spill_file=file_sink.path if file_sink else None,
+    )
+
+
+def _peak_overlap(timings: List[ShardTiming]) -> int:
+    """Most shards whose processes were running at the same time."""
+    events = sorted([(t.started, 1) for t in timings] + [(t.started + t.seconds, -1) for t in timings],
+                    key=lambda event: (event[0], event[1]))
+    running = peak = 0
+    for _, step in events:
+        running += step
+        peak = max(peak, running)
+    return peak
+
+
+def format_timings(timings: List[ShardTiming]) -> str:
+    """One line per shard: inputs, results and wall time."""
+    lines = [f"[sharded httpx: {len(timings)} workers, at most {_peak_overlap(timings)} running at once]"]
+    for timing in timings:
+        status = "timed out" if timing.timed_out else f"exit {timing.returncode}"
+        lines.append(
+            f"  shard {timing.index:02d}: {timing.inputs} hosts -> {timing.results} results "
+            f"in {timing.seconds:.1f}s, started at +{timing.started:.1f}s ({status})"
+        )
+    return "\n".join(lines)
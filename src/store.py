@@ -0,0 +1,349 @@
+"""
+Structured asset store shared by the agents.
+
+Recon tools bulk-upsert what they find (ASNs, CIDRs, subdomains, resolved IPs,
+httpx probes) into an indexed SQLite database and hand the model back short
+handles and counts. Agents then query or export exactly the slice they need
+instead of passing 50k-line lists through the model context.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from settings import OCELOT_DIR
+
+# kind -> (table, column listing used for queries/exports, natural ordering)
+ASSET_KINDS = {
+    "asns": ("asns", "asn, name, country", "asn"),
+    "cidrs": ("cidrs", "cidr, asn", "cidr"),
+    "subdomains": ("subdomains", "host, source", "host"),
+    "ips": ("ips", "host, ip", "host, ip"),
+    "probes": ("probes", "url, status_code, title, tech", "url"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS asns (
+    target TEXT NOT NULL, asn TEXT NOT NULL, name TEXT, country TEXT,
+    first_seen REAL NOT NULL, last_seen REAL NOT NULL,
+    PRIMARY KEY (target, asn)
+);
+CREATE TABLE IF NOT EXISTS cidrs (
+    target TEXT NOT NULL, cidr TEXT NOT NULL, asn TEXT,
+    first_seen REAL NOT NULL, last_seen REAL NOT NULL,
+    PRIMARY KEY (target, cidr)
+);
+CREATE TABLE IF NOT EXISTS subdomains (
+    target TEXT NOT NULL, host TEXT NOT NULL, source TEXT,
+    first_seen REAL NOT NULL, last_seen REAL NOT NULL,
+    PRIMARY KEY (target, host)
+);
+CREATE TABLE IF NOT EXISTS ips (
+    target TEXT NOT NULL, host TEXT NOT NULL, ip TEXT NOT NULL,
+    first_seen REAL NOT NULL, last_seen REAL NOT NULL,
+    PRIMARY KEY (target, host, ip)
+);
+CREATE TABLE IF NOT EXISTS probes (
+    target TEXT NOT NULL, url TEXT NOT NULL, host TEXT NOT NULL,
+    status_code INTEGER, title TEXT, tech TEXT,
+    first_seen REAL NOT NULL, last_seen REAL NOT NULL,
+    PRIMARY KEY (target, url)
+);
+CREATE TABLE IF NOT EXISTS host_snapshots (
+    target TEXT NOT NULL, host TEXT NOT NULL, scanned_at REAL NOT NULL,
+    PRIMARY KEY (target, host)
+);
+CREATE INDEX IF NOT EXISTS idx_subdomains_host ON subdomains(host);
+CREATE INDEX IF NOT EXISTS idx_ips_ip ON ips(ip);
+CREATE INDEX IF NOT EXISTS idx_cidrs_asn ON cidrs(asn);
+CREATE INDEX IF NOT EXISTS idx_probes_host ON probes(host);
+CREATE INDEX IF NOT EXISTS idx_probes_status ON probes(target, status_code);
+"""
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+_BRACKET_RE = re.compile(r"\[([^\]]*)\]")
+
+
+def strip_ansi(line: str) -> str:
+    """Remove terminal color codes that some tools emit even when piped."""
+    return _ANSI_RE.sub("", line)
+
+
+def normalize_host(host: str) -> str:
+    """Lower-case a hostname and drop any trailing dot."""
+    return host.strip().lower().rstrip(".")
+
+
+def parse_httpx_line(line: str) -> Optional[Tuple[str, str, Optional[int], str, str]]:
+    """Parse one line of httpx text output.
+
+    Lines look like: https://a.example.com [200] [Title] [Nginx,PHP]
+
+    Returns:
+        (url, host, status_code, title, tech) or None if the line is not a result.
+    """
+    line = _ANSI_RE.sub("", line).strip()
+    if not line or line.startswith("["):
+        return None
+    url, _, rest = line.partition(" ")
+    host = normalize_host(url.split("://", 1)[-1].split("/", 1)[0].split(":", 1)[0])
+    if not host:
+        return None
+    fields = _BRACKET_RE.findall(rest)
+    status_code = None
+    if fields and fields[0].replace(",", "").isdigit():
+        status_code = int(fields.pop(0).split(",")[-1])
+    title = fields.pop(0) if fields else ""
+    tech = fields.pop(0) if fields else ""
+    return url, host, status_code, title, tech
+
+
+def parse_bbot_line(line: str) -> Optional[str]:
+    """Pull the hostname out of a bbot DNS_NAME stdout line, or None for other events.
+
+    Lines look like: [DNS_NAME]  www.example.com  sslcert  (a-record, in-scope)
+    """
+    line = _ANSI_RE.sub("", line).strip()
+    if not line.startswith("[DNS_NAME]"):
+        return None
+    parts = line.split()
+    return normalize_host(parts[1]) if len(parts) > 1 else None
+
+
+def line_host(line: str) -> Optional[str]:
+    """Hostname a bbot DNS_NAME line or an httpx result line is about, or None."""
+    host = parse_bbot_line(line)
+    if host is None:
+        parsed = parse_httpx_line(line)
+        host = parsed[1] if parsed else None
+    return host if host and "." in host else None
+
+
+class AssetStore:
+    """Indexed SQLite store for recon assets with bulk, de-duplicating upserts."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def _upsert(self, table: str, columns: List[str], key: List[str], rows: Iterable[tuple]) -> Tuple[int, int]:
+        """Insert rows, refreshing last_seen (and non-key columns) on conflict.
+
+        Returns:
+            (new_rows, rows_written)
+        """
+        now = time.time()
+        rows = [tuple(row) + (now, now) for row in rows]
+        if not rows:
+            return 0, 0
+        all_columns = columns + ["first_seen", "last_seen"]
+        updates = [f"{c} = excluded.{c}" for c in columns if c not in key] + ["last_seen = excluded.last_seen"]
+        insert = (
+            f"INSERT INTO {table} ({', '.join(all_columns)}) "
+            f"VALUES ({', '.join('?' for _ in all_columns)}) "
+            f"ON CONFLICT ({', '.join(key)}) "
+        )
+        with self._lock:
+            # The insert-only pass counts new rows without scanning the table; the second refreshes the rest
+            new = self._conn.executemany(insert + "DO NOTHING", rows).rowcount
+            if new < len(rows):
+                self._conn.executemany(insert + f"DO UPDATE SET {', '.join(updates)}", rows)
+            self._conn.commit()
+        return new, len(rows)
+
+    # ----- Writers -----
+
+    def upsert_asns(self, target: str, records: Iterable[Tuple[str, str, str]]) -> Tuple[int, int]:
+        """Store (asn, name, country) records for a target."""
+        target = normalize_host(target)
+        return self._upsert("asns", ["target", "asn", "name", "country"], ["target", "asn"],
+                            ((target, asn, name, country) for asn, name, country in records))
+
+    def upsert_cidrs(self, target: str, records: Iterable[Tuple[str, str]]) -> Tuple[int, int]:
+        """Store (cidr, asn) records for a target."""
+        target = normalize_host(target)
+        return self._upsert("cidrs", ["target", "cidr", "asn"], ["target", "cidr"],
+                            ((target, cidr, asn) for cidr, asn in records))
+
+    def upsert_subdomains(self, target: str, hosts: Iterable[str], source: str = "") -> Tuple[int, int]:
+        """Store discovered hostnames for a target."""
+        target = normalize_host(target)
+        unique = {normalize_host(host) for host in hosts if host.strip()}
+        return self._upsert("subdomains", ["target", "host", "source"], ["target", "host"],
+                            ((target, host, source) for host in sorted(unique)))
+
+    def upsert_ips(self, target: str, pairs: Iterable[Tuple[str, str]]) -> Tuple[int, int]:
+        """Store (host, ip) resolutions for a target."""
+        target = normalize_host(target)
+        return self._upsert("ips", ["target", "host", "ip"], ["target", "host", "ip"],
+                            ((target, normalize_host(host), ip) for host, ip in set(pairs)))
+
+    def upsert_probes(self, target: str, probes: Iterable[Tuple[str, str, Optional[int], str, str]]) -> Tuple[int, int]:
+        """Store parsed httpx results (url, host, status_code, title, tech) for a target."""
+        target = normalize_host(target)
+        return self._upsert("probes", ["target", "url", "host", "status_code", "title", "tech"],
+                            ["target", "url"], ((target,) + tuple(probe) for probe in probes))
+
+    # ----- Readers -----
+
+    def counts(self, target: str) -> Dict[str, int]:
+        """Number of stored assets of each kind for a target."""
+        target = normalize_host(target)
+        with self._lock:
+            return {
+                kind: self._conn.execute(f"SELECT COUNT(*) FROM {table} WHERE target = ?", (target,)).fetchone()[0]
+                for kind, (table, _, _) in ASSET_KINDS.items()
+            }
+
+    def query(self, target: str, kind: str, contains: str = "", limit: int = 50, offset: int = 0) -> List[tuple]:
+        """Fetch a page of assets of one kind, optionally filtered by substring."""
+        target = normalize_host(target)
+        if kind not in ASSET_KINDS:
+            raise ValueError(f"Unknown asset kind '{kind}'. Use one of: {', '.join(ASSET_KINDS)}")
+        table, columns, order = ASSET_KINDS[kind]
+        first_column = columns.split(",")[0]
+        sql = f"SELECT {columns} FROM {table} WHERE target = ?"
+        params: list = [target]
+        if contains:
+            sql += f" AND {first_column} LIKE ?"
+            params.append(f"%{contains}%")
+        sql += f" ORDER BY {order} LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def iter_column(self, target: str, kind: str, since: Optional[float] = None) -> List[str]:
+        """All values of the main column (host, url, cidr, ...) for a target, in order.
+
+        With since, only values seen at or after that time (e.g., by the current scan).
+        """
+        target = normalize_host(target)
+        table, columns, order = ASSET_KINDS[kind]
+        first_column = columns.split(",")[0]
+        sql = f"SELECT DISTINCT {first_column} FROM {table} WHERE target = ?"
+        params: list = [target]
+        if since is not None:
+            sql += " AND last_seen >= ?"
+            params.append(since)
+        with self._lock:
+            rows = self._conn.execute(f"{sql} ORDER BY {first_column}", params).fetchall()
+        return [row[0] for row in rows]
+
+    def resolutions(self, target: str) -> Dict[str, List[str]]:
+        """Every stored host -> resolved IPs mapping for a target."""
+        target = normalize_host(target)
+        resolved: Dict[str, List[str]] = {}
+        with self._lock:
+            for host, ip in self._conn.execute("SELECT host, ip FROM ips WHERE target = ?", (target,)):
+                resolved.setdefault(host, []).append(ip)
+        return resolved
+
+    def export(self, target: str, kind: str, file_path: Path) -> int:
+        """Write the main column of an asset kind to a file, one per line."""
+        target = normalize_host(target)
+        values = self.iter_column(target, kind)
+        file_path = Path(file_path).expanduser()
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as handle:
+            for value in values:
+                handle.write(f"{value}\n")
+        return len(values)
+
+    def targets(self) -> List[str]:
+        """Every target that has at least one subdomain, CIDR or probe on record."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT target FROM subdomains UNION SELECT target FROM cidrs "
+                "UNION SELECT target FROM probes ORDER BY target"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    # ----- Rescan state -----
+
+    def get_snapshot(self, target: str) -> set:
+        """Hosts recorded by the previous incremental scan of a target."""
+        target = normalize_host(target)
+        with self._lock:
+            rows = self._conn.execute("SELECT host FROM host_snapshots WHERE target = ?", (target,)).fetchall()
+        return {row[0] for row in rows}
+
+    def snapshot_time(self, target: str) -> Optional[float]:
+        """When the previous incremental scan of a target recorded its hosts, or None if never."""
+        target = normalize_host(target)
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(scanned_at) FROM host_snapshots WHERE target = ?", (target,)).fetchone()
+        return row[0]
+
+    def replace_snapshot(self, target: str, hosts: Iterable[str]):
+        """Make hosts the scan state that the next incremental scan compares against."""
+        target = normalize_host(target)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM host_snapshots WHERE target = ?", (target,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO host_snapshots (target, host, scanned_at) VALUES (?, ?, ?)",
+                ((target, normalize_host(host), now) for host in hosts),
+            )
+            self._conn.commit()
+
+    def probe_states(self, target: str, hosts: Iterable[str]) -> Dict[str, Tuple[str, Optional[int], str, str, float]]:
+        """Current probe rows for the given hosts: url -> (host, status_code, title, tech, last_seen)."""
+        target = normalize_host(target)
+        hosts = list(hosts)
+        states = {}
+        with self._lock:
+            for start in range(0, len(hosts), 500):
+                chunk = hosts[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT url, host, status_code, title, tech, last_seen FROM probes "
+                    f"WHERE target = ? AND host IN ({', '.join('?' for _ in chunk)})",
+                    [target] + chunk,
+                ).fetchall()
+                states.update({row[0]: tuple(row[1:]) for row in rows})
+        return states
+
+
+class AssetSink:
+    """Capture sink that parses streamed lines and batches them into the asset store.
+
+    Args:
+        parser: Turns a line into a row for the writer, or None to skip it.
+        writer: Called with a list of rows, returns (new_rows, rows_written)
+            - e.g. lambda rows: store.upsert_subdomains(target, rows, "bbot").
+    """
+
+    def __init__(self, parser: Callable[[str], object], writer: Callable[[list], Tuple[int, int]], batch_size: int = 1000):
+        self.parser = parser
+        self.writer = writer
+        self.batch_size = batch_size
+        self.batch = []
+        self.new = 0
+        self.seen = 0
+
+    def write(self, line: str):
+        parsed = self.parser(line)
+        if parsed is None:
+            return
+        self.batch.append(parsed)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            new, written = self.writer(self.batch)
+            self.new += new
+            self.seen += written
+            self.batch = []
+
+    def close(self):
+        self.flush()
+
+
+ASSET_STORE = AssetStore(OCELOT_DIR / "assets.db")
@@ -0,0 +1,438 @@
+"""
+Run telemetry.
+
+Records one event per tool call, member-agent delegation and LLM turn: wall
+time, exit code, stdout/stderr bytes, lines produced and token counts. Tool
+and delegation events come from agno tool hooks. LLM turns come from a post-run
+hook that reads per-message metrics. Process-level numbers (exit code, bytes,
+lines) are attached by the capture layer to whichever tool event is active in
+the current context.
+
+Events are kept in memory for /stats and can be exported as JSONL or as a
+Prometheus textfile.
+
+LLM input tokens are recorded as the whole prompt, of which `cached_tokens`
+were served from the provider's prompt cache. Anthropic reports cache reads
+and writes outside input_tokens, so they are added back for it. Each LLM
+turn also carries a short hash of its system prompt. An agent whose prompt
+differs from its previous run has something dynamic in the prefix that
+providers cache (memories, timestamps), and the run report says so.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# Append every event to this JSONL file as it is recorded (unset = in memory only)
+TELEMETRY_FILE = os.getenv("OCELOT_TELEMETRY_FILE", "").strip()
+
+# Rewrite this Prometheus textfile after every assessment/pipeline run (unset = off)
+PROMETHEUS_TEXTFILE = os.getenv("OCELOT_PROMETHEUS_TEXTFILE", "").strip()
+
+
+@dataclass
+class TelemetryEvent:
+    """One timed unit of work."""
+    kind: str  # "tool", "delegation", "llm" or "stage"
+    name: str
+    agent: str = ""
+    run_id: str = ""
+    started: float = 0.0
+    seconds: float = 0.0
+    ok: bool = True
+    exit_code: Optional[int] = None
+    processes: int = 0
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+    lines: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0  # Input tokens read from the provider's prompt cache
+    cache_write_tokens: int = 0  # Input tokens written to the prompt cache (Anthropic)
+    model: str = ""
+    prompt_hash: str = ""  # Short hash of the system prompt sent on this LLM turn
+    prompt_changed: bool = False  # The agent's system prompt differs from its previous run
+
+
+# Tool event the current call stack belongs to; the capture layer adds process stats to it
+_current: ContextVar[Optional[TelemetryEvent]] = ContextVar("ocelot_telemetry_event", default=None)
+
+
+def note_process(returncode: Optional[int], stdout_bytes: int, stderr_bytes: int, lines: int):
+    """Attach one finished subprocess to the active tool event, if any."""
+    event = _current.get()
+    if event is None:
+        return
+    event.processes += 1
+    # Keep the first failure so a later successful shard does not hide it
+    if event.exit_code in (None, 0):
+        event.exit_code = returncode
+    event.stdout_bytes += stdout_bytes
+    event.stderr_bytes += stderr_bytes
+    event.lines += lines
+
+
+# Tools whose entrypoint is a plain function (filled in by the agent). On the async path agno
+# calls these inline on the event loop, so the async hooks below move them to a worker thread.
+SYNC_TOOLS = set()
+
+# Set on the worker thread so a nested async hook does not offload the same call again
+_off_loop: ContextVar[bool] = ContextVar("ocelot_off_loop", default=False)
+
+
+async def call_tool_async(function_name: str, function_call, arguments: Dict):
+    """Call the next step of an async agno hook chain, keeping sync tools off the event loop."""
+    if function_name not in SYNC_TOOLS or _off_loop.get():
+        result = function_call(**arguments)
+        return await result if inspect.isawaitable(result) else result
+
+    def run():
+        _off_loop.set(True)
+        # The rest of the chain is async (agno wraps every step), but nothing in it waits on the caller's loop
+        result = function_call(**arguments)
+        return asyncio.run(result) if inspect.iscoroutine(result) else result
+
+    # to_thread copies the context, so the active tool event still gets the process stats
+    return await asyncio.to_thread(run)
+
+
+# Providers whose input_tokens leave out cache reads and writes
+_CACHE_EXCLUSIVE_PROVIDERS = {"Anthropic"}
+
+
+def _prompt_hash(messages) -> str:
+    system = next((m for m in messages if m.role == "system"), None)
+    if system is None:
+        return ""
+    return hashlib.sha1(str(system.content or "").encode()).hexdigest()[:10]
+
+
+def _current_run_id() -> str:
+    from capture import get_run_id
+    return get_run_id()
+
+
+def _caller_name(agent=None, team=None) -> str:
+    owner = agent or team
+    return getattr(owner, "name", "") or ""
+
+
+def _event_name(function_name: str, arguments: Dict) -> tuple:
+    """(kind, name) - team delegations are named after the member they go to."""
+    if function_name.startswith("delegate_task_to_member"):
+        member = arguments.get("member_id") or arguments.get("member_name") or "all members"
+        return "delegation", str(member)
+    return "tool", function_name
+
+
+class Telemetry:
+    """Collects telemetry events for the session and exports them."""
+
+    def __init__(self, jsonl_path: str = TELEMETRY_FILE):
+        self.jsonl_path = Path(jsonl_path).expanduser() if jsonl_path else None
+        self.events: List[TelemetryEvent] = []
+        self._lock = threading.Lock()
+        self._last_prompt: Dict[str, str] = {}  # agent -> system prompt hash of its latest run
+
+    def record(self, event: TelemetryEvent):
+        with self._lock:
+            self.events.append(event)
+            if self.jsonl_path:
+                self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.jsonl_path, "a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(asdict(event)) + "\n")
+
+    def clear(self):
+        with self._lock:
+            self.events = []
+
+    @contextmanager
+    def track(self, kind: str, name: str, agent: str = ""):
+        """Time a block of work that is not an agno tool call (e.g., a pipeline stage).
+
+        Subprocesses run inside the block are attached to the event.
+        """
+        event = TelemetryEvent(kind, name, agent, _current_run_id(), time.time())
+        token = _current.set(event)
+        started = time.monotonic()
+        try:
+            yield event
+        except BaseException:
+            event.ok = False
+            raise
+        finally:
+            _current.reset(token)
+            event.seconds = time.monotonic() - started
+            if event.exit_code not in (None, 0):
+                event.ok = False
+            self.record(event)
+
+    # ----- agno hooks -----
+
+    def _start(self, function_name: str, arguments: Dict, agent=None, team=None) -> TelemetryEvent:
+        kind, name = _event_name(function_name, arguments or {})
+        return TelemetryEvent(kind, name, _caller_name(agent, team), _current_run_id(), time.time())
+
+    def _finish(self, event: TelemetryEvent, started: float, result=None, error: Optional[BaseException] = None):
+        event.seconds = time.monotonic() - started
+        text = result if isinstance(result, str) else getattr(result, "content", None)
+        if error is not None or (isinstance(text, str) and text.startswith("Error")):
+            event.ok = False
+        # Tools that do not go through the capture layer are measured by what they returned
+        if not event.processes and isinstance(text, str):
+            event.stdout_bytes = len(text.encode("utf-8", errors="replace"))
+            event.lines = text.count("\n") + 1 if text else 0
+        if event.exit_code not in (None, 0):
+            event.ok = False
+        self.record(event)
+
+    def tool_hook(self, function_name: str, function_call, arguments: Dict, agent=None, team=None):
+        """Sync agno tool hook: times the call and records it."""
+        event = self._start(function_name, arguments, agent, team)
+        token = _current.set(event)
+        started = time.monotonic()
+        try:
+            result = function_call(**arguments)
+        except BaseException as e:
+            self._finish(event, started, error=e)
+            raise
+        finally:
+            _current.reset(token)
+        if inspect.isawaitable(result):
+            return self._finish_awaitable(event, started, result)
+        if inspect.isgenerator(result):
+            return self._finish_generator(event, started, result)
+        self._finish(event, started, result)
+        return result
+
+    def _finish_generator(self, event: TelemetryEvent, started: float, generator):
+        """Streaming tools (e.g., team delegation) are timed until fully consumed."""
+        # No context switch here: a generator may be resumed from another context
+        text = []
+        try:
+            for item in generator:
+                if isinstance(item, str):
+                    text.append(item)
+                yield item
+        except BaseException as e:
+            self._finish(event, started, error=e)
+            raise
+        self._finish(event, started, "".join(text))
+
+    async def _finish_async_generator(self, event: TelemetryEvent, started: float, generator):
+        # No context switch here: a generator may be resumed from another context
+        text = []
+        try:
+            async for item in generator:
+                if isinstance(item, str):
+                    text.append(item)
+                yield item
+        except BaseException as e:
+            self._finish(event, started, error=e)
+            raise
+        self._finish(event, started, "".join(text))
+
+    async def _finish_awaitable(self, event: TelemetryEvent, started: float, awaitable):
+        token = _current.set(event)
+        try:
+            result = await awaitable
+        except BaseException as e:
+            self._finish(event, started, error=e)
+            raise
+        finally:
+            _current.reset(token)
+        self._finish(event, started, result)
+        return result
+
+    async def async_tool_hook(self, function_name: str, function_call, arguments: Dict, agent=None, team=None):
+        """Async agno tool hook, used on the arun()/aprint_response() path."""
+        event = self._start(function_name, arguments, agent, team)
+        token = _current.set(event)
+        started = time.monotonic()
+        try:
+            result = await call_tool_async(function_name, function_call, arguments)
+            if inspect.isasyncgen(result):
+                return self._finish_async_generator(event, started, result)
+            if inspect.isgenerator(result):
+                return self._finish_generator(event, started, result)
+        except BaseException as e:
+            self._finish(event, started, error=e)
+            raise
+        finally:
+            _current.reset(token)
+        self._finish(event, started, result)
+        return result
+
+    def llm_hook(self, run_output, agent=None, team=None):
+        """agno post-hook: one event per model turn of the finished run."""
+        caller = _caller_name(agent, team)
+        run_id = _current_run_id()
+        model = getattr(agent or team, "model", None)
+        messages = getattr(run_output, "messages", None) or []
+        prompt_hash = _prompt_hash(messages)
+        previous = self._last_prompt.get(caller)
+        changed = bool(previous and prompt_hash and previous != prompt_hash)
+        if prompt_hash:
+            self._last_prompt[caller] = prompt_hash
+        for message in messages:
+            metrics = getattr(message, "metrics", None)
+            if message.role != "assistant" or metrics is None or getattr(message, "from_history", False):
+                continue
+            input_tokens = getattr(metrics, "input_tokens", 0) or 0
+            cached = getattr(metrics, "cache_read_tokens", 0) or 0
+            written = getattr(metrics, "cache_write_tokens", 0) or 0
+            if getattr(model, "provider", "") in _CACHE_EXCLUSIVE_PROVIDERS:
+                input_tokens += cached + written
+            self.record(TelemetryEvent(
+                kind="llm",
+                name=caller,
+                agent=caller,
+                run_id=run_id,
+                started=getattr(message, "created_at", 0) or 0,
+                seconds=getattr(metrics, "duration", None) or 0.0,
+                input_tokens=input_tokens,
+                output_tokens=getattr(metrics, "output_tokens", 0) or 0,
+                cached_tokens=cached,
+                cache_write_tokens=written,
+                model=getattr(model, "id", "") or "",
+                prompt_hash=prompt_hash,
+                prompt_changed=changed,
+            ))
+
+    # ----- Aggregation and export -----
+
+    def summary(self) -> List[Dict]:
+        """One row per (kind, name): count, errors, time and volume totals."""
+        rows: Dict[tuple, Dict] = OrderedDict()
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            row = rows.setdefault((event.kind, event.name), {
+                "kind": event.kind, "name": event.name, "count": 0, "errors": 0,
+                "seconds": 0.0, "max_seconds": 0.0, "stdout_bytes": 0, "stderr_bytes": 0,
+                "lines": 0, "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "cache_write_tokens": 0,
+            })
+            row["count"] += 1
+            row["errors"] += 0 if event.ok else 1
+            row["seconds"] += event.seconds
+            row["max_seconds"] = max(row["max_seconds"], event.seconds)
+            for field in ("stdout_bytes", "stderr_bytes", "lines", "input_tokens", "output_tokens",
+                          "cached_tokens", "cache_write_tokens"):
+                row[field] += getattr(event, field)
+        return sorted(rows.values(), key=lambda row: row["seconds"], reverse=True)
+
+    def format_summary(self) -> str:
+        rows = self.summary()
+        if not rows:
+            return "No telemetry recorded yet - run a task first."
+        lines = [
+            f"{'kind':<11} {'name':<34} {'calls':>5} {'err':>4} {'total s':>9} {'avg s':>7} {'max s':>7} "
+            f"{'stdout':>9} {'lines':>8} {'tok in':>8} {'cached':>8} {'tok out':>8}"
+        ]
+        for row in rows:
+            lines.append(
+                f"{row['kind']:<11} {row['name'][:34]:<34} {row['count']:>5} {row['errors']:>4} "
+                f"{row['seconds']:>9.1f} {row['seconds'] / row['count']:>7.2f} {row['max_seconds']:>7.2f} "
+                f"{_human_bytes(row['stdout_bytes']):>9} {row['lines']:>8} "
+                f"{row['input_tokens']:>8} {row['cached_tokens']:>8} {row['output_tokens']:>8}"
+            )
+        return "\n".join(lines)
+
+    def mark(self) -> int:
+        """Position in the event log; pass it to prompt_cache_report to cover only later events."""
+        with self._lock:
+            return len(self.events)
+
+    def prompt_cache_report(self, since: int = 0) -> str:
+        """Cached vs. uncached LLM input tokens of the events after `since`, and any prompt prefix drift."""
+        with self._lock:
+            turns = [event for event in self.events[since:] if event.kind == "llm"]
+        if not turns:
+            return ""
+        total = sum(event.input_tokens for event in turns)
+        cached = sum(event.cached_tokens for event in turns)
+        written = sum(event.cache_write_tokens for event in turns)
+        lines = [
+            f"LLM input: {total:,} tokens over {len(turns)} turns - {cached:,} cached "
+            f"({cached / total * 100 if total else 0:.0f}%), {total - cached:,} uncached"
+            + (f", {written:,} written to cache" if written else "")
+        ]
+        drifted = sorted({event.agent for event in turns if event.prompt_changed})
+        if drifted:
+            lines.append(f"Warning: the system prompt of {', '.join(drifted)} changed since the previous run, "
+                         f"so providers could not reuse their cached prefix")
+        return "\n".join(lines)
+
+    def export_jsonl(self, path: Union[str, Path]) -> int:
+        """Write every event as one JSON object per line. Returns the number of events."""
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as handle:
+            for event in events:
+                handle.write(json.dumps(asdict(event)) + "\n")
+        return len(events)
+
+    def export_prometheus(self, path: Union[str, Path]) -> Path:
+        """Write per-(kind, name) totals in Prometheus text format for node_exporter's textfile collector."""
+        metrics = [
+            ("calls_total", "counter", "Number of calls", "count"),
+            ("errors_total", "counter", "Number of failed calls", "errors"),
+            ("seconds_total", "counter", "Wall time spent in seconds", "seconds"),
+            ("max_seconds", "gauge", "Slowest single call in seconds", "max_seconds"),
+            ("stdout_bytes_total", "counter", "Bytes of stdout produced", "stdout_bytes"),
+            ("stderr_bytes_total", "counter", "Bytes of stderr produced", "stderr_bytes"),
+            ("lines_total", "counter", "Output lines produced", "lines"),
+            ("input_tokens_total", "counter", "LLM input tokens", "input_tokens"),
+            ("output_tokens_total", "counter", "LLM output tokens", "output_tokens"),
+            ("cached_input_tokens_total", "counter", "LLM input tokens served from the prompt cache", "cached_tokens"),
+            ("cache_write_tokens_total", "counter", "LLM input tokens written to the prompt cache", "cache_write_tokens"),
+        ]
+        rows = self.summary()
+        out = []
+        for suffix, metric_type, help_text, field in metrics:
+            name = f"oselot_{suffix}"
+            out.append(f"# HELP {name} {help_text}.")
+            out.append(f"# TYPE {name} {metric_type}")
+            for row in rows:
+                labels = f'kind="{row["kind"]}",name="{_escape_label(row["name"])}"'
+                out.append(f"{name}{{{labels}}} {row[field]}")
+
+        # Write-then-rename so the collector never reads a half-written file
+        path = Path(path).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text("\n".join(out) + "\n", encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def flush_prometheus(self):
+        """Refresh the configured Prometheus textfile, if one is configured."""
+        if PROMETHEUS_TEXTFILE:
+            self.export_prometheus(PROMETHEUS_TEXTFILE)
+
+
+def _human_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}GB"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+TELEMETRY = Telemetry()
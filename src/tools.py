@@ -1,33 +1,100 @@
+import asyncio
+import contextvars
+import json
+import os
+import re
+import shlex
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
 from agno.tools import tool
+from bbot_events import event_host, event_resolutions, find_output_file, iter_events, summarize_events
+from cache import ASNMAP_CACHE, normalize_key
+from capture import StreamResult, run_dir, run_in_group, spill_path, stream_command
+from executor import run_command, run_shell, run_streaming
+from localfs import run_cat, run_echo, run_find, run_ls
+from pager import read_window as read_file_window
+from rescan import incremental_probe
+from results import ResultShaper, bbot_shaper, httpx_shaper
+from scope import ScopeIndex, line_ip
+from settings import ASNMAP_TIMEOUT, BBOT_TIMEOUT, COMMAND_TIMEOUT, HTTPX_BIN, HTTPX_TIMEOUT, MAX_CONCURRENT_TOOLS
+from sharding import ShardTiming, count_lines, format_timings, merge_outputs, resolve_shard_count, split_file
+from store import ASSET_KINDS, ASSET_STORE, AssetSink, line_host, parse_bbot_line, parse_httpx_line
+
+
+# ------- Helpers -------
+
+def _streamed_output(tool_name: str, result: StreamResult, timeout: int, shaper: ResultShaper, empty_message: str = "") -> str:
+    """Turn a streamed tool run into the (compact) text returned to the model."""
+    if result.partial:
+        return (
+            f"Error: {tool_name} timed out after {timeout} seconds and was stopped. "
+            f"Partial output ({result.lines} lines captured before the timeout):\n"
+            + shaper.render(result)
+        )
+    if result.returncode != 0:
+        return f"Error running {tool_name}:\n{result.stderr.strip()}"
+    return shaper.render(result, empty_message)
+
+
+def _timeout_message(tool_name: str, timeout: int, partial_output: str) -> str:
+    """Error text for a timed-out tool that still hands back what it printed."""
+    message = f"Error: {tool_name} timed out after {timeout} seconds and was stopped"
+    partial_output = (partial_output or "").strip()
+    return f"{message}. Partial output:\n{partial_output}" if partial_output else message
+
+
+def _store_note(kind: str, target: str, seen: int, new: int) -> str:
+    """Short pointer to what a tool just filed in the asset store."""
+    return (
+        f"[asset store: {seen} {kind} for {target} ({new} new) - "
+        f"use query_assets(target=\"{target}\", kind=\"{kind}\") or export_assets to read them]"
+    )
+
+
+def _store_asnmap_records(target: str, records: List[dict]) -> str:
+    """File asnmap -json records for a target in the asset store."""
+    asns = {(str(r.get("as_number", "")), str(r.get("as_name", "")), str(r.get("as_country", ""))) for r in records}
+    cidrs = {(cidr, str(r.get("as_number", ""))) for r in records for cidr in (r.get("as_range") or [])}
+    ASSET_STORE.upsert_asns(target, [a for a in asns if a[0]])
+    new, seen = ASSET_STORE.upsert_cidrs(target, cidrs)
+    return _store_note("cidrs", target, seen, new)
+
+
+def _store_asnmap_text(target: str, output: str) -> str:
+    """File asnmap output (JSON lines or plain CIDRs) for a target in the asset store."""
+    records = [r for group in _group_asnmap_json(output).values() for r in group]
+    if records:
+        return _store_asnmap_records(target, records)
+    cidrs = {(cidr, "") for cidr in ScopeIndex.from_text(output).cidrs()}
+    new, seen = ASSET_STORE.upsert_cidrs(target, cidrs)
+    return _store_note("cidrs", target, seen, new)
 
 
 # ------- CLI Tools -------
 
 @tool
 def echo(text: str, args: str = "") -> str:
-    """Output text to stdout, optionally piping through other commands.
+    """Output text, optionally redirecting it to a file or piping it through other commands.
 
-    Executes: echo {text} {args}
+    Behaves like: echo {text} {args}
 
     Args:
         text (str): The text to output.
-        args (str): Additional arguments or pipe commands (e.g., "| grep pattern", "| base64").
+        args (str): Additional arguments, a redirect (e.g., "> notes.txt") or pipe commands (e.g., "| grep pattern", "| base64").
 
     Returns:
         str: The echoed text or processed output.
     """
-    command = f"echo {text} {args}"
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True
-        )
+        result = run_echo(text, args)
         if result.returncode != 0:
             return f"Error running echo:\n{result.stderr.strip()}"
         return result.stdout.strip()
+    except subprocess.TimeoutExpired as e:
+        return _timeout_message("echo", COMMAND_TIMEOUT, e.output)
     except Exception as e:
         return f"Error running echo: {str(e)}"
 
@@ -45,18 +112,12 @@ def pipe(command: str) -> str:
         str: Command output.
     """
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
+        result = run_in_group(command, shell=True, timeout=COMMAND_TIMEOUT)
         if result.returncode != 0:
             return f"Error running command:\n{result.stderr.strip()}"
         return result.stdout.strip()
-    except subprocess.TimeoutExpired:
-        return "Error: Command timed out after 300 seconds"
+    except subprocess.TimeoutExpired as e:
+        return _timeout_message("Command", COMMAND_TIMEOUT, e.output)
     except Exception as e:
         return f"Error running command: {str(e)}"
 
@@ -67,22 +128,18 @@ def list_dir(path: str, args: str = "") -> str:
 
     Args:
         path (str): The directory path to list.
-        args (str): Additional ls flags (e.g., "-la", "-lh").
+        args (str): Additional ls flags (e.g., "-la", "-lh") or pipe commands (e.g., "| grep json").
 
     Returns:
         str: Directory listing output.
     """
-    command = f"ls {path} {args}"
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True
-        )
+        result = run_ls(path, args)
         if result.returncode != 0:
             return f"Error listing directory:\n{result.stderr.strip()}"
         return result.stdout.strip()
+    except subprocess.TimeoutExpired as e:
+        return _timeout_message("ls", COMMAND_TIMEOUT, e.output)
     except Exception as e:
         return f"Error running ls: {str(e)}"
 
@@ -91,6 +148,9 @@ def list_dir(path: str, args: str = "") -> str:
 def cat_file(file_path: str, args: str = "") -> str:
     """Display the contents of a file, optionally piping through other commands.
 
+    Files larger than the inline limit are cut off with a note; pipe commands
+    always see the whole file.
+
     Args:
         file_path (str): The path to the file to read.
         args (str): Additional arguments or pipe commands (e.g., "| grep pattern", "| jq .data").
@@ -98,21 +158,59 @@ def cat_file(file_path: str, args: str = "") -> str:
     Returns:
         str: File contents or processed output.
     """
-    command = f"cat {file_path} {args}"
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True
-        )
+        result = run_cat(file_path, args)
         if result.returncode != 0:
             return f"Error reading file:\n{result.stderr.strip()}"
         return result.stdout.strip()
+    except subprocess.TimeoutExpired as e:
+        return _timeout_message("cat", COMMAND_TIMEOUT, e.output)
     except Exception as e:
         return f"Error running cat: {str(e)}"
 
 
+@tool
+def read_window(
+    file_path: str,
+    start_line: int = 1,
+    max_lines: int = 100,
+    byte_offset: int = -1,
+    tail: bool = False,
+    pattern: str = "",
+    max_matches: int = 50,
+    ignore_case: bool = False,
+) -> str:
+    """Page through a large file (scan output, run artifacts) without loading it.
+
+    Returns numbered lines and the start_line of the next page. Jumping to any
+    line is fast, even in multi-GB files.
+
+    Args:
+        file_path (str): The path to the file to read.
+        start_line (int): First line to return (1-based).
+        max_lines (int): Number of lines to return (at most 500).
+        byte_offset (int): Start at the first whole line at or after this byte offset instead of start_line.
+        tail (bool): Return the last max_lines lines of the file.
+        pattern (str): Regular expression; return only matching lines, searching from start_line.
+        max_matches (int): Most matching lines to return for pattern (at most 500).
+        ignore_case (bool): Match pattern case-insensitively.
+
+    Returns:
+        str: The requested lines with their line numbers, or the matching lines.
+    """
+    try:
+        return read_file_window(
+            file_path, start_line=start_line, max_lines=max_lines, byte_offset=byte_offset,
+            tail=tail, pattern=pattern, max_matches=max_matches, ignore_case=ignore_case,
+        )
+    except re.error as e:
+        return f"Error: invalid pattern {pattern!r}: {e}"
+    except OSError as e:
+        return f"Error reading file: {e.strerror or e}: {file_path}"
+    except Exception as e:
+        return f"Error reading file: {str(e)}"
+
+
 @tool
 def pwd_command() -> str:
     """Retrieve the current working directory.
@@ -121,15 +219,7 @@ def pwd_command() -> str:
         str: The current working directory path.
     """
     try:
-        result = subprocess.run(
-            "pwd",
-            shell=True,
-            capture_output=True,
-            text=True
-        )
-        if result.returncode != 0:
-            return f"Error running pwd:\n{result.stderr.strip()}"
-        return result.stdout.strip()
+        return os.getcwd()
     except Exception as e:
         return f"Error running pwd: {str(e)}"
 
@@ -145,17 +235,13 @@ def find_file(file_path: str, args: str = "") -> str:
     Returns:
         str: List of matching file paths.
     """
-    command = f"find {file_path} {args}"
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True
-        )
+        result = run_find(file_path, args)
         if result.returncode != 0:
             return f"Error running find:\n{result.stderr.strip()}"
         return result.stdout.strip()
+    except subprocess.TimeoutExpired as e:
+        return _timeout_message("find", COMMAND_TIMEOUT, e.output)
     except Exception as e:
         return f"Error running find: {str(e)}"
 
@@ -163,40 +249,231 @@ def find_file(file_path: str, args: str = "") -> str:
 # ---- ASNMap Tool -----
 
 @tool(show_result = True)
-def asnmap(target: str, args: str = "") -> str:
+def asnmap(target: str, args: str = "", refresh: bool = False) -> str:
     """Map domains, organizations, or IPs to their ASN and IP ranges.
 
-    Executes: echo {target} | asnmap -json -silent
+    Executes: echo {target} | asnmap -silent {args}
+    Results are cached under ~/.ocelot (see OCELOT_ASNMAP_CACHE_TTL).
 
     Args:
         target (str): The domain, organization name, IP address, or ASN to lookup.
-        args (str): Additional asnmap flags (e.g., "-org" for org lookup, "-d" for domain, "-i" for IP, "-a" for ASN expansion).
+        args (str): Additional asnmap flags (e.g., "-json" for JSON output, "-v6" for IPv6 ranges).
+        refresh (bool): Ignore any cached result and query asnmap again. Default False.
 
     Returns:
-        str: JSON output containing ASN information and CIDR blocks.
+        str: asnmap output containing ASN information and CIDR blocks.
     """
-    command = f"echo {target} | asnmap  -silent"
+    cache_key = normalize_key(target, args)
+    if not refresh:
+        cached = ASNMAP_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
+    command = f"echo {target} | asnmap -silent {args}"
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=200
-        )
+        result = run_in_group(command, shell=True, timeout=ASNMAP_TIMEOUT)
         if result.returncode != 0:
             return f"Error running asnmap:\n{result.stderr.strip()}"
-        return result.stdout.strip()
-    except subprocess.TimeoutExpired:
-        return "Error: asnmap timed out after 200 seconds"
+        output = result.stdout.strip()
+        ASNMAP_CACHE.set(cache_key, output)
+        return f"{output}\n{_store_asnmap_text(target, output)}"
+    except subprocess.TimeoutExpired as e:
+        # Partial output is returned but never cached
+        return _timeout_message("asnmap", ASNMAP_TIMEOUT, e.output)
     except Exception as e:
         return f"Error running asnmap: {str(e)}"
 
 
+def _split_targets(targets: str, file_path: str = "") -> List[str]:
+    """Collect unique targets from a comma/newline separated string and/or a file."""
+    raw = targets.replace(",", "\n").splitlines()
+    if file_path:
+        raw += Path(file_path).expanduser().read_text().splitlines()
+    seen = {}
+    for item in raw:
+        item = item.strip()
+        if item and not item.startswith("#"):
+            seen.setdefault(item.lower(), item)
+    return list(seen.values())
+
+
+def _group_asnmap_json(output: str) -> Dict[str, List[dict]]:
+    """Group asnmap -json records by the (lower-cased) input they answer."""
+    grouped: Dict[str, List[dict]] = {}
+    for line in output.splitlines():
+        line = line.strip()
+        if not line.startswith("{"):
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        grouped.setdefault(str(record.get("input", "")).strip().lower(), []).append(record)
+    return grouped
+
+
+def _summarize_asn_records(target: str, records: List[dict], max_ranges: int = 5) -> str:
+    """One compact line per target: ASNs, owners and a sample of ranges."""
+    if not records:
+        return f"{target}: no results"
+    asns = []
+    ranges = []
+    for record in records:
+        label = f"{record.get('as_number', '?')} ({record.get('as_name', '?')}, {record.get('as_country', '?')})"
+        if label not in asns:
+            asns.append(label)
+        ranges.extend(record.get("as_range") or [])
+    sample = ", ".join(ranges[:max_ranges])
+    more = f", +{len(ranges) - max_ranges} more" if len(ranges) > max_ranges else ""
+    return f"{target}: {'; '.join(asns)} - {len(ranges)} ranges [{sample}{more}]"
+
+
+@tool(show_result=True)
+def asnmap_bulk(targets: str = "", file_path: str = "", refresh: bool = False) -> str:
+    """Map many organizations, domains, IPs or ASNs in a single asnmap run.
+
+    Executes: asnmap -silent -json (all targets fed over stdin)
+    Use this instead of calling asnmap once per target.
+
+    Args:
+        targets (str): Targets separated by commas or newlines (e.g., "AS13335, example.com, 8.8.8.8").
+        file_path (str): Optional file with one target per line.
+        refresh (bool): Ignore cached results and query asnmap again. Default False.
+
+    Returns:
+        str: One summary line per target (ASNs, owners, range count, sample ranges)
+            and the path of a JSONL file holding every record.
+    """
+    try:
+        items = _split_targets(targets, file_path)
+    except OSError as e:
+        return f"Error reading targets file: {str(e)}"
+    if not items:
+        return "Error: no targets given"
+
+    records: Dict[str, List[dict]] = {}
+    pending = []
+    for item in items:
+        cached = None if refresh else ASNMAP_CACHE.get(normalize_key(item, "-json"))
+        if cached is None:
+            pending.append(item)
+        else:
+            records[item] = _group_asnmap_json(cached).get(item.lower(), [])
+
+    timeout = ASNMAP_TIMEOUT + 10 * len(pending)
+    timed_out = False
+    if pending:
+        try:
+            result = run_in_group(
+                ["asnmap", "-silent", "-json"],
+                input_text="\n".join(pending) + "\n",
+                timeout=timeout
+            )
+            stdout = result.stdout
+        except subprocess.TimeoutExpired as e:
+            # Keep the records asnmap printed before it was stopped
+            timed_out, stdout = True, e.output or ""
+        except Exception as e:
+            return f"Error running asnmap: {str(e)}"
+        if not timed_out and result.returncode != 0:
+            return f"Error running asnmap:\n{result.stderr.strip()}"
+
+        grouped = _group_asnmap_json(stdout)
+        for item in pending:
+            found = grouped.get(item.lower(), [])
+            records[item] = found
+            if not timed_out:  # A partial batch may hold incomplete records, so none of it is cached
+                ASNMAP_CACHE.set(
+                    normalize_key(item, "-json"),
+                    "\n".join(json.dumps(record) for record in found)
+                )
+
+    output_file = spill_path("asnmap-bulk").with_suffix(".jsonl")
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as handle:
+        for item in items:
+            for record in records[item]:
+                handle.write(json.dumps(record) + "\n")
+
+    for item in items:
+        if records[item]:
+            _store_asnmap_records(item, records[item])
+
+    lines = [_summarize_asn_records(item, records[item]) for item in items]
+    if timed_out:
+        lines.insert(0, f"Error: asnmap timed out after {timeout} seconds and was stopped. "
+                        f"Partial results for the batch of {len(pending)} targets (not cached):")
+    resolved = sum(1 for item in items if records[item])
+    lines.append(
+        f"\n{resolved}/{len(items)} targets resolved "
+        f"({len(items) - len(pending)} from cache). Full records: {output_file}\n"
+        f"CIDRs are filed per target in the asset store - use query_assets(target=..., kind=\"cidrs\")"
+    )
+    return "\n".join(lines)
+
+
+# ---- Scope Tool -----
+
+@tool
+def scope_filter(scope_file: str, input_file: str, output_file: str = "", target: str = "") -> str:
+    """Keep only the lines of a file whose IP address falls inside the target's CIDR scope.
+
+    Works in-process - no tokens are spent reasoning over CIDR lists. Default httpx output
+    and bbot DNS_NAME lines carry no IP: pass target to check their hostnames against the IPs
+    resolved for it in the asset store, or run httpx with extra_args="-ip".
+
+    Args:
+        scope_file (str): File with CIDRs/IPs defining the scope (asnmap output, asnmap_bulk JSONL, or one CIDR per line).
+        input_file (str): File to filter (e.g., bbot or httpx output, one result per line).
+        output_file (str): Where to write in-scope lines. Default: <input_file>.in-scope
+        target (str): Target whose stored resolutions are used for lines without an IP (e.g., "example.com").
+
+    Returns:
+        str: Counts of in-scope, out-of-scope and unresolvable lines and the output file path.
+    """
+    try:
+        index = ScopeIndex.from_file(scope_file)
+        if not len(index):
+            return f"Error: no CIDRs or IPs found in {scope_file}"
+        resolved = ASSET_STORE.resolutions(target) if target else {}
+        output_path = Path(output_file or f"{input_file}.in-scope").expanduser()
+        total = kept = by_host = no_ip = 0
+        with open(Path(input_file).expanduser(), encoding="utf-8", errors="replace") as source, \
+                open(output_path, "w", encoding="utf-8") as out:
+            for line in source:
+                total += 1
+                ip = line_ip(line)
+                if ip is not None:
+                    in_scope = index.contains(ip)
+                else:
+                    ips = resolved.get(line_host(line) or "")
+                    if not ips:
+                        no_ip += 1
+                        continue
+                    # In scope if any address the host resolves to is
+                    in_scope = any(index.contains(address) for address in ips)
+                    by_host += in_scope
+                if in_scope:
+                    kept += 1
+                    out.write(line)
+        summary = [
+            f"Scope: {len(index)} merged ranges ({index.total_addresses()} addresses)",
+            f"{kept}/{total} lines in scope ({by_host} via stored DNS resolutions), "
+            f"{total - kept - no_ip} out of scope. In-scope lines: {output_path}",
+        ]
+        if no_ip:
+            hint = ("no stored resolution for their host" if target
+                    else "pass target= to use stored DNS resolutions, or run httpx with -ip")
+            summary.append(f"{no_ip} lines have no IP address and were not kept ({hint})")
+        return "\n".join(summary)
+    except Exception as e:
+        return f"Error filtering by scope: {str(e)}"
+
+
 # ---- BBOT Tool -----
 
 @tool
-def bbot(target: str, extra_args: str = "") -> str:
+def bbot(target: str, extra_args: str = "", timeout: int = 0) -> str:
     """Run BBOT for recursive subdomain enumeration and attack surface discovery.
 
     Executes: bbot -t {target} -p subdomain-enum 
@@ -204,29 +481,90 @@ def bbot(target: str, extra_args: str = "") -> str:
     Args:
         target (str): The target domain to enumerate (e.g., "example.com").
         extra_args (str): Additional bbot arguments. (eg. "-p subdomain enum" )
+        timeout (int): Seconds before the scan is stopped and what it found so far is returned.
+            0 uses OCELOT_BBOT_TIMEOUT (default 600).
 
     Returns:
-        str: BBOT scan output. Full results are saved to ~/.bbot/scans/<scan_name>/.
+        str: BBOT output, or for large scans a summary (event counts, sample lines) with the path of
+            the full stdout under ~/.ocelot/runs/. Full results are saved to ~/.bbot/scans/<scan_name>/.
     """
     command = f"bbot -t {target} -p subdomain-enum {extra_args}"
+    timeout = timeout or BBOT_TIMEOUT
     try:
-        result = subprocess.run(
+        # Stream stdout to disk so a large scan never sits in memory whole
+        assets = AssetSink(parse_bbot_line, lambda rows: ASSET_STORE.upsert_subdomains(target, rows, "bbot"))
+        shaper = bbot_shaper()
+        result = stream_command(
             command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            input="\n",  # Auto-press enter to start scan
-            timeout=200
+            sinks=[assets] + shaper.sinks(),
+            input_text="\n",  # Auto-press enter to start scan
+            timeout=timeout,
+            spill_to=spill_path("bbot")
         )
-        if result.returncode != 0:
-            return f"Error running bbot:\n{result.stderr.strip()}"
-        return result.stdout.strip()
-    except subprocess.TimeoutExpired:
-        return "Error: bbot scan timed out after 600 seconds"
+        return f"{_streamed_output('bbot', result, timeout, shaper)}\n{_store_note('subdomains', target, assets.seen, assets.new)}"
     except Exception as e:
         return f"Error running bbot: {str(e)}"
 
 
+@tool(show_result=True)
+def bbot_events(
+    scan: str = "",
+    event_types: str = "",
+    target: str = "",
+    in_scope_only: bool = True,
+    scope_file: str = "",
+    limit: int = 50,
+    offset: int = 0
+) -> str:
+    """Read events from a bbot scan's output.json without loading the whole file.
+
+    Use this instead of cat_file on ~/.bbot/scans/<scan_name>/output.json.
+
+    Args:
+        scan (str): Scan name under ~/.bbot/scans/, or a path to output.json. Default: the newest scan
+            started with target as a seed (or the newest scan of any target if target is empty).
+        event_types (str): Comma-separated event types (e.g., "DNS_NAME,OPEN_TCP_PORT,TECHNOLOGY"). Default: all.
+        target (str): Only events for this domain and its subdomains. DNS names and their resolved
+            IPs are also filed in the asset store under this target.
+        in_scope_only (bool): Only events bbot considers in scope (scope_distance 0). Default True.
+        scope_file (str): File of CIDRs; only events whose IPs fall inside them are kept.
+        limit (int): Maximum events to list. Default 50.
+        offset (int): Events to skip, for paging. Default 0.
+
+    Returns:
+        str: Event counts by type followed by one line per listed event.
+    """
+    try:
+        output_file = find_output_file(scan, target)
+        events = iter_events(
+            output_file,
+            types=[t.strip() for t in event_types.split(",") if t.strip()] or None,
+            max_distance=0 if in_scope_only else None,
+            domain=target,
+            scope=ScopeIndex.from_file(scope_file) if scope_file else None,
+        )
+        sinks = []
+        if target:
+            sinks = [
+                AssetSink(event_host, lambda rows: ASSET_STORE.upsert_subdomains(target, rows, "bbot")),
+                AssetSink(event_resolutions, lambda rows: ASSET_STORE.upsert_ips(target, (p for r in rows for p in r))),
+            ]
+        summary = summarize_events(events, limit, offset, sinks)
+        if not summary.total:
+            return f"No matching events in {output_file}"
+
+        lines = [f"{summary.total} matching events in {output_file}: "
+                 + ", ".join(f"{n} {t}" for t, n in summary.counts.most_common())]
+        lines.extend(event.render() for event in summary.page)
+        if offset + len(summary.page) < summary.total:
+            lines.append(f"[events {offset + 1}-{offset + len(summary.page)} of {summary.total} - raise offset to page further]")
+        if sinks:
+            lines.append(_store_note("subdomains", target, sinks[0].seen, sinks[0].new))
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error reading bbot events: {str(e)}"
+
+
 # ----- HTTPX Tool -------
 
 @tool(
@@ -241,8 +579,10 @@ def httpx(
     match_codes: str = "",
     filter_codes: str = "",
     threads: int = 50,
-    timeout: int = 300,
-    extra_args: str = ""
+    timeout: int = 0,
+    extra_args: str = "",
+    target: str = "",
+    shards: int = 0
 ) -> str:
     """Probe a list of subdomains/URLs with httpx for live hosts and technology fingerprinting.
 
@@ -257,11 +597,17 @@ def httpx(
         match_codes (str): Only show these status codes (e.g., -mc "200,301").
         filter_codes (str): Hide these status codes (e.g., -fc "404,500").
         threads (int): Number of concurrent threads (e.g., -t 50). Default 50.
-        timeout (int): Command timeout in seconds. Default 300.
+        timeout (int): Seconds before httpx is stopped and the hosts probed so far are returned.
+            0 uses OCELOT_HTTPX_TIMEOUT (default 300).
         extra_args (str): Additional httpx arguments.
+        target (str): Target domain these hosts belong to (e.g., "example.com"). When set,
+            results are filed in the asset store under it.
+        shards (int): Number of parallel httpx workers. 0 picks automatically from CPU count
+            and input size (OCELOT_HTTPX_SHARDS), 1 forces a single process. Default 0.
 
     Returns:
-        str: httpx results showing live hosts with status codes, titles, and technologies.
+        str: httpx results showing live hosts with status codes, titles, and technologies, or for
+            large runs a summary (status/technology counts, sample lines) with the path of the full output.
     """
     args = []
     if status_code:
@@ -281,21 +627,373 @@ def httpx(
         args.append(extra_args)
 
     args_str = " ".join(args)
-    command = f"cat {file_path} | /snap/bin/httpx {args_str}"
+    command = f"cat {file_path} | {HTTPX_BIN} {args_str}"
 
+    timeout = timeout or HTTPX_TIMEOUT
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=timeout
+        shaper = httpx_shaper()
+        sinks = shaper.sinks()
+        assets = None
+        if target:
+            assets = AssetSink(parse_httpx_line, lambda rows: ASSET_STORE.upsert_probes(target, rows))
+            sinks.append(assets)
+        shard_count = resolve_shard_count(shards, count_lines(Path(file_path).expanduser()))
+        timings = None
+        if shard_count > 1:
+            result, timings = _httpx_sharded(file_path, args_str, shard_count, timeout, sinks)
+        else:
+            result = stream_command(command, sinks=sinks, timeout=timeout, spill_to=spill_path("httpx"))
+        output = _streamed_output("httpx", result, timeout, shaper, "No live hosts found")
+        if timings:
+            output += f"\n{format_timings(timings)}"
+        if assets:
+            output += f"\n{_store_note('probes', target, assets.seen, assets.new)}"
+        return output
+    except Exception as e:
+        return f"Error running httpx: {str(e)}"
+
+
+def _httpx_sharded(file_path: str, args_str: str, shard_count: int, timeout: int, sinks: list):
+    """Split the input, run one httpx per shard in parallel, then merge the results.
+
+    Returns:
+        (merged StreamResult, per-shard timings)
+    """
+    work_dir = run_dir() / f"httpx-shards-{time.strftime('%H%M%S')}"
+    shard_files = split_file(Path(file_path).expanduser(), shard_count, work_dir, "input")
+    began = time.monotonic()
+
+    def _probe(index: int, shard_file: Path):
+        started = time.monotonic()
+        result = stream_command(
+            f"cat {shard_file} | {HTTPX_BIN} {args_str}",
+            timeout=timeout,
+            tail_lines=1,
+            spill_to=work_dir / f"output-{index:02d}.txt"
+        )
+        return result, ShardTiming(index, count_lines(shard_file), result.lines, time.monotonic() - started,
+                                   result.returncode, result.timed_out, started - began)
+
+    with ThreadPoolExecutor(max_workers=len(shard_files)) as pool:
+        # Each worker runs in a copy of the caller's context so shard processes count toward its telemetry
+        futures = [pool.submit(contextvars.copy_context().run, _probe, i, f) for i, f in enumerate(shard_files, 1)]
+        runs = [future.result() for future in futures]
+    return _merge_shards(shard_files, runs, sinks)
+
+
+async def _async_httpx_sharded(file_path: str, argv: List[str], shard_count: int, timeout: int, sinks: list):
+    """Async counterpart of _httpx_sharded built on the executor engine.
+
+    Shard processes take engine slots like any other tool, so the caller caps shard_count at
+    OCELOT_MAX_CONCURRENCY. The timings record when each process actually started.
+    """
+    work_dir = run_dir() / f"httpx-shards-{time.strftime('%H%M%S')}"
+    shard_files = split_file(Path(file_path).expanduser(), shard_count, work_dir, "input")
+    began = time.monotonic()
+
+    async def _probe(index: int, shard_file: Path):
+        started = [time.monotonic()]
+        shard_argv = list(argv)
+        shard_argv[shard_argv.index("-l") + 1] = str(shard_file)
+        result = await run_streaming(
+            shard_argv,
+            timeout=timeout,
+            tail_lines=1,
+            spill_to=work_dir / f"output-{index:02d}.txt",
+            on_start=lambda: started.__setitem__(0, time.monotonic()),
         )
+        return result, ShardTiming(index, count_lines(shard_file), result.lines, time.monotonic() - started[0],
+                                   result.returncode, result.timed_out, started[0] - began)
+
+    runs = await asyncio.gather(*(_probe(i, f) for i, f in enumerate(shard_files, 1)))
+    return _merge_shards(shard_files, runs, sinks)
+
+
+def _merge_shards(shard_files: List[Path], runs: list, sinks: list):
+    merged = merge_outputs(
+        shard_files,
+        [result.spill_file for result, _ in runs],
+        sinks=sinks,
+        spill_to=spill_path("httpx")
+    )
+    # One failed shard should not throw away the others' results
+    if all(result.returncode != 0 and not result.timed_out for result, _ in runs):
+        merged.returncode = runs[0][0].returncode
+        merged.stderr = runs[0][0].stderr
+    merged.timed_out = any(result.timed_out for result, _ in runs)
+    merged.partial = any(result.partial for result, _ in runs)
+    return merged, [timing for _, timing in runs]
+
+
+@tool(show_result=True)
+def httpx_incremental(target: str, file_path: str = "", revalidate_percent: int = -1, full: bool = False) -> str:
+    """Rescan a target with httpx, probing only hosts that are new since the last scan plus a revalidation sample.
+
+    Use this for routine monitoring of targets that were scanned before.
+
+    Args:
+        target (str): Target domain (e.g., "example.com").
+        file_path (str): Current host list. Default: the target's subdomains in the asset store seen
+            since the previous rescan (i.e., by bbot runs after it), or that rescan's hosts if none were.
+        revalidate_percent (int): Percentage of already-known hosts to re-probe. -1 uses the
+            configured default (OCELOT_RESCAN_REVALIDATE_PERCENT).
+        full (bool): Re-probe every host. Default False.
+
+    Returns:
+        str: New/removed/changed host counts, samples, the diff report path and the httpx summary.
+    """
+    try:
+        if file_path:
+            hosts = Path(file_path).expanduser().read_text(encoding="utf-8", errors="replace").splitlines()
+        else:
+            # Nothing enumerated since the previous rescan: its host list still stands
+            hosts = (ASSET_STORE.iter_column(target, "subdomains", since=ASSET_STORE.snapshot_time(target))
+                     or sorted(ASSET_STORE.get_snapshot(target)))
+        if not hosts:
+            return f"Error: no hosts to scan for {target} - run bbot first or pass file_path"
+        report = incremental_probe(
+            target,
+            hosts,
+            probe=lambda path: httpx.entrypoint(path, target=target),
+            revalidate_percent=None if revalidate_percent < 0 else revalidate_percent,
+            full=full,
+        )
+        return f"{report.summary()}\n\n{report.probe_output}"
+    except Exception as e:
+        return f"Error running incremental httpx: {str(e)}"
+
+
+# ----- Asset Store Tools -----
+
+@tool
+def query_assets(target: str, kind: str = "summary", contains: str = "", limit: int = 50, offset: int = 0) -> str:
+    """Query the shared asset store filled by asnmap, bbot and httpx.
+
+    Args:
+        target (str): Target the assets were filed under (e.g., "example.com").
+        kind (str): "summary" for counts, or one of: asns, cidrs, subdomains, ips, probes.
+        contains (str): Only rows whose main value contains this text (e.g., "dev", "api.").
+        limit (int): Maximum rows to return. Default 50.
+        offset (int): Rows to skip, for paging. Default 0.
+
+    Returns:
+        str: Asset counts, or one tab-separated row per asset.
+    """
+    try:
+        if kind == "summary":
+            counts = ASSET_STORE.counts(target)
+            return f"Assets for {target}: " + ", ".join(f"{n} {k}" for k, n in counts.items())
+        rows = ASSET_STORE.query(target, kind, contains, limit, offset)
+        if not rows:
+            return f"No {kind} found for {target}"
+        lines = ["\t".join("" if value is None else str(value) for value in row) for row in rows]
+        lines.append(f"[rows {offset + 1}-{offset + len(rows)} - raise offset to page further]")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error querying assets: {str(e)}"
+
+
+@tool
+def export_assets(target: str, kind: str, file_path: str) -> str:
+    """Write one asset kind for a target to a file, one value per line (e.g., subdomains for httpx).
+
+    Args:
+        target (str): Target the assets were filed under (e.g., "example.com").
+        kind (str): One of: asns, cidrs, subdomains, ips, probes.
+        file_path (str): Destination file path.
+
+    Returns:
+        str: Number of values written and the file path.
+    """
+    if kind not in ASSET_KINDS:
+        return f"Error: unknown asset kind '{kind}'. Use one of: {', '.join(ASSET_KINDS)}"
+    try:
+        count = ASSET_STORE.export(target, kind, Path(file_path))
+        return f"Exported {count} {kind} for {target} to {file_path}"
+    except Exception as e:
+        return f"Error exporting assets: {str(e)}"
+
+
+# ----- Async Tool Variants -----
+# Same tools as above, built on the asyncio engine in executor.py so agents
+# running through arun()/aprint_response() can overlap independent scans.
+
+@tool(name="pipe")
+async def async_pipe(command: str) -> str:
+    """Execute a piped shell command.
+
+    Executes: {command}
+
+    Args:
+        command (str): The full command with pipes (e.g., "cat file.txt | grep pattern | sort -u").
+
+    Returns:
+        str: Command output.
+    """
+    try:
+        result = await run_shell(command, timeout=COMMAND_TIMEOUT)
+        if result.partial:
+            return _timeout_message("Command", COMMAND_TIMEOUT, result.stdout)
+        if result.returncode != 0:
+            return f"Error running command:\n{result.stderr.strip()}"
+        return result.stdout.strip()
+    except Exception as e:
+        return f"Error running command: {str(e)}"
+
+
+@tool(name="asnmap", show_result=True)
+async def async_asnmap(target: str, args: str = "", refresh: bool = False) -> str:
+    """Map domains, organizations, or IPs to their ASN and IP ranges.
+
+    Executes: echo {target} | asnmap -silent {args}
+    Results are cached under ~/.ocelot (see OCELOT_ASNMAP_CACHE_TTL).
+
+    Args:
+        target (str): The domain, organization name, IP address, or ASN to lookup.
+        args (str): Additional asnmap flags (e.g., "-json" for JSON output, "-v6" for IPv6 ranges).
+        refresh (bool): Ignore any cached result and query asnmap again. Default False.
+
+    Returns:
+        str: asnmap output containing ASN information and CIDR blocks.
+    """
+    cache_key = normalize_key(target, args)
+    if not refresh:
+        cached = ASNMAP_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
+    try:
+        result = await run_command(
+            ["asnmap", "-silent", *shlex.split(args)],
+            input_text=f"{target}\n",
+            timeout=ASNMAP_TIMEOUT
+        )
+        if result.partial:
+            return _timeout_message("asnmap", ASNMAP_TIMEOUT, result.stdout)
         if result.returncode != 0:
-            return f"Error running httpx:\n{result.stderr.strip()}"
-        return result.stdout.strip() or "No live hosts found"
-    except subprocess.TimeoutExpired:
-        return f"Error: httpx probe timed out after {timeout} seconds"
+            return f"Error running asnmap:\n{result.stderr.strip()}"
+        output = result.stdout.strip()
+        ASNMAP_CACHE.set(cache_key, output)
+        return f"{output}\n{_store_asnmap_text(target, output)}"
+    except Exception as e:
+        return f"Error running asnmap: {str(e)}"
+
+
+@tool(name="bbot")
+async def async_bbot(target: str, extra_args: str = "", timeout: int = 0) -> str:
+    """Run BBOT for recursive subdomain enumeration and attack surface discovery.
+
+    Executes: bbot -t {target} -p subdomain-enum
+
+    Args:
+        target (str): The target domain to enumerate (e.g., "example.com").
+        extra_args (str): Additional bbot arguments. (eg. "-p subdomain enum" )
+        timeout (int): Seconds before the scan is stopped and what it found so far is returned.
+            0 uses OCELOT_BBOT_TIMEOUT (default 600).
+
+    Returns:
+        str: BBOT output, or for large scans a summary (event counts, sample lines) with the path of
+            the full stdout under ~/.ocelot/runs/. Full results are saved to ~/.bbot/scans/<scan_name>/.
+    """
+    timeout = timeout or BBOT_TIMEOUT
+    try:
+        assets = AssetSink(parse_bbot_line, lambda rows: ASSET_STORE.upsert_subdomains(target, rows, "bbot"))
+        shaper = bbot_shaper()
+        result = await run_streaming(
+            ["bbot", "-t", target, "-p", "subdomain-enum", *shlex.split(extra_args)],
+            sinks=[assets] + shaper.sinks(),
+            input_text="\n",  # Auto-press enter to start scan
+            timeout=timeout,
+            spill_to=spill_path("bbot")
+        )
+        return f"{_streamed_output('bbot', result, timeout, shaper)}\n{_store_note('subdomains', target, assets.seen, assets.new)}"
+    except Exception as e:
+        return f"Error running bbot: {str(e)}"
+
+
+@tool(
+        name="httpx",
+        show_result=True,
+        instructions="pass results from the subdomain enumeration here. The file is fed to httpx -sc -title -tech-detect -t {threads} ")
+async def async_httpx(
+    file_path: str,
+    status_code: bool = True,
+    title: bool = True,
+    tech_detect: bool = True,
+    follow_redirects: bool = False,
+    match_codes: str = "",
+    filter_codes: str = "",
+    threads: int = 50,
+    timeout: int = 0,
+    extra_args: str = "",
+    target: str = "",
+    shards: int = 0
+) -> str:
+    """Probe a list of subdomains/URLs with httpx for live hosts and technology fingerprinting.
+
+    Executes: httpx -l {file_path} -sc -title -tech-detect
+
+    Args:
+        file_path (str): Path to file containing subdomains/URLs (one per line).
+        status_code (bool): Show HTTP status code (e.g., -sc). Default True.
+        title (bool): Show page title (e.g., -title). Default True.
+        tech_detect (bool): Detect technologies (e.g., -tech-detect). Default True.
+        follow_redirects (bool): Follow HTTP redirects (e.g., -fr). Default False.
+        match_codes (str): Only show these status codes (e.g., -mc "200,301").
+        filter_codes (str): Hide these status codes (e.g., -fc "404,500").
+        threads (int): Number of concurrent threads (e.g., -t 50). Default 50.
+        timeout (int): Seconds before httpx is stopped and the hosts probed so far are returned.
+            0 uses OCELOT_HTTPX_TIMEOUT (default 300).
+        extra_args (str): Additional httpx arguments.
+        target (str): Target domain these hosts belong to (e.g., "example.com"). When set,
+            results are filed in the asset store under it.
+        shards (int): Number of parallel httpx workers. 0 picks automatically from CPU count
+            and input size (OCELOT_HTTPX_SHARDS), 1 forces a single process. Default 0.
+            Capped at OCELOT_MAX_CONCURRENCY, the engine's limit on concurrent processes.
+
+    Returns:
+        str: httpx results showing live hosts with status codes, titles, and technologies, or for
+            large runs a summary (status/technology counts, sample lines) with the path of the full output.
+    """
+    # No shell here to expand "~" in the path httpx is given
+    file_path = str(Path(file_path).expanduser())
+    argv = [HTTPX_BIN, "-l", file_path]
+    if status_code:
+        argv.append("-sc")
+    if title:
+        argv.append("-title")
+    if tech_detect:
+        argv.append("-tech-detect")
+    if follow_redirects:
+        argv.append("-fr")
+    if match_codes:
+        argv.extend(["-mc", match_codes])
+    if filter_codes:
+        argv.extend(["-fc", filter_codes])
+    argv.extend(["-t", str(threads)])
+    argv.extend(shlex.split(extra_args))
+
+    timeout = timeout or HTTPX_TIMEOUT
+    try:
+        shaper = httpx_shaper()
+        sinks = shaper.sinks()
+        assets = None
+        if target:
+            assets = AssetSink(parse_httpx_line, lambda rows: ASSET_STORE.upsert_probes(target, rows))
+            sinks.append(assets)
+        # Shards share the engine's slots; more than it runs at once would only queue
+        shard_count = min(resolve_shard_count(shards, count_lines(Path(file_path))), MAX_CONCURRENT_TOOLS)
+        timings = None
+        if shard_count > 1:
+            result, timings = await _async_httpx_sharded(file_path, argv, shard_count, timeout, sinks)
+        else:
+            result = await run_streaming(argv, sinks=sinks, timeout=timeout, spill_to=spill_path("httpx"))
+        output = _streamed_output("httpx", result, timeout, shaper, "No live hosts found")
+        if timings:
+            output += f"\n{format_timings(timings)}"
+        if assets:
+            output += f"\n{_store_note('probes', target, assets.seen, assets.new)}"
+        return output
     except Exception as e:
         return f"Error running httpx: {str(e)}"
 
@@ -308,15 +1006,46 @@ OSINT_TOOLS = [
     pipe,
     list_dir,
     cat_file,
+    read_window,
     pwd_command,
     find_file,
 
     # Network Recon and ASN Enumeration
     asnmap,
+    asnmap_bulk,
+    scope_filter,
 
     # Web Fingerprinting
     httpx,
+    httpx_incremental,
 
     # Subdomain Enumeration & Asset Discovery
     bbot,
+    bbot_events,
+
+    # Shared asset store
+    query_assets,
+    export_assets,
+]
+
+
+# Registry used by agents running on the async path (arun/aprint_response).
+# The filesystem helpers run in-process (see localfs.py), so they stay synchronous.
+ASYNC_OSINT_TOOLS = [
+    echo,
+    async_pipe,
+    list_dir,
+    cat_file,
+    read_window,
+    pwd_command,
+    find_file,
+    async_asnmap,
+    asnmap_bulk,
+    scope_filter,
+    async_httpx,
+    httpx_incremental,
+    async_bbot,
+    bbot_events,
+    query_assets,
+    export_assets,
 ]
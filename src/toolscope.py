@@ -0,0 +1,118 @@
+"""
+Per-agent tool scoping.
+
+Each specialist is built with only the tools its role needs instead of the
+whole registry, so every model call it makes carries a smaller tool schema.
+The defaults below can be overridden per role in a JSON file
+(~/.ocelot/agent_tools.json, or the path in OCELOT_AGENT_TOOLS_FILE):
+
+    {"asn": ["asnmap", "asnmap_bulk", "tavily"], "reporter": ["*"]}
+
+Entries are tool function names, "tavily" and "files" for the Tavily and
+FileTools toolkits, "mcp" for every attached MCP server, or "*" for all tools.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+from settings import OCELOT_DIR
+
+ROLES = ("asn", "bbot", "httpx", "reporter")
+
+DEFAULT_ROLE_TOOLS: Dict[str, List[str]] = {
+    "asn": ["asnmap", "asnmap_bulk", "scope_filter", "query_assets", "tavily", "mcp"],
+    "bbot": ["bbot", "bbot_events", "query_assets", "export_assets", "list_dir", "read_window", "mcp"],
+    "httpx": ["httpx", "httpx_incremental", "export_assets", "query_assets", "scope_filter", "read_window", "mcp"],
+    "reporter": ["query_assets", "bbot_events", "list_dir", "cat_file", "read_window", "files"],
+}
+
+# JSON file with per-role overrides of DEFAULT_ROLE_TOOLS
+AGENT_TOOLS_FILE = Path(os.getenv("OCELOT_AGENT_TOOLS_FILE", "").strip() or OCELOT_DIR / "agent_tools.json").expanduser()
+
+# Short names the mapping uses for whole toolkits
+TOOLKIT_ALIASES = {"tavily_tools": "tavily", "file_tools": "files"}
+MCP, ALL = "mcp", "*"
+
+
+def tool_name(tool) -> str:
+    """Name of a tool or toolkit as written in the role mapping."""
+    name = getattr(tool, "name", "") or type(tool).__name__
+    return TOOLKIT_ALIASES.get(name, name)
+
+
+def load_role_tools(known: Iterable[str] = (), path: Path = AGENT_TOOLS_FILE) -> Dict[str, List[str]]:
+    """Defaults merged with the overrides file. Unknown roles and tool names are reported and skipped."""
+    mapping = {role: list(names) for role, names in DEFAULT_ROLE_TOOLS.items()}
+    if not path.is_file():
+        return mapping
+    try:
+        overrides = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(overrides, dict):
+            raise ValueError("expected an object mapping roles to tool lists")
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring {path}: {e}")
+        return mapping
+
+    known = set(known)
+    if known:
+        known |= {MCP, ALL}
+    for role, names in overrides.items():
+        if role not in mapping:
+            print(f"Warning: unknown role '{role}' in {path} (expected one of {', '.join(ROLES)})")
+            continue
+        names = [names] if isinstance(names, str) else [str(name) for name in names]
+        unknown = [name for name in names if known and name not in known]
+        if unknown:
+            print(f"Warning: unknown tools for '{role}' in {path}: {', '.join(unknown)}")
+        mapping[role] = [name for name in names if name not in unknown]
+    return mapping
+
+
+def scope_tools(names: List[str], tools: List, mcp_toolkits: List) -> List:
+    """The tools a role's list names, in registry order."""
+    if ALL in names:
+        return list(tools)
+    wanted = set(names)
+    mcp_ids = {id(toolkit) for toolkit in mcp_toolkits}
+    return [
+        tool for tool in tools
+        if tool_name(tool) in wanted or (MCP in wanted and id(tool) in mcp_ids)
+    ]
+
+
+# ----- Measurement -----
+
+def _functions(tools: List) -> List:
+    functions = []
+    for tool in tools:
+        # Toolkits hold their functions in a dict; @tool functions stand alone
+        functions.extend(tool.functions.values() if isinstance(getattr(tool, "functions", None), dict) else [tool])
+    return functions
+
+
+def schema_tokens(tools: List) -> int:
+    """Approximate prompt tokens (4 characters each) of the JSON schemas sent for these tools."""
+    chars = 0
+    for function in _functions(tools):
+        function = function.model_copy(deep=True)  # Processing fills in the schema; keep the original untouched
+        try:
+            function.process_entrypoint(strict=False)
+        except Exception:
+            pass
+        chars += len(json.dumps(function.to_dict()))
+    return chars // 4
+
+
+def format_scope(agents: Dict[str, List], all_tools: List) -> str:
+    """Per-agent tool counts and schema tokens per request, against giving every agent all tools."""
+    full = schema_tokens(all_tools)
+    lines = [f"Tool schema sent per request (≈ tokens; all {len(_functions(all_tools))} tools: {full:,})"]
+    for name, tools in agents.items():
+        tokens = schema_tokens(tools)
+        saved = full - tokens
+        lines.append(
+            f"  {name:<38} {len(_functions(tools)):>3} tools {tokens:>7,} tokens  "
+            f"saves {saved:>7,} ({saved / full * 100 if full else 0:.0f}%)  {', '.join(tool_name(t) for t in tools)}"
+        )
+    return "\n".join(lines)